@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module aggregates the numeric observations of different agents into one agreed value."""
+
+import statistics
+from collections import Counter
+from typing import Dict, List, Optional, Union
+
+
+Number = Union[int, float]
+
+AGGREGATION_MEDIAN = "median"
+AGGREGATION_TRIMMED_MEAN = "trimmed_mean"
+
+# Share of the observations dropped from each end by the trimmed mean
+TRIM_FRACTION = 0.1
+
+
+def _all_int(values: List[Number]) -> bool:
+    return all(isinstance(value, int) for value in values)
+
+
+def median(values: List[Number]) -> Number:
+    """Median of the values, rounded down when fixed-point integers have an even count."""
+    if not _all_int(values) or len(values) % 2:
+        return statistics.median(values)
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return (ordered[middle - 1] + ordered[middle]) // 2
+
+
+def trimmed_mean(values: List[Number], trim_fraction: float = TRIM_FRACTION) -> Number:
+    """Mean of the values without the lowest and highest `trim_fraction` of them, floored for integers."""
+    ordered = sorted(values)
+    trim = int(len(ordered) * trim_fraction)
+    kept = ordered[trim:len(ordered) - trim]
+    if _all_int(kept):
+        return sum(kept) // len(kept)
+    return statistics.mean(kept)
+
+
+def aggregate(values: List[Number], method: str) -> Number:
+    """Aggregate observations of one quantity with the median or the trimmed mean."""
+    if method == AGGREGATION_TRIMMED_MEAN:
+        return trimmed_mean(values)
+    return median(values)
+
+
+def within_tolerance(value: Number, reference: Number, tolerance: float) -> bool:
+    """Whether `value` is within `tolerance`, relative to `reference`, of it."""
+    if reference == 0:
+        return value == 0
+    return abs(value - reference) / abs(reference) <= tolerance
+
+
+def aggregate_within_tolerance(
+    samples: List[Dict[str, Number]],
+    tolerance: float,
+    threshold: int,
+    method: str = AGGREGATION_MEDIAN,
+) -> Optional[Dict[str, Number]]:
+    """
+    Aggregate the agents' observations if enough of them agree.
+
+    Only samples covering the most common set of keys are comparable. An agent agrees when each
+    of its values is within `tolerance` of the median of that key; the agreeing agents' values are
+    then aggregated key by key. The result only depends on the samples, so every agent computes
+    the same one, and integer samples aggregate to integers.
+
+    :param samples: one observation per agent, key to value.
+    :param tolerance: maximum relative distance from the median.
+    :param threshold: minimum number of agreeing agents.
+    :param method: AGGREGATION_MEDIAN or AGGREGATION_TRIMMED_MEAN.
+    :return: key to aggregated value, or None if fewer than `threshold` agents agree.
+    """
+    if not samples:
+        return None
+
+    # Most common key set, ties broken by the sorted keys to stay deterministic
+    key_sets = Counter(tuple(sorted(sample)) for sample in samples)
+    keys = max(key_sets, key=lambda key_set: (key_sets[key_set], key_set))
+    comparable = [sample for sample in samples if tuple(sorted(sample)) == keys]
+    if len(comparable) < threshold:
+        return None
+
+    medians = {key: median([sample[key] for sample in comparable]) for key in keys}
+    agreeing = [
+        sample for sample in comparable
+        if all(within_tolerance(sample[key], medians[key], tolerance) for key in keys)
+    ]
+    if len(agreeing) < threshold:
+        return None
+
+    return {key: aggregate([sample[key] for sample in agreeing], method) for key in keys}
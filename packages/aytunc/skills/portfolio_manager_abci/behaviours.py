@@ -21,10 +21,11 @@
 
 import json
 import requests
+import time
 from abc import ABC
 from pathlib import Path
 from tempfile import mkdtemp
-from typing import Union, Tuple, Dict, Generator, Optional, Set, Type, cast
+from typing import Any, Callable, Union, Tuple, Dict, Generator, List, Optional, Set, Type, cast
 from datetime import datetime
 
 from packages.valory.contracts.portfolio_manager.contract import PORTFOLIOMANAGER
@@ -42,6 +43,7 @@ from packages.valory.protocols.contract_api import ContractApiMessage
 from packages.valory.protocols.ledger_api import LedgerApiMessage
 
 from packages.valory.skills.abstract_round_abci.base import AbstractRound
+from packages.valory.skills.abstract_round_abci.behaviour_utils import TimeoutException
 from packages.valory.skills.abstract_round_abci.behaviours import (
     AbstractRoundBehaviour,
     BaseBehaviour,
@@ -51,6 +53,18 @@ from packages.valory.skills.abstract_round_abci.io_.store import SupportedFilety
 
 
 
+from packages.aytunc.skills.portfolio_manager_abci.deadline import Deadline
+from packages.aytunc.skills.portfolio_manager_abci.fixed_point import (
+    USD_DECIMALS,
+    apply_bps,
+    from_fixed,
+    percentage_to_bps,
+    to_fixed,
+    usd_value,
+)
+from packages.aytunc.skills.portfolio_manager_abci.encoding import (
+    get_portfolio_manager_encoder,
+)
 from packages.aytunc.skills.portfolio_manager_abci.models import (
     CoinMarketCapSpecs,
     TheGraphSpecs,
@@ -60,15 +74,38 @@ from packages.aytunc.skills.portfolio_manager_abci.models import (
     NillionSpecs,
 )
 
+from packages.aytunc.skills.portfolio_manager_abci.pricing import resolve_token_prices
+from packages.aytunc.skills.portfolio_manager_abci.rate_limiting import (
+    RATE_LIMITED_STATUS_CODES,
+    retry_after_seconds,
+)
+from packages.aytunc.skills.portfolio_manager_abci.prompts import (
+    batch_token_budget,
+    build_batch_prompt,
+    build_rebalancing_prompt,
+    parse_batch_decisions,
+)
+from packages.aytunc.skills.portfolio_manager_abci.reports import (
+    PERIOD_REPORT_DIRECTORY,
+    PERIOD_REPORT_INDEX,
+    REPORT_FILENAME,
+    REPORT_FORMAT_COLUMNAR,
+    ReportSpool,
+    append_report,
+    build_report,
+    serialize_compact_json,
+)
 from packages.aytunc.skills.portfolio_manager_abci.rounds import (
     SynchronizedData,
     PortfolioManagerAbciApp,
+    BlockAnchorRound,
     DataPullRound,
     DecisionMakingRound,
     TxPreparationRound,
     Event,
 )
 from packages.aytunc.skills.portfolio_manager_abci.payloads import (
+    BlockAnchorPayload,
     DataPullPayload,
     DecisionMakingPayload,
     TxPreparationPayload,
@@ -86,10 +123,14 @@ EMPTY_CALL_DATA = b"0x"
 SAFE_GAS = 0
 USDC_ADDRESS = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
 WETH_ADDRESS = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2" 
+TOKEN_DECIMALS = {"USDC": 6, "WETH": 18}
 
 class PortfolioManagerBaseBehaviour(BaseBehaviour, ABC):
     """Base behaviour for the portfolio_manager_abci skill."""
 
+    # Timeout of the contract API call in flight, applied by wait_for_message
+    _call_timeout: Optional[float] = None
+
     @property
     def synchronized_data(self) -> SynchronizedData:
         """Return the synchronized data."""
@@ -125,6 +166,389 @@ class PortfolioManagerBaseBehaviour(BaseBehaviour, ABC):
         """Get the TheGraph api specs."""
         return self.context.thegraph_specs
 
+    @property
+    def report_spool(self) -> ReportSpool:
+        """Get the local spool of reports waiting to be uploaded to IPFS."""
+        return ReportSpool(self.params.report_spool_dir)
+
+    @property
+    def deadline(self) -> Deadline:
+        """Deadline of the current round, keeping `deadline_safety_margin` seconds to send the payload."""
+        round_timeout = self.round_sequence.abci_app.event_to_timeout.get(
+            Event.ROUND_TIMEOUT, self.params.round_timeout_seconds
+        )
+        return Deadline.from_round(
+            self.round_sequence.last_round_transition_timestamp.timestamp(),
+            round_timeout,
+            self.params.deadline_safety_margin,
+        )
+
+    def wait_for_message(self, condition: Callable = lambda message: True, timeout: Optional[float] = None) -> Any:
+        """Wait for a message, bounded by the deadline of the contract call in flight, if any."""
+        if self._call_timeout is not None:
+            timeout = self._call_timeout if timeout is None else min(timeout, self._call_timeout)
+        message = yield from super().wait_for_message(condition=condition, timeout=timeout)
+        return message
+
+    @property
+    def anchor_block_kwargs(self) -> Dict[str, int]:
+        """Contract call kwargs pinning a read to the block agreed on in BlockAnchorRound, if any."""
+        anchor_block = self.synchronized_data.anchor_block
+        return {} if anchor_block is None else {"block_identifier": anchor_block}
+
+    def _call_before_deadline(self, request: Callable, description: str, **kwargs: Any) -> Generator[None, None, Any]:
+        """Run a connection request with a timeout of min(request_timeout, remaining round budget)."""
+        timeout = self.deadline.timeout_for(self.params.request_timeout)
+        if timeout <= 0:
+            self.context.logger.warning(f"Round deadline passed; skipping {description}.")
+            return None
+
+        self._call_timeout = timeout
+        try:
+            response = yield from request(**kwargs)
+        except TimeoutException:
+            self.context.logger.warning(f"{description} timed out after {timeout:.2f}s.")
+            return None
+        finally:
+            self._call_timeout = None
+        return response
+
+    def get_contract_api_response_before_deadline(self, **kwargs: Any) -> Generator[None, None, Optional[ContractApiMessage]]:
+        """
+        Call get_contract_api_response with a timeout of min(request_timeout, remaining round budget).
+
+        Args:
+            **kwargs: Arguments for get_contract_api_response
+
+        Returns:
+            The contract API response, or None if the deadline passed before or during the call
+        """
+        response = yield from self._call_before_deadline(
+            self.get_contract_api_response, str(kwargs.get("contract_callable")), **kwargs
+        )
+        return response
+
+    def get_ledger_api_response_before_deadline(self, **kwargs: Any) -> Generator[None, None, Optional[LedgerApiMessage]]:
+        """
+        Call get_ledger_api_response with a timeout of min(request_timeout, remaining round budget).
+
+        Args:
+            **kwargs: Arguments for get_ledger_api_response
+
+        Returns:
+            The ledger API response, or None if the deadline passed before or during the call
+        """
+        response = yield from self._call_before_deadline(
+            self.get_ledger_api_response, str(kwargs.get("ledger_callable")), **kwargs
+        )
+        return response
+
+    def get_rate_limited_http_response(self, api_id: str, **kwargs: Any) -> Generator[None, None, Any]:
+        """
+        Send an HTTP request through the api_id's circuit breaker and the shared per-API rate limiter.
+
+        While the api_id's circuit breaker is open the request is not sent at all and None is returned
+        immediately. Otherwise it waits for a token of the api_id's bucket before sending. On a 429 or 503
+        the whole API is paused for the Retry-After delay, so concurrent behaviours back off too, and the
+        request is retried. Every attempt is bounded by the round deadline.
+
+        Args:
+            api_id (str): The ApiSpecs api_id the request counts against
+            **kwargs: Arguments for get_http_response
+
+        Returns:
+            The HTTP response, the last rate-limited one if retries run out, or None if the circuit is open
+            or the deadline passed
+        """
+        breaker = self.local_state.circuit_breakers.get(api_id)
+        if breaker is not None and not breaker.allow_request():
+            self.context.logger.warning(f"Circuit for {api_id} is {breaker.state}; skipping the request.")
+            return None
+
+        response, cut_short = yield from self._send_rate_limited(api_id, **kwargs)
+        if breaker is None:
+            return response
+        if cut_short:
+            # The dependency was not judged, a half-open breaker lets the next request probe it
+            breaker.release_probe()
+        elif response is None or response.status_code >= 500 or response.status_code in RATE_LIMITED_STATUS_CODES:
+            # Server errors, throttling and connection failures count against the dependency
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def _send_rate_limited(self, api_id: str, **kwargs: Any) -> Generator[None, None, Tuple[Any, bool]]:
+        """
+        Send a request through the api_id's token bucket, backing off and retrying on 429 and 503.
+
+        Returns the response and whether the round deadline, not the dependency, cut the request short.
+        """
+        rate_limiter = self.local_state.rate_limiter
+        response = None
+        for attempt in range(self.params.rate_limit_max_retries + 1):
+            # Only take a slot for a request that will actually be sent
+            if rate_limiter.peek(api_id) >= self.deadline.remaining():
+                self.context.logger.warning(f"Round deadline leaves no time for a {api_id} request.")
+                return response, response is None
+            delay = rate_limiter.reserve(api_id)
+            if delay > 0:
+                self.context.logger.info(f"Rate limiting {api_id}: waiting {delay:.2f}s")
+                yield from self.sleep(delay)
+
+            timeout = self.deadline.timeout_for(self.params.request_timeout)
+            try:
+                response = yield from self.get_http_response(timeout=timeout, **kwargs)
+            except TimeoutException:
+                self.context.logger.warning(f"{api_id} request timed out after {timeout:.2f}s.")
+                return None, timeout < self.params.request_timeout
+            if response is None or response.status_code not in RATE_LIMITED_STATUS_CODES:
+                return response, False
+
+            backoff = retry_after_seconds(response.headers, self.params.rate_limit_default_backoff)
+            self.context.logger.warning(
+                f"{api_id} returned {response.status_code} (attempt {attempt + 1}), backing off {backoff:.2f}s"
+            )
+            rate_limiter.block(api_id, backoff)
+
+        return response, False
+
+    def with_degraded_fallback(self, key: str, value: Any) -> Any:
+        """
+        Cache a fresh external result, or stand in the last cached one when the call failed.
+
+        Args:
+            key (str): Cache key of the result, e.g. "coinmarketcap:WETH"
+            value (Any): The fresh result, None if the call failed or its circuit is open
+
+        Returns:
+            The fresh result, the cached one if it is recent enough, or None
+        """
+        if value is not None:
+            self.local_state.degraded_cache.put(key, value)
+            return value
+
+        cached = self.local_state.degraded_cache.get(key, self.params.degraded_cache_max_age)
+        if cached is not None:
+            self.context.logger.warning(f"Using cached result for {key}")
+        return cached
+
+    def build_period_report(self, token_values: str, total_portfolio_value: int, rebalancing_actions_json: str) -> dict:
+        """
+        Builds this period's rebalancing report.
+
+        Args:
+            token_values (str): JSON string of token values, with USD_DECIMALS decimals
+            total_portfolio_value (int): Total portfolio value in USD, with USD_DECIMALS decimals
+            rebalancing_actions_json (str): JSON string of rebalancing actions
+
+        Returns:
+            dict: The report, in plain USD amounts
+        """
+        # Parse input JSON, reports show plain USD amounts
+        token_values_dict = {
+            symbol: from_fixed(value, USD_DECIMALS) for symbol, value in json.loads(token_values).items()
+        }
+        rebalancing_actions = json.loads(rebalancing_actions_json)
+
+        # Timestamped with consensus time so every agent builds the same report
+        return build_report(
+            timestamp=self.round_sequence.last_round_transition_timestamp.isoformat(),
+            token_values=token_values_dict,
+            total_portfolio_value=from_fixed(total_portfolio_value, USD_DECIMALS),
+            action=rebalancing_actions["action"],
+            reason=rebalancing_actions["reason"],
+        )
+
+    def upload_report(self, portfolio_report: dict, timeout: Optional[float] = None) -> Generator[None, None, Optional[str]]:
+        """
+        Uploads a report, or a columnar report history, to IPFS.
+
+        Args:
+            portfolio_report (dict): The report to upload
+            timeout (Optional[float]): Maximum time to wait for the IPFS node
+
+        Returns:
+            Optional[str]: IPFS hash of the stored report or period directory, or None if storage fails
+        """
+        self.context.logger.info("Storing portfolio report in IPFS...")
+        try:
+            if self.params.batch_report_commitment:
+                directory_hash = yield from self.store_period_reports(
+                    {self.params.portfolio_address_string: portfolio_report}, timeout=timeout
+                )
+                return directory_hash
+
+            report_ipfs_hash = yield from self.send_to_ipfs(
+                filename=REPORT_FILENAME,
+                obj=portfolio_report,
+                filetype=SupportedFiletype.JSON,
+                custom_storer=(
+                    serialize_compact_json
+                    if self.params.report_format == REPORT_FORMAT_COLUMNAR
+                    else None
+                ),
+                timeout=timeout,
+            )
+            return report_ipfs_hash
+        except TimeoutException:
+            self.context.logger.warning("Storing the report in IPFS timed out.")
+            return None
+
+    def store_period_reports(self, reports: Dict[str, dict], timeout: Optional[float] = None) -> Generator[None, None, Optional[str]]:
+        """
+        Stores the reports of every portfolio handled in this period as a single IPFS directory.
+
+        The directory holds one `<user>.json` report per portfolio and an `index.json`
+        mapping each user to its report, so one on-chain write covers all users.
+
+        Args:
+            reports (Dict[str, dict]): Mapping of portfolio address to its report
+            timeout (Optional[float]): Maximum time to wait for the IPFS node
+
+        Returns:
+            Optional[str]: IPFS hash of the stored directory, or None if storage fails
+        """
+        index = {
+            "period": self.synchronized_data.period_count,
+            "users": {user.lower(): f"{user.lower()}.json" for user in reports},
+        }
+
+        directory = {PERIOD_REPORT_INDEX: index}
+        directory.update({f"{user.lower()}.json": report for user, report in reports.items()})
+
+        self.context.logger.info(f"Storing period report directory for {len(reports)} portfolio(s)...")
+        directory_hash = yield from self.send_to_ipfs(
+            filename=PERIOD_REPORT_DIRECTORY,
+            obj=directory,
+            multiple=True,
+            filetype=SupportedFiletype.JSON,
+            custom_storer=(
+                serialize_compact_json
+                if self.params.report_format == REPORT_FORMAT_COLUMNAR
+                else None
+            ),
+            timeout=timeout,
+        )
+        return directory_hash
+
+    def get_previous_report_history(self) -> Generator[None, None, Optional[dict]]:
+        """
+        Fetches the portfolio's last committed report, so the columnar history can be extended.
+
+        Reading the committed hash from the contract keeps every agent on the same history.
+
+        Returns:
+            Optional[dict]: The last committed report or history, or None if there is none yet
+        """
+        portfolio_address = self.params.portfolio_address_string
+        batched = self.params.batch_report_commitment
+
+        response = yield from self.get_contract_api_response_before_deadline(
+            performative=ContractApiMessage.Performative.GET_STATE,
+            contract_address=self.params.portfolio_manager_contract_address_string,
+            contract_id=str(PORTFOLIOMANAGER.contract_id),
+            contract_callable="get_latest_period_report" if batched else "get_ipfs_reports",
+            chain_id=ETHEREUM_CHAIN_ID,
+            **({} if batched else {"user": portfolio_address}),
+            **self.anchor_block_kwargs,
+        )
+
+        if response is None or response.performative != ContractApiMessage.Performative.STATE:
+            self.context.logger.warning(f"Could not read previous report hash: {response}")
+            return None
+
+        if batched:
+            previous_hash = response.state.body.get("report")
+        else:
+            previous_hash = (response.state.body.get("reports") or [None])[-1]
+
+        if not previous_hash:
+            return None
+
+        previous = yield from self.fetch_report_history(previous_hash)
+        return previous
+
+    def fetch_report_history(self, previous_hash: str) -> Generator[None, None, Optional[dict]]:
+        """
+        Fetches the portfolio's report, or columnar history, stored under an IPFS hash.
+
+        Args:
+            previous_hash (str): IPFS hash of the report, or of the period directory when batched
+
+        Returns:
+            Optional[dict]: The report or history, or None if it could not be fetched in time
+        """
+        portfolio_address = self.params.portfolio_address_string
+        timeout = self.deadline.timeout_for(self.params.request_timeout)
+        if timeout <= 0:
+            self.context.logger.warning(f"Round deadline passed; skipping the read of {previous_hash}.")
+            return None
+        try:
+            previous = yield from self.get_from_ipfs(previous_hash, filetype=SupportedFiletype.JSON, timeout=timeout)
+        except TimeoutException:
+            self.context.logger.warning(f"Fetching {previous_hash} from IPFS timed out after {timeout:.2f}s.")
+            return None
+        if previous is None:
+            self.context.logger.warning(f"Could not fetch previous report {previous_hash} from IPFS")
+            return None
+
+        # Directories are returned as a filename to content mapping
+        if self.params.batch_report_commitment:
+            return previous.get(f"{portfolio_address.lower()}.json")
+        return previous
+
+
+class BlockAnchorBehaviour(PortfolioManagerBaseBehaviour):
+    """Behaviour proposing the block every on-chain read of the period is pinned to."""
+
+    matching_round: Type[AbstractRound] = BlockAnchorRound
+
+    def async_act(self) -> Generator:
+        """
+        Execute the block anchor behaviour asynchronously.
+
+        Proposes the latest block minus `anchor_block_confirmations`, so the block is
+        settled and available on every agent's node by the time it is read.
+        """
+        with self.context.benchmark_tool.measure(self.behaviour_id).local():
+            block_number = yield from self.get_anchor_block()
+            self.context.logger.info(f"Proposed anchor block: {block_number}")
+
+            payload = BlockAnchorPayload(
+                sender=self.context.agent_address,
+                block_number=block_number,
+            )
+
+        with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
+            yield from self.send_a2a_transaction(payload)
+            yield from self.wait_until_round_end()
+
+        self.set_done()
+
+    def get_anchor_block(self) -> Generator[None, None, Optional[int]]:
+        """
+        Fetch the block number to propose as anchor.
+
+        Returns:
+            The latest block number minus the confirmations, or None if it could not be read
+        """
+        response = yield from self.get_ledger_api_response_before_deadline(
+            performative=LedgerApiMessage.Performative.GET_STATE,  # type: ignore
+            ledger_callable="get_block_number",
+            chain_id=ETHEREUM_CHAIN_ID,
+        )
+        if response is None or response.performative != LedgerApiMessage.Performative.STATE:
+            self.context.logger.error(f"Error retrieving the latest block number: {response}")
+            return None
+
+        latest_block = response.state.body.get("get_block_number_result")
+        if latest_block is None:
+            self.context.logger.error("No block number returned")
+            return None
+
+        return max(0, int(latest_block) - self.params.anchor_block_confirmations)
+
 
 class DataPullBehaviour(PortfolioManagerBaseBehaviour):
     """Behaviour responsible for pulling token balances and prices to calculate portfolio allocation."""
@@ -142,7 +566,9 @@ class DataPullBehaviour(PortfolioManagerBaseBehaviour):
         """
         with self.context.benchmark_tool.measure(self.behaviour_id).local():
             # Get portfolio data
-            token_values, total_portfolio_value = yield from self.calculate_portfolio_allocation()
+            # A failed pull is agreed on as empty data, which DecisionMaking turns into a skipped period
+            portfolio_allocation = yield from self.calculate_portfolio_allocation()
+            token_values, total_portfolio_value = portfolio_allocation or (None, None)
             self.context.logger.info(f"Token values: {token_values}")
             self.context.logger.info(f"Total portfolio value: {total_portfolio_value}")
 
@@ -163,7 +589,7 @@ class DataPullBehaviour(PortfolioManagerBaseBehaviour):
 
         self.set_done()
     
-    def get_token_price_specs(self, symbol: str) -> Generator[None, None, Optional[float]]:
+    def get_token_price_specs(self, symbol: str) -> Generator[None, None, Optional[int]]:
         """
         Fetch current token price from CoinMarketCap API.
 
@@ -171,28 +597,30 @@ class DataPullBehaviour(PortfolioManagerBaseBehaviour):
             symbol: Token symbol (e.g. "USDC", "WETH")
 
         Returns:
-            Current token price in USD, or None if price fetch fails
+            Current token price in USD with USD_DECIMALS decimals, or None if price fetch fails
         """
         # Prepare API request
         specs = self.coinmarketcap_specs.get_spec()
         specs["parameters"]["symbol"] = symbol
 
         # Make API call and process response
-        raw_response = yield from self.get_http_response(**specs)
-        response = self.coinmarketcap_specs.process_response(raw_response)
+        raw_response = yield from self.get_rate_limited_http_response(self.coinmarketcap_specs.api_id, **specs)
+        response = self.coinmarketcap_specs.process_response(raw_response) if raw_response is not None else None
 
         # Extract price from response
-        price = response.get(symbol, {}).get("quote", {}).get("USD", {}).get("price", None)
+        price = (response or {}).get(symbol, {}).get("quote", {}).get("USD", {}).get("price", None)
         self.context.logger.info(f"Got token price from CoinMarketCap: {price}")
 
-        return price
+        price = self.with_degraded_fallback(f"coinmarketcap:{symbol}", price)
+        return to_fixed(price, USD_DECIMALS) if price is not None else None
 
-    def get_token_balances(self) -> Generator[None, None, Optional[Dict[str, float]]]:
+    def get_token_balances(self) -> Generator[None, None, Optional[Dict[str, Optional[int]]]]:
         """
         Fetch token balances from the deployed smart contract.
 
         Returns:
-            Dictionary mapping token symbols to their balances, or None if fetch fails
+            Dictionary mapping token symbols to their raw balances, in the token's smallest unit,
+            or None if fetch fails
         """
         # Get contract addresses
         portfolio_address = self.params.portfolio_address_string
@@ -209,7 +637,7 @@ class DataPullBehaviour(PortfolioManagerBaseBehaviour):
         token_symbols = list(tokens_to_rebalance.keys())
 
         # Call contract to get balances
-        response_msg = yield from self.get_contract_api_response(
+        response_msg = yield from self.get_contract_api_response_before_deadline(
             performative=ContractApiMessage.Performative.GET_RAW_TRANSACTION,  # type: ignore
             contract_address=portfolio_manager_contract_address,
             contract_id=str(PORTFOLIOMANAGER.contract_id),
@@ -217,10 +645,11 @@ class DataPullBehaviour(PortfolioManagerBaseBehaviour):
             user=portfolio_address,
             tokens=token_addresses,
             chain_id=ETHEREUM_CHAIN_ID,
+            **self.anchor_block_kwargs,
         )
 
         # Validate response
-        if response_msg.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
+        if response_msg is None or response_msg.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
             self.context.logger.error(f"Error retrieving balances: {response_msg}")
             return None
 
@@ -229,38 +658,99 @@ class DataPullBehaviour(PortfolioManagerBaseBehaviour):
             self.context.logger.error("No balance data returned")
             return None
 
-        # Process balances
+        # Process balances, kept as raw integers
         balances = {}
         for symbol, balance in zip(token_symbols, balances_list):
             if balance is not None:
                 decimals = tokens_to_rebalance[symbol]["decimals"]
-                readable_balance = float(balance) / (10 ** decimals)
-                balances[symbol] = readable_balance
-                self.context.logger.info(f"Balance for {symbol}: {readable_balance}")
+                balances[symbol] = int(balance)
+                self.context.logger.info(f"Balance for {symbol}: {from_fixed(int(balance), decimals)}")
             else:
                 self.context.logger.error(f"No balance data returned for {symbol}")
                 balances[symbol] = None
 
         return balances if balances else None
 
-    def calculate_portfolio_allocation(self) -> Generator[None, None, Optional[Tuple[Dict[str, float], float]]]:
+    def get_onchain_balances_and_prices(self) -> Generator[None, None, Optional[Tuple[Dict[str, int], Dict[str, int]]]]:
+        """
+        Fetch token balances and on-chain prices in a single Multicall3 call.
+
+        Prices come from the configured Chainlink aggregators, cross-checked against Uniswap V3 TWAPs.
+
+        Returns:
+            Tuple of raw token balances and the USD prices, with USD_DECIMALS decimals,
+            that could be resolved on-chain, or None if the call fails
+        """
+        tokens_to_rebalance = {
+            "USDC": {"address": USDC_ADDRESS, "decimals": 6},
+            "WETH": {"address": WETH_ADDRESS, "decimals": 18}
+        }
+        pools = [source["pool"] for source in self.params.uniswap_v3_pools.values()]
+        aggregators = list(self.params.chainlink_aggregators.values())
+
+        response_msg = yield from self.get_contract_api_response_before_deadline(
+            performative=ContractApiMessage.Performative.GET_RAW_TRANSACTION,  # type: ignore
+            contract_address=self.params.portfolio_manager_contract_address_string,
+            contract_id=str(PORTFOLIOMANAGER.contract_id),
+            contract_callable="get_balances_and_prices",
+            user=self.params.portfolio_address_string,
+            tokens=[token_info["address"] for token_info in tokens_to_rebalance.values()],
+            pools=pools,
+            aggregators=aggregators,
+            twap_window=self.params.twap_window,
+            multicall_address=self.params.multicall3_address,
+            chain_id=ETHEREUM_CHAIN_ID,
+            **self.anchor_block_kwargs,
+        )
+
+        if response_msg is None or response_msg.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
+            self.context.logger.error(f"Error retrieving on-chain balances and prices: {response_msg}")
+            return None
+
+        readings = response_msg.raw_transaction.body
+        balances = {symbol: int(balance) for symbol, balance in zip(tokens_to_rebalance, readings["balances"])}
+
+        # Staleness is judged against consensus time so every agent reaches the same verdict
+        now = self.round_sequence.last_round_transition_timestamp.timestamp()
+        prices = resolve_token_prices(
+            readings=readings,
+            chainlink_aggregators=self.params.chainlink_aggregators,
+            uniswap_v3_pools=self.params.uniswap_v3_pools,
+            now=now,
+            twap_window=self.params.twap_window,
+            max_age=self.params.oracle_max_age,
+            max_deviation=self.params.oracle_max_deviation,
+        )
+        self.context.logger.info(f"On-chain prices at block {readings['block_number']}: {prices}")
+
+        return balances, prices
+
+    def calculate_portfolio_allocation(self) -> Generator[None, None, Optional[Tuple[Dict[str, int], int]]]:
         """
         Calculate current portfolio value and allocation percentages.
 
+        Values are integers with USD_DECIMALS decimals so they serialize identically on every agent.
+
         Returns:
             Tuple containing:
             - Dictionary mapping token symbols to their USD values
             - Total portfolio value in USD
             Returns None if calculation fails
         """
-        # Get current token balances
-        token_balances = yield from self.get_token_balances()
+        # Get current token balances, and on-chain prices when enabled
+        token_balances, onchain_prices = None, {}
+        if self.params.onchain_pricing:
+            onchain_data = yield from self.get_onchain_balances_and_prices()
+            if onchain_data is not None:
+                token_balances, onchain_prices = onchain_data
+        if token_balances is None:
+            token_balances = yield from self.get_token_balances()
         if token_balances is None:
             self.context.logger.error("Failed to retrieve token balances.")
             return None
 
         # Calculate USD values for each token
-        total_portfolio_value = 0.0
+        total_portfolio_value = 0
         token_values = {}
 
         for token_symbol, balance in token_balances.items():
@@ -268,18 +758,20 @@ class DataPullBehaviour(PortfolioManagerBaseBehaviour):
                 self.context.logger.error(f"No balance available for {token_symbol}")
                 continue
 
-            # Get current token price
-            price = yield from self.get_token_price_specs(symbol=token_symbol)
+            # Get current token price, falling back to CoinMarketCap when no on-chain price is usable
+            price = onchain_prices.get(token_symbol)
+            if price is None:
+                price = yield from self.get_token_price_specs(symbol=token_symbol)
             if price is None:
                 self.context.logger.error(f"Failed to retrieve price for {token_symbol}")
                 continue
 
             # Calculate token value in USD
-            token_value = balance * price
+            token_value = usd_value(balance, TOKEN_DECIMALS[token_symbol], price)
             token_values[token_symbol] = token_value
             total_portfolio_value += token_value
 
-            self.context.logger.info(f"Value for {token_symbol}: {token_value:.2f} USD")
+            self.context.logger.info(f"Value for {token_symbol}: {from_fixed(token_value, USD_DECIMALS):.2f} USD")
 
         # Validate total portfolio value
         if total_portfolio_value == 0:
@@ -289,9 +781,11 @@ class DataPullBehaviour(PortfolioManagerBaseBehaviour):
         # Log allocation percentages
         for token_symbol, token_value in token_values.items():
             percentage = (token_value / total_portfolio_value) * 100
-            self.context.logger.info(f"{token_symbol}: {percentage:.2f}% of portfolio (Value: {token_value:.2f} USD)")
+            self.context.logger.info(
+                f"{token_symbol}: {percentage:.2f}% of portfolio (Value: {from_fixed(token_value, USD_DECIMALS):.2f} USD)"
+            )
 
-        self.context.logger.info(f"Total Portfolio Value: {total_portfolio_value:.2f} USD")
+        self.context.logger.info(f"Total Portfolio Value: {from_fixed(total_portfolio_value, USD_DECIMALS):.2f} USD")
 
         return token_values, total_portfolio_value
 
@@ -316,12 +810,14 @@ class DecisionMakingBehaviour(PortfolioManagerBaseBehaviour):
             # Get rebalancing decision and IPFS report
             event, rebalancing_decision, report_hash = yield from self.get_next_event()
 
-            # Create payload with decision data
+            # Create payload with decision data, and the reports this agent uploaded but did not commit yet
+            uploaded = self.local_state.uploaded_report_hashes
             payload = DecisionMakingPayload(
                 sender=sender,
                 event=event,
                 adjustment_balances=rebalancing_decision,
-                ipfs_hash=report_hash
+                ipfs_hash=report_hash,
+                uploaded_report_hashes=json.dumps(uploaded, sort_keys=True) if uploaded else None,
             )
 
         # Measure consensus round time
@@ -381,7 +877,8 @@ class DecisionMakingBehaviour(PortfolioManagerBaseBehaviour):
 
         try:
             # Make HTTP request to The Graph API
-            raw_response = yield from self.get_http_response(
+            raw_response = yield from self.get_rate_limited_http_response(
+                self.thegraph_specs.api_id,
                 method="POST",
                 url=specs["url"],
                 content=request_content,
@@ -418,43 +915,35 @@ class DecisionMakingBehaviour(PortfolioManagerBaseBehaviour):
             self.context.logger.error(f"Error fetching price data: {str(e)}")
             return None
 
-    def get_llm_response(self, prompt: str) -> Generator[None, None, Optional[dict]]:
+    def get_llm_completion(self, prompt: str, max_tokens: Optional[int] = None) -> Generator[None, None, Tuple[Optional[str], Optional[str]]]:
         """
-        Gets rebalancing recommendation from LLM API based on provided prompt.
-        
+        Sends a prompt to the LLM and returns the text of its answer.
+
         Args:
             prompt (str): The prompt to send to the LLM
-            
+            max_tokens (Optional[int]): Completion token cap, llm_max_completion_tokens if not given
+
         Returns:
-            Optional[dict]: Parsed JSON response containing rebalancing decision, or None if request fails
+            Tuple of the answer text and the provider that gave it, or (None, provider) if the request fails
         """
         # Get LLM selection, default to OpenAI if not specified
         llm_selection = self.params.llm_selection or "openai"
-        self.context.logger.info(f"Using LLM: {llm_selection}")
 
-        # Get API specifications based on LLM selection
-        if llm_selection == "nillion":
-            specs = self.nillion_specs.get_spec()
+        if len(self.params.llm_providers) > 1:
+            # Route across providers, the response tells which one answered
+            raw_response, llm_selection = yield from self.get_hedged_llm_response(
+                prompt, preferred=llm_selection, max_tokens=max_tokens
+            )
         else:
-            specs = self.openai_specs.get_spec()
-
-        # Update prompt in message parameters
-        specs['parameters']['messages'][1]['content'] = prompt
-
-        # Prepare request payload
-        request_content = json.dumps(specs['parameters']).encode('utf-8')
-
-        # Make API request
-        raw_response = yield from self.get_http_response(
-            method=specs['method'],
-            url=specs['url'],
-            content=request_content, 
-            headers=specs['headers']
-        )
+            self.context.logger.info(f"Using LLM: {llm_selection}")
+            api_specs = self.get_llm_specs(llm_selection)
+            raw_response = yield from self.get_rate_limited_http_response(
+                api_specs.api_id, **self.build_llm_request(llm_selection, prompt, max_tokens)
+            )
 
         if raw_response is None:
             self.context.logger.error(f"No response received from {llm_selection} API")
-            return None
+            return None, llm_selection
 
         try:
             # Parse response based on LLM selection
@@ -463,8 +952,33 @@ class DecisionMakingBehaviour(PortfolioManagerBaseBehaviour):
             else:
                 response_data = json.loads(raw_response.body)
 
-            response_text = response_data.get('choices', [])[0].get('message', {}).get('content', '').strip()
+            usage = response_data.get('usage') or {}
+            self.context.logger.info(
+                f"{llm_selection} usage: {usage.get('prompt_tokens')} prompt tokens, "
+                f"{usage.get('completion_tokens')} completion tokens"
+            )
+
+            return response_data.get('choices', [])[0].get('message', {}).get('content', '').strip(), llm_selection
+
+        except (json.JSONDecodeError, IndexError, KeyError, AttributeError) as e:
+            self.context.logger.error(f"Error parsing {llm_selection} response: {e}")
+            return None, llm_selection
+
+    def get_llm_response(self, prompt: str) -> Generator[None, None, Optional[dict]]:
+        """
+        Gets rebalancing recommendation from LLM API based on provided prompt.
+        
+        Args:
+            prompt (str): The prompt to send to the LLM
             
+        Returns:
+            Optional[dict]: Parsed JSON response containing rebalancing decision, or None if request fails
+        """
+        response_text, llm_selection = yield from self.get_llm_completion(prompt)
+        if response_text is None:
+            return None
+
+        try:
             # Handle markdown code blocks if present
             if '```json' in response_text:
                 json_str = response_text.split('```json\n')[1].split('\n```')[0]
@@ -490,6 +1004,234 @@ class DecisionMakingBehaviour(PortfolioManagerBaseBehaviour):
             self.context.logger.error(f"Error parsing {llm_selection} response: {e}")
             return None
 
+    def get_batched_llm_decisions(
+        self, portfolios: Dict[str, Dict[str, Any]], token_data: Dict[str, List[Dict[str, Any]]]
+    ) -> Generator[None, None, Dict[str, Optional[dict]]]:
+        """
+        Gets one rebalancing decision per portfolio, asking the LLM for up to llm_decision_batch_size at a time.
+
+        The token budget grows by prompt_tokens_per_batched_portfolio for each portfolio beyond the
+        first, as the market section is shared. A batch whose prompt does not fit it, or whose answer
+        leaves some portfolios without a well-formed decision, is split in halves and the unanswered
+        part retried, down to single portfolios. A failed request is not split, as smaller requests
+        would fail the same way.
+
+        Args:
+            portfolios (Dict[str, Dict[str, Any]]): Portfolio address to its total value and allocation
+            token_data (Dict[str, List[Dict[str, Any]]]): Token symbol to its daily market data
+
+        Returns:
+            Dict[str, Optional[dict]]: Portfolio address to its decision, None where none was obtained
+        """
+        decisions: Dict[str, Optional[dict]] = {address: None for address in portfolios}
+        addresses = list(portfolios)
+        size = max(1, self.params.llm_decision_batch_size)
+        pending = [addresses[i:i + size] for i in range(0, len(addresses), size)]
+
+        while pending:
+            if self.deadline.expired():
+                self.context.logger.warning(f"Round deadline reached with {sum(map(len, pending))} portfolio(s) undecided")
+                break
+
+            batch = pending.pop(0)
+            # Short ids keep addresses out of the prompt
+            ids = {f"p{index}": address for index, address in enumerate(batch)}
+            budget = batch_token_budget(
+                self.params.prompt_token_budget, self.params.prompt_tokens_per_batched_portfolio, len(batch)
+            )
+            prompt, prompt_tokens, detail_level = build_batch_prompt(
+                {portfolio_id: portfolios[address] for portfolio_id, address in ids.items()},
+                token_data,
+                budget,
+                self.params.prompt_tokenizer_encoding,
+            )
+            if prompt_tokens > budget and len(batch) > 1:
+                half = len(batch) // 2
+                pending[:0] = [batch[:half], batch[half:]]
+                continue
+
+            self.context.logger.info(
+                f"Batch of {len(batch)} portfolio(s): {prompt_tokens} prompt tokens ({detail_level} market data)"
+            )
+            response_text, _ = yield from self.get_llm_completion(
+                prompt, max_tokens=self.params.llm_max_completion_tokens * len(batch)
+            )
+            if response_text is None:
+                continue
+
+            answered = parse_batch_decisions(response_text, list(ids))
+            for portfolio_id, decision in answered.items():
+                decisions[ids[portfolio_id]] = decision
+
+            missing = [address for portfolio_id, address in ids.items() if portfolio_id not in answered]
+            if missing and len(batch) > 1:
+                self.context.logger.warning(f"Malformed decisions for {len(missing)} portfolio(s); retrying them")
+                half = (len(missing) + 1) // 2
+                pending[:0] = [part for part in (missing[:half], missing[half:]) if part]
+
+        return decisions
+
+    def get_llm_specs(self, provider: str) -> Union[OpenAISpecs, NillionSpecs]:
+        """Get the API specs of an LLM provider."""
+        return self.nillion_specs if provider == "nillion" else self.openai_specs
+
+    def build_llm_request(self, provider: str, prompt: str, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Builds the HTTP request asking an LLM provider for a decision on the prompt.
+
+        Args:
+            provider (str): LLM provider, "openai" or "nillion"
+            prompt (str): The prompt to send to the LLM
+            max_tokens (Optional[int]): Completion token cap, llm_max_completion_tokens if not given
+
+        Returns:
+            Dict[str, Any]: Arguments for get_http_response
+        """
+        specs = self.get_llm_specs(provider).get_spec()
+
+        # Update prompt in message parameters
+        specs['parameters']['messages'][1]['content'] = prompt
+        specs['parameters']['max_tokens'] = max_tokens or self.params.llm_max_completion_tokens
+
+        return {
+            "method": specs['method'],
+            "url": specs['url'],
+            "content": json.dumps(specs['parameters']).encode('utf-8'),
+            "headers": specs['headers'],
+        }
+
+    def send_llm_request(
+        self, provider: str, prompt: str, wait_for_quota: bool, max_tokens: Optional[int] = None
+    ) -> Generator[None, None, Optional[str]]:
+        """
+        Sends an LLM request without waiting for its response.
+
+        Args:
+            provider (str): LLM provider to send to
+            prompt (str): The prompt to send to the LLM
+            wait_for_quota (bool): Whether to wait for the provider's rate limiter instead of giving up
+            max_tokens (Optional[int]): Completion token cap, llm_max_completion_tokens if not given
+
+        Returns:
+            Optional[str]: Nonce the response will carry, or None if the provider is unavailable
+        """
+        api_id = self.get_llm_specs(provider).api_id
+
+        # Only take a slot, or the half-open probe, for a request that will actually be sent
+        rate_limiter = self.local_state.rate_limiter
+        delay = rate_limiter.peek(api_id)
+        if delay > 0 and (not wait_for_quota or delay >= self.deadline.remaining()):
+            self.context.logger.info(f"{provider} is rate limited; not routing to it.")
+            return None
+
+        breaker = self.local_state.circuit_breakers.get(api_id)
+        if breaker is not None and not breaker.allow_request():
+            self.context.logger.info(f"Circuit for {provider} is {breaker.state}; not routing to it.")
+            return None
+        delay = rate_limiter.reserve(api_id)
+        if delay > 0:
+            yield from self.sleep(delay)
+
+        request_message, http_dialogue = self._build_http_request_message(
+            **self.build_llm_request(provider, prompt, max_tokens)
+        )
+        nonce = self._get_request_nonce_from_dialogue(http_dialogue)
+        self.context.requests.request_id_to_callback[nonce] = self.get_callback_request()
+        self.context.outbox.put_message(message=request_message)
+        self.context.logger.info(f"Sent LLM request to {provider}")
+        return nonce
+
+    def get_hedged_llm_response(
+        self, prompt: str, preferred: str, max_tokens: Optional[int] = None
+    ) -> Generator[None, None, Tuple[Any, Optional[str]]]:
+        """
+        Gets an LLM response from the fastest healthy provider, hedging with the next one.
+
+        The request goes to the provider ranked first by the shared LLM router. If it has not answered
+        by its p95 latency, or it fails, the same request goes to the next provider and whichever
+        completes first wins. Everything is bounded by the round deadline.
+
+        Args:
+            prompt (str): The prompt to send to the LLM
+            preferred (str): Provider winning ties, i.e. the configured llm_selection
+            max_tokens (Optional[int]): Completion token cap, llm_max_completion_tokens if not given
+
+        Returns:
+            Tuple of the HTTP response and the provider that sent it, or (None, None) if none answered
+        """
+        router = self.local_state.llm_router
+        candidates = router.rank(self.params.llm_providers, preferred=preferred)
+        in_flight: Dict[str, Tuple[str, float]] = {}
+
+        def launch(wait_for_quota: bool) -> Generator[None, None, Optional[str]]:
+            while candidates:
+                provider = candidates.pop(0)
+                nonce = yield from self.send_llm_request(provider, prompt, wait_for_quota, max_tokens)
+                if nonce is not None:
+                    in_flight[nonce] = (provider, time.time())
+                    return provider
+            return None
+
+        primary = yield from launch(wait_for_quota=True)
+        if primary is None:
+            self.context.logger.error("No LLM provider available")
+            return None, None
+
+        ends_at = time.time() + self.deadline.remaining()
+        hedge_at: Optional[float] = time.time() + router.hedge_delay(primary)
+        timed_out = False
+        try:
+            while in_flight:
+                now = time.time()
+                if now >= ends_at:
+                    break
+                wait_until = min(ends_at, hedge_at) if hedge_at is not None and candidates else ends_at
+                try:
+                    response = yield from self.wait_for_message(
+                        condition=lambda message: message.dialogue_reference[0] in in_flight,
+                        timeout=max(wait_until - now, 0.001),
+                    )
+                except TimeoutException:
+                    if hedge_at is not None and time.time() >= hedge_at and candidates:
+                        hedge_at = None
+                        hedge = yield from launch(wait_for_quota=False)
+                        if hedge is not None:
+                            self.context.logger.info(f"{primary} is slow, hedging with {hedge}")
+                    continue
+
+                provider, sent_at = in_flight.pop(response.dialogue_reference[0])
+                breaker = self.local_state.circuit_breakers.get(self.get_llm_specs(provider).api_id)
+                if response.status_code == 200:
+                    router.record_success(provider, time.time() - sent_at)
+                    if breaker is not None:
+                        breaker.record_success()
+                    self.context.logger.info(f"Using LLM: {provider} ({time.time() - sent_at:.2f}s)")
+                    return response, provider
+
+                self.context.logger.warning(f"{provider} returned {response.status_code}")
+                router.record_failure(provider)
+                if breaker is not None:
+                    breaker.record_failure()
+                if not in_flight:
+                    hedge_at = None
+                    yield from launch(wait_for_quota=False)
+
+            timed_out = True
+            self.context.logger.error("No LLM provider answered before the round deadline")
+            return None, None
+        finally:
+            for nonce, (provider, _) in in_flight.items():
+                # Late answers must not be taken for the response of a later request
+                self.context.requests.request_id_to_callback.pop(nonce, None)
+                # Resolve the breakers, a losing hedge does not count against its provider
+                breaker = self.local_state.circuit_breakers.get(self.get_llm_specs(provider).api_id)
+                if timed_out:
+                    router.record_failure(provider)
+                    if breaker is not None:
+                        breaker.record_failure()
+                elif breaker is not None:
+                    breaker.release_probe()
+
     def get_next_event(self) -> Generator[None, None, Optional[Tuple[str,Dict[str, float], str]]]:
         """
         Determines next portfolio action by calculating rebalancing needs and generating a report.
@@ -520,6 +1262,8 @@ class DecisionMakingBehaviour(PortfolioManagerBaseBehaviour):
         # Log report status
         if report_ipfs_hash:
             self.context.logger.info(f"Rebalancing report stored in IPFS: https://gateway.autonolas.tech/ipfs/{report_ipfs_hash}")
+        elif self.params.async_report_upload:
+            self.context.logger.info("Rebalancing report deferred; it is spooled and uploaded during TxPreparation.")
         else:
             self.context.logger.error("Failed to store rebalancing report in IPFS.")
 
@@ -557,52 +1301,35 @@ class DecisionMakingBehaviour(PortfolioManagerBaseBehaviour):
             self.context.logger.error("Total portfolio value is None or zero; cannot calculate rebalancing.")
             return None
 
-        # Get market data
+        # Get market data, skipping the period if neither The Graph nor a recent cached answer is available
         token_data = yield from self.get_uniswap_token_price_specs()
+        token_data = self.with_degraded_fallback("thegraph:token_day_data", token_data)
+        if token_data is None:
+            self.context.logger.error("No market data available; skipping rebalancing this period.")
+            return None
 
-        # Calculate current allocation percentages
-        weth_percentage = (token_values.get("WETH", 0) / total_portfolio_value) * 100
-        usdc_percentage = (token_values.get("USDC", 0) / total_portfolio_value) * 100
-
-        # Get latest market data points
-        weth_latest = token_data["WETH"][0]
-        weth_yesterday = token_data["WETH"][1]
-        usdc_latest = token_data["USDC"][0]
-        usdc_yesterday = token_data["USDC"][1]
-
-        # Prepare market summary for LLM
-        market_summary = {
-            "portfolio": {
-                "total_value": f"${total_portfolio_value:,.2f}",
-                "weth_percentage": f"{weth_percentage:.2f}%",
-                "usdc_percentage": f"{usdc_percentage:.2f}%"
+        # Current allocation of every token held
+        portfolio = {
+            "total_usd": round(from_fixed(total_portfolio_value, USD_DECIMALS), 2),
+            "allocation%": {
+                symbol: round(value / total_portfolio_value * 100, 2)
+                for symbol, value in sorted(token_values.items())
             },
-            "market_data": {
-                "weth": {
-                    "current_price": f"${float(weth_latest['priceUSD']):.2f}",
-                    "price_change": f"{((float(weth_latest['priceUSD']) - float(weth_yesterday['priceUSD'])) / float(weth_yesterday['priceUSD']) * 100):.2f}%",
-                    "24h_volume": f"${float(weth_latest['volumeUSD']):,.2f}",
-                    "volume_change": f"{((float(weth_latest['volumeUSD']) - float(weth_yesterday['volumeUSD'])) / float(weth_yesterday['volumeUSD']) * 100):.2f}%"
-                }
-            }
         }
 
-        # Format market summary for prompt
-        market_summary_str = json.dumps(market_summary, indent=2)
-
-        # Construct LLM prompt
-        prompt = f"""Based on the following portfolio and market data:
-            {market_summary_str}
+        if self.params.batch_llm_decisions:
+            portfolio_address = self.params.portfolio_address_string
+            decisions = yield from self.get_batched_llm_decisions({portfolio_address: portfolio}, token_data)
+            self.context.logger.info(f"Batched decisions: {decisions}")
+            return decisions.get(portfolio_address)
 
-            Provide a single swap recommendation as JSON with two fields:
-            1. 'action': specify direction (WETH to USDC or USDC to WETH) and percentage to swap (1-10%)
-            2. 'reason': brief explanation in 10 words or less
-
-            Response format example:
-            {{
-                "action": "swap 3% of weth to usdc",
-                "reason": "decreasing volume suggests potential price decline"
-        }}"""
+        # Construct LLM prompt, compressing the market data to the token budget
+        prompt, prompt_tokens, detail_level = build_rebalancing_prompt(
+            portfolio, token_data, self.params.prompt_token_budget, self.params.prompt_tokenizer_encoding
+        )
+        self.context.logger.info(
+            f"Prompt uses {prompt_tokens} of {self.params.prompt_token_budget} tokens ({detail_level} market data)"
+        )
 
         # Log prompt
         self.context.logger.info(f"Generated LLM Prompt:\n{prompt}")
@@ -615,7 +1342,7 @@ class DecisionMakingBehaviour(PortfolioManagerBaseBehaviour):
 
         return rebalance_decision
 
-    def get_token_price_specs(self, symbol) -> Generator[None, None, Optional[float]]:
+    def get_token_price_specs(self, symbol) -> Generator[None, None, Optional[int]]:
         """
         Fetches current token price from CoinMarketCap API.
         
@@ -623,76 +1350,59 @@ class DecisionMakingBehaviour(PortfolioManagerBaseBehaviour):
             symbol (str): Token symbol to fetch price for
             
         Returns:
-            Optional[float]: Current token price in USD, or None if request fails
+            Optional[int]: Current token price in USD with USD_DECIMALS decimals, or None if request fails
         """
         # Get API specifications
         specs = self.coinmarketcap_specs.get_spec()
         specs["parameters"]["symbol"] = symbol
 
         # Make API request
-        raw_response = yield from self.get_http_response(**specs)
+        raw_response = yield from self.get_rate_limited_http_response(self.coinmarketcap_specs.api_id, **specs)
 
         # Process response
-        response = self.coinmarketcap_specs.process_response(raw_response)
+        response = self.coinmarketcap_specs.process_response(raw_response) if raw_response is not None else None
 
         # Extract price from response
-        token_data = response.get(symbol, {})
+        token_data = (response or {}).get(symbol, {})
         price_info = token_data.get("quote", {}).get("USD", {})
         price = price_info.get("price", None)
 
         # Log result
         self.context.logger.info(f"Got token price from CoinMarketCap: {price}")
 
-        return price
+        price = self.with_degraded_fallback(f"coinmarketcap:{symbol}", price)
+        return to_fixed(price, USD_DECIMALS) if price is not None else None
 
-    def generate_and_store_report(self, token_values: str, total_portfolio_value: float, rebalancing_actions_json: str) -> Generator[None, None, Optional[str]]:
+    def generate_and_store_report(self, token_values: str, total_portfolio_value: int, rebalancing_actions_json: str) -> Generator[None, None, Optional[str]]:
         """
         Generates a portfolio rebalancing report and stores it in IPFS.
+
+        With asynchronous uploads enabled no report is built here; TxPreparation spools one
+        from the agreed decision, so consensus here never waits on IPFS.
         
         Args:
-            token_values (str): JSON string of token values
-            total_portfolio_value (float): Total portfolio value in USD
+            token_values (str): JSON string of token values, with USD_DECIMALS decimals
+            total_portfolio_value (int): Total portfolio value in USD, with USD_DECIMALS decimals
             rebalancing_actions_json (str): JSON string of rebalancing actions
             
         Returns:
-            Optional[str]: IPFS hash of stored report, or None if storage fails
+            Optional[str]: IPFS hash of stored report, or None if storage fails or was deferred
         """
-        from datetime import datetime
+        if rebalancing_actions_json is None:
+            self.context.logger.warning("No rebalancing actions; skipping report.")
+            return None
 
-        # Parse input JSON
-        token_values_dict = json.loads(token_values)
-        rebalancing_actions = json.loads(rebalancing_actions_json)
+        if self.params.async_report_upload:
+            return None
 
-        # Calculate token allocation percentages
-        token_percentages = {
-            token: (value / total_portfolio_value) * 100 
-            for token, value in token_values_dict.items()
-        }
+        portfolio_report = self.build_period_report(token_values, total_portfolio_value, rebalancing_actions_json)
 
-        # Generate report structure
-        portfolio_report = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "portfolio_status": {
-                token: {
-                    "value_usd": value,
-                    "percentage": token_percentages[token]
-                }
-                for token, value in token_values_dict.items()
-            },
-            "total_portfolio_value": total_portfolio_value,
-            "rebalancing_recommendation": {
-                "action": rebalancing_actions["action"],
-                "reason": rebalancing_actions["reason"]
-            }
-        }
+        # The columnar format appends this period to the last committed history
+        if self.params.report_format == REPORT_FORMAT_COLUMNAR:
+            previous_history = yield from self.get_previous_report_history()
+            portfolio_report = append_report(previous_history, portfolio_report)
 
-        # Store report in IPFS
-        self.context.logger.info("Storing portfolio report in IPFS...")
-        report_ipfs_hash = yield from self.send_to_ipfs(
-            filename="PortfolioRebalancer_Report.json",
-            obj=portfolio_report,
-            filetype=SupportedFiletype.JSON
-        )
+        report_ipfs_hash = yield from self.upload_report(portfolio_report, timeout=self.deadline.remaining())
 
         # Log result
         if report_ipfs_hash:
@@ -703,7 +1413,6 @@ class DecisionMakingBehaviour(PortfolioManagerBaseBehaviour):
         return report_ipfs_hash
 
 
-
 class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
     """Behaviour responsible for preparing and submitting portfolio rebalancing transactions.
     
@@ -739,6 +1448,13 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
             for token, amount in current_balances.items():
                 self.context.logger.info(f"{token}: {amount}")
 
+            # Only report hashes agreed in DecisionMaking go into the transaction, earlier periods first
+            report_hashes = self.take_agreed_report_hashes()
+            if report_hash:
+                report_hashes.append(report_hash)
+            if self.params.async_report_upload and rebalancing_instructions:
+                self.spool_period_report(rebalancing_instructions)
+
             # Process rebalancing instructions if present
             if rebalancing_instructions:
                 rebalancing_data = json.loads(rebalancing_instructions)
@@ -747,7 +1463,7 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
                 # Parse rebalancing action string (format: "swap X% of TOKEN_A to TOKEN_B")
                 action_parts = action.split()
                 try:
-                    swap_percentage = float(action_parts[1].replace('%', ''))
+                    swap_bps = percentage_to_bps(action_parts[1])
                     source_token = action_parts[3].upper()  # Token to sell
                     target_token = action_parts[5].upper()  # Token to buy
                     
@@ -757,14 +1473,15 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
                         self.context.logger.error(f"Missing balance for source token: {source_token}")
                         return None
                         
-                    swap_amount = source_balance * (swap_percentage / 100)
+                    # Exact share of the raw balance, rounded down so it never exceeds it
+                    swap_amount = apply_bps(source_balance, swap_bps)
                     
                     # Log swap details
                     self.context.logger.info(
                         f"Swap details:\n"
                         f"- From: {source_token}\n"
                         f"- To: {target_token}\n"
-                        f"- Amount: {swap_amount} {source_token}"
+                        f"- Amount: {from_fixed(swap_amount, TOKEN_DECIMALS[source_token])} {source_token}"
                     )
 
                     # Prepare rebalancing payload
@@ -776,14 +1493,14 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
                         "reason": "Rebalancing portfolio based on target allocation"
                     }
 
-                except (IndexError, ValueError) as e:
+                except (IndexError, KeyError, ValueError) as e:
                     self.context.logger.error(f"Failed to parse rebalancing action: {e}")
                     return None
 
                 # Generate Safe transaction hash
                 safe_tx_hash = yield from self.generate_multisend_transactions(
                     json.dumps(rebalancing_payload), 
-                    report_hash
+                    report_hashes
                 )
 
             # Create and send transaction payload
@@ -796,16 +1513,121 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
         # Submit payload and wait for consensus
         with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
             yield from self.send_a2a_transaction(tx_payload)
+            # The payload is already out, so the upload never touches what the agents vote on.
+            # Uploaded hashes are committed the next transacting period; if the round ends first
+            # the remaining reports simply stay spooled.
+            if self.params.async_report_upload:
+                yield from self.flush_report_spool()
             yield from self.wait_until_round_end()
 
         self.set_done()
 
-    def get_token_balances(self) -> Generator[None, None, Optional[Dict[str, float]]]:
+    def take_agreed_report_hashes(self) -> List[str]:
+        """
+        Get the uploaded report hashes agreed in DecisionMaking, oldest period first.
+
+        They are no longer offered by this agent once they are part of the transaction.
+
+        Returns:
+            List of IPFS hashes to commit in this period's transaction
+        """
+        agreed = json.loads(self.synchronized_data.uploaded_report_hashes or "{}")
+        uploaded = self.local_state.uploaded_report_hashes
+        for key, ipfs_hash in agreed.items():
+            if uploaded.get(key) == ipfs_hash:
+                del uploaded[key]
+        if agreed:
+            self.context.logger.info(f"Committing {len(agreed)} previously uploaded report(s)")
+        return [agreed[key] for key in sorted(agreed)]
+
+    def spool_period_report(self, rebalancing_instructions: str) -> None:
+        """
+        Spool this period's report, built from the agreed decision, for a later upload.
+
+        Args:
+            rebalancing_instructions (str): JSON string of the agreed rebalancing actions
+        """
+        portfolio_report = self.build_period_report(
+            self.synchronized_data.token_values,
+            self.synchronized_data.total_portfolio_value,
+            rebalancing_instructions,
+        )
+        spool_path = self.report_spool.add(
+            f"{self.synchronized_data.period_count:010d}", portfolio_report
+        )
+        self.context.logger.info(f"Spooled portfolio report for upload at {spool_path}")
+
+    def flush_report_spool(self) -> Generator[None, None, List[str]]:
+        """
+        Upload the spooled reports, oldest first.
+
+        Each upload is bounded by `report_upload_timeout`; reports that fail stay in the
+        spool and are retried in a later period. Uploaded hashes are kept in the shared state
+        and offered in the next DecisionMaking payload, which commits those sent by enough
+        agents in the following transaction.
+
+        Returns:
+            List of IPFS hashes of the uploaded reports
+        """
+        pending = self.report_spool.pending()
+        if not pending:
+            return []
+
+        self.context.logger.info(f"Uploading {len(pending)} spooled report(s)")
+        timeout = self.deadline.timeout_for(self.params.report_upload_timeout)
+
+        # A columnar history absorbs every pending period in a single upload
+        if self.params.report_format == REPORT_FORMAT_COLUMNAR:
+            if self.local_state.report_history_hash is None:
+                history = yield from self.get_previous_report_history()
+            else:
+                # The last uploaded history holds every period, including those not committed yet
+                history = yield from self.fetch_report_history(self.local_state.report_history_hash)
+                if history is None:
+                    self.context.logger.warning("Last uploaded report history unavailable; keeping reports spooled")
+                    return []
+            for _, report in pending:
+                history = append_report(history, report)
+
+            history_hash = yield from self.upload_report(history, timeout=timeout)
+            if history_hash is None:
+                self.context.logger.warning("Report history upload failed; keeping reports spooled")
+                return []
+
+            for path, _ in pending:
+                self.report_spool.remove(path)
+            # The new history supersedes every uploaded one that is not committed yet
+            self.local_state.report_history_hash = history_hash
+            self.local_state.uploaded_report_hashes = {pending[-1][0].stem: history_hash}
+            self.context.logger.info(f"Uploaded spooled report history to IPFS: {history_hash}")
+            return [history_hash]
+
+        report_hashes = []
+        for path, report in pending:
+            if self.deadline.expired():
+                self.context.logger.warning("Round deadline reached; leaving the remaining reports spooled")
+                break
+            report_ipfs_hash = yield from self.upload_report(
+                report, timeout=self.deadline.timeout_for(self.params.report_upload_timeout)
+            )
+            if report_ipfs_hash is None:
+                self.context.logger.warning(f"Upload of {path.name} failed; keeping it spooled")
+                break
+
+            self.report_spool.remove(path)
+            self.local_state.uploaded_report_hashes[path.stem] = report_ipfs_hash
+            self.context.logger.info(f"Uploaded spooled report {path.name} to IPFS: {report_ipfs_hash}")
+            report_hashes.append(report_ipfs_hash)
+
+        return report_hashes
+
+    def get_token_balances(self) -> Generator[None, None, Optional[Dict[str, Optional[int]]]]:
         """
         Fetch current token balances from the portfolio contract.
 
         Returns:
-            Dict mapping token symbols to their balances, or None if fetching fails
+            Dict mapping token symbols to their raw balances, in the token's smallest unit,
+            or None if fetching fails
         """
         self.context.logger.info("Fetching current portfolio token balances")
 
@@ -831,7 +1653,7 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
         token_symbols = list(supported_tokens.keys())
 
         # Fetch balances from contract
-        response = yield from self.get_contract_api_response(
+        response = yield from self.get_contract_api_response_before_deadline(
             performative=ContractApiMessage.Performative.GET_RAW_TRANSACTION,
             contract_address=manager_contract,
             contract_id=str(PORTFOLIOMANAGER.contract_id),
@@ -839,9 +1661,10 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
             user=portfolio_address,
             tokens=token_addresses,
             chain_id=ETHEREUM_CHAIN_ID,
+            **self.anchor_block_kwargs,
         )
 
-        if response.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
+        if response is None or response.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
             self.context.logger.error(f"Failed to fetch balances: {response}")
             return None
 
@@ -851,14 +1674,13 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
             self.context.logger.error("No balance data received")
             return None
 
-        # Convert raw balances to human-readable format
+        # Keep raw balances, swap amounts are computed on them directly
         processed_balances = {}
         for symbol, raw_balance in zip(token_symbols, raw_balances):
             if raw_balance is not None:
                 decimals = supported_tokens[symbol]["decimals"]
-                human_readable = float(raw_balance) / (10 ** decimals)
-                processed_balances[symbol] = human_readable
-                self.context.logger.info(f"{symbol} balance: {human_readable}")
+                processed_balances[symbol] = int(raw_balance)
+                self.context.logger.info(f"{symbol} balance: {from_fixed(int(raw_balance), decimals)}")
             else:
                 self.context.logger.error(f"Missing balance for {symbol}")
                 processed_balances[symbol] = None
@@ -869,7 +1691,7 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
         self, 
         user: str, 
         source_token: str, 
-        amount_to_swap: float, 
+        amount_to_swap: int, 
         target_token: str
     ) -> Generator[None, None, Dict]:
         """
@@ -878,7 +1700,7 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
         Args:
             user: Portfolio address
             source_token: Token being sold
-            amount_to_swap: Amount of source token to swap
+            amount_to_swap: Raw amount of source token to swap, in its smallest unit
             target_token: Token being purchased
 
         Returns:
@@ -894,15 +1716,11 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
             "WETH": {"address": WETH_ADDRESS, "decimals": 18}
         }
 
-        # Convert amount to contract units
-        source_decimals = token_config[source_token]["decimals"]
-        amount_in_wei = int(amount_to_swap * (10 ** source_decimals))
-
-        # Define swap parameters
+        # Define swap parameters, the amount is already in contract units
         swap_params = [{
             "tokenToSell": token_config[source_token]["address"],
             "tokenToBuy": token_config[target_token]["address"],
-            "amountToSell": amount_in_wei,
+            "amountToSell": amount_to_swap,
             "amountOutMin": 0,  # TODO: Add slippage protection
             "poolFee": 3000  # 0.3% fee tier
         }]
@@ -914,8 +1732,17 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
             f"- Swap details: {swap_params}"
         )
 
+        # Encode calldata locally unless the contract-API path is requested
+        if self.params.use_local_calldata_encoding:
+            formatted_data = {
+                "to_address": manager_address,
+                "data": get_portfolio_manager_encoder().execute_rebalance(user, swap_params),
+            }
+            self.context.logger.info(f"Generated rebalance transaction: {formatted_data}")
+            return formatted_data
+
         # Get transaction data
-        response = yield from self.get_contract_api_response(
+        response = yield from self.get_contract_api_response_before_deadline(
             performative=ContractApiMessage.Performative.GET_RAW_TRANSACTION,
             contract_address=manager_address,
             contract_id=str(PORTFOLIOMANAGER.contract_id),
@@ -926,7 +1753,7 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
             from_address=safe_address,
         )
 
-        if response.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
+        if response is None or response.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
             self.context.logger.error(f"Failed to generate rebalance transaction: {response}")
             return {}
 
@@ -965,8 +1792,17 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
             f"- IPFS Hash: {ipfs_hash}"
         )
 
+        # Encode calldata locally unless the contract-API path is requested
+        if self.params.use_local_calldata_encoding:
+            formatted_data = {
+                "to_address": manager_address,
+                "data": get_portfolio_manager_encoder().store_report_hash(user, ipfs_hash),
+            }
+            self.context.logger.info(f"Generated IPFS storage transaction: {formatted_data}")
+            return formatted_data
+
         # Get transaction data
-        response = yield from self.get_contract_api_response(
+        response = yield from self.get_contract_api_response_before_deadline(
             performative=ContractApiMessage.Performative.GET_RAW_TRANSACTION,
             contract_address=manager_address,
             contract_id=str(PORTFOLIOMANAGER.contract_id),
@@ -977,7 +1813,7 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
             from_address=safe_address,
         )
 
-        if response.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
+        if response is None or response.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
             self.context.logger.error(f"Failed to generate IPFS storage transaction: {response}")
             return {}
 
@@ -995,17 +1831,71 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
         self.context.logger.info(f"Generated IPFS storage transaction: {formatted_data}")
         return formatted_data
     
+    def get_store_period_report_data(self, ipfs_directory: str) -> Generator[None, None, Dict]:
+        """
+        Generate transaction data for committing a period report directory.
+
+        Args:
+            ipfs_directory: IPFS hash of the directory holding every user's report for the period
+
+        Returns:
+            Dict containing transaction data for the period report commitment
+        """
+        manager_address = self.params.portfolio_manager_contract_address_string
+        safe_address = self.params.safe_address
+
+        self.context.logger.info(
+            f"Preparing period report transaction:\n"
+            f"- Manager: {manager_address}\n"
+            f"- IPFS Directory: {ipfs_directory}"
+        )
+
+        if self.params.use_local_calldata_encoding:
+            formatted_data = {
+                "to_address": manager_address,
+                "data": get_portfolio_manager_encoder().store_period_report(ipfs_directory),
+            }
+            self.context.logger.info(f"Generated period report transaction: {formatted_data}")
+            return formatted_data
+
+        response = yield from self.get_contract_api_response_before_deadline(
+            performative=ContractApiMessage.Performative.GET_RAW_TRANSACTION,
+            contract_address=manager_address,
+            contract_id=str(PORTFOLIOMANAGER.contract_id),
+            contract_callable="store_period_report",
+            ipfs_directory=ipfs_directory,
+            chain_id=ETHEREUM_CHAIN_ID,
+            from_address=safe_address,
+        )
+
+        if response is None or response.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
+            self.context.logger.error(f"Failed to generate period report transaction: {response}")
+            return {}
+
+        tx_data = response.raw_transaction.body.get("data")
+        if tx_data is None:
+            self.context.logger.error("Missing transaction data")
+            return {}
+
+        formatted_data = {
+            "to_address": manager_address,
+            "data": bytes.fromhex(tx_data[2:] if tx_data.startswith("0x") else tx_data)
+        }
+
+        self.context.logger.info(f"Generated period report transaction: {formatted_data}")
+        return formatted_data
+
     def generate_multisend_transactions(
         self, 
         adjustment_balances_json: str, 
-        ipfs_hash: Optional[str] = None
+        ipfs_hashes: Optional[List[str]] = None
     ) -> Generator[None, None, Optional[str]]:
         """
         Generate a batched transaction combining rebalancing and IPFS storage operations.
 
         Args:
             adjustment_balances_json: JSON string containing rebalancing instructions
-            ipfs_hash: Optional IPFS hash of the rebalancing report
+            ipfs_hashes: Optional IPFS hashes of the rebalancing reports to commit
 
         Returns:
             str: Safe transaction hash if successful, None otherwise
@@ -1040,12 +1930,15 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
             "value": ZERO_VALUE,
         })
 
-        # Add IPFS storage if hash provided
-        if ipfs_hash:
-            ipfs_tx = yield from self.get_set_ipfs_data(
-                user=portfolio_address,
-                ipfs_hash=ipfs_hash
-            )
+        # Add IPFS storage for each hash provided, as one period commitment or one hash per user
+        for ipfs_hash in ipfs_hashes or []:
+            if self.params.batch_report_commitment:
+                ipfs_tx = yield from self.get_store_period_report_data(ipfs_directory=ipfs_hash)
+            else:
+                ipfs_tx = yield from self.get_set_ipfs_data(
+                    user=portfolio_address,
+                    ipfs_hash=ipfs_hash
+                )
 
             if not ipfs_tx:
                 self.context.logger.error("Failed to generate IPFS storage transaction")
@@ -1060,7 +1953,7 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
 
         # Generate multisend transaction
         self.context.logger.info(f"Preparing batch of {len(multisend_transactions)} transactions")
-        response = yield from self.get_contract_api_response(
+        response = yield from self.get_contract_api_response_before_deadline(
             performative=ContractApiMessage.Performative.GET_RAW_TRANSACTION,
             contract_address=self.params.multisend_address,
             contract_id=str(MultiSendContract.contract_id),
@@ -1070,7 +1963,7 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
         )
 
         # Generate Safe transaction hash
-        if response.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
+        if response is None or response.performative != ContractApiMessage.Performative.RAW_TRANSACTION:
             self.context.logger.error("Failed to generate multisend transaction")
             return None
 
@@ -1113,7 +2006,7 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
         self.context.logger.info(f"Generating Safe transaction hash for {to_address}")
 
         # Get raw transaction hash
-        response = yield from self.get_contract_api_response(
+        response = yield from self.get_contract_api_response_before_deadline(
             performative=ContractApiMessage.Performative.GET_STATE,
             contract_address=self.synchronized_data.safe_contract_address,
             contract_id=str(GnosisSafeContract.contract_id),
@@ -1126,9 +2019,9 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
             operation=operation,
         )
 
-        if response.performative != ContractApiMessage.Performative.STATE:
+        if response is None or response.performative != ContractApiMessage.Performative.STATE:
             self.context.logger.error(
-                f"Failed to get raw transaction hash. Expected STATE, got {response.performative}"
+                f"Failed to get raw transaction hash. Expected STATE, got {response.performative if response else None}"
             )
             return None
 
@@ -1155,9 +2048,10 @@ class TxPreparationBehaviour(PortfolioManagerBaseBehaviour):
 class PortfolioManagerRoundBehaviour(AbstractRoundBehaviour):
     """PortfolioManagerRoundBehaviour"""
 
-    initial_behaviour_cls = DataPullBehaviour
+    initial_behaviour_cls = BlockAnchorBehaviour
     abci_app_cls = PortfolioManagerAbciApp  # type: ignore
     behaviours: Set[Type[BaseBehaviour]] = [
+        BlockAnchorBehaviour,
         DataPullBehaviour,
         DecisionMakingBehaviour,
         TxPreparationBehaviour
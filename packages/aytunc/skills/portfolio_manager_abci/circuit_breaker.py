@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the circuit breakers guarding the skill's external dependencies."""
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    A failure-rate circuit breaker.
+
+    Closed: requests pass and their outcomes are recorded over a sliding time window. Once the
+    window holds at least `min_calls` outcomes and the failure rate reaches `failure_rate_threshold`
+    the breaker opens. Open: requests are refused until `reset_timeout` has passed. Half-open: one
+    probe request passes; its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        window: float = 300.0,
+        min_calls: int = 4,
+        reset_timeout: float = 120.0,
+    ) -> None:
+        """Initialize a closed breaker."""
+        self.failure_rate_threshold = failure_rate_threshold
+        self.window = window
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+
+        self._state = STATE_CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the reset timeout has passed."""
+        if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent now; in half-open state only a single probe is let through."""
+        state = self.state
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """Release the half-open probe of a request that ended without an outcome, e.g. cut short by the deadline."""
+        if self._state == STATE_HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        """Record a successful request."""
+        if self._state == STATE_HALF_OPEN:
+            self._close()
+            return
+        self._record(True)
+
+    def record_failure(self) -> None:
+        """Record a failed request."""
+        if self._state == STATE_HALF_OPEN:
+            self._open()
+            return
+        self._record(False)
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate_threshold:
+            self._open()
+
+    def _record(self, ok: bool) -> None:
+        """Append an outcome and drop those that fell out of the window."""
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _open(self) -> None:
+        self._state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def _close(self) -> None:
+        self._state = STATE_CLOSED
+        self._outcomes.clear()
+        self._probe_in_flight = False
+
+
+class CircuitBreakers:
+    """Circuit breakers keyed by ApiSpecs `api_id`; dependencies without a configuration always pass."""
+
+    def __init__(self, configs: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Initialize the breakers.
+
+        :param configs: api_id to CircuitBreaker keyword arguments.
+        """
+        self._breakers = {api_id: CircuitBreaker(**config) for api_id, config in configs.items()}
+
+    def get(self, api_id: str) -> Optional[CircuitBreaker]:
+        """Get the breaker of a dependency, if it has one."""
+        return self._breakers.get(api_id)
+
+    def states(self) -> Dict[str, str]:
+        """Current state of every breaker."""
+        return {api_id: breaker.state for api_id, breaker in self._breakers.items()}
+
+
+class DegradedCache:
+    """Last good results of external calls, served while their dependency is unavailable."""
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a fresh result."""
+        self._entries[key] = (time.time(), value)
+
+    def get(self, key: str, max_age: float) -> Optional[Any]:
+        """Return the last result stored under `key` if it is at most `max_age` seconds old."""
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry[0] > max_age:
+            return None
+        return entry[1]
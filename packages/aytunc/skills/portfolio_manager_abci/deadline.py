@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the deadline that bounds a behaviour's external calls by its round's time budget."""
+
+import time
+from typing import Optional
+
+
+class Deadline:
+    """The point in time by which a behaviour must stop calling out and send its payload."""
+
+    def __init__(self, expires_at: float) -> None:
+        """
+        Initialize the deadline.
+
+        :param expires_at: UNIX timestamp after which no further external calls should start.
+        """
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_round(cls, round_start: float, round_timeout: float, safety_margin: float) -> "Deadline":
+        """
+        Derive the deadline of the current round.
+
+        :param round_start: UNIX timestamp of the transition into the round.
+        :param round_timeout: seconds after which the round times out.
+        :param safety_margin: seconds kept free to send the payload and reach consensus.
+        :return: the deadline.
+        """
+        return cls(round_start + round_timeout - safety_margin)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative."""
+        return max(0.0, self.expires_at - time.time())
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self.remaining() <= 0
+
+    def timeout_for(self, default: Optional[float]) -> float:
+        """Timeout for the next call: its default timeout, cut down to the remaining budget."""
+        remaining = self.remaining()
+        return remaining if default is None else min(default, remaining)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains a local calldata encoder for the PortfolioManager contract."""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector
+
+import packages.valory.contracts.portfolio_manager.contract as portfolio_manager_contract
+
+
+PORTFOLIO_MANAGER_BUILD_PATH = (
+    Path(portfolio_manager_contract.__file__).parent / "build" / "portfolio_manager.json"
+)
+
+
+def _abi_type(param: Dict[str, Any]) -> str:
+    """Get the canonical ABI type of a function parameter, expanding tuples."""
+    abi_type = param["type"]
+    if not abi_type.startswith("tuple"):
+        return abi_type
+
+    components = ",".join(_abi_type(component) for component in param["components"])
+    return f"({components}){abi_type[len('tuple'):]}"
+
+
+def _normalize_arg(param: Dict[str, Any], value: Any) -> Any:
+    """Convert a python value into the shape expected by eth_abi for the given parameter."""
+    abi_type = param["type"]
+
+    if abi_type.endswith("]"):
+        item_param = dict(param, type=abi_type[: abi_type.rindex("[")])
+        return [_normalize_arg(item_param, item) for item in value]
+
+    if abi_type == "tuple":
+        components = param["components"]
+        if isinstance(value, dict):
+            value = [value[component["name"]] for component in components]
+        return tuple(
+            _normalize_arg(component, item) for component, item in zip(components, value)
+        )
+
+    return value
+
+
+class PortfolioManagerCalldataEncoder:
+    """Encode PortfolioManager write calls locally, without a contract-API round trip."""
+
+    def __init__(self, abi: List[Dict[str, Any]]) -> None:
+        """Initialize the encoder with the contract ABI."""
+        self._functions: Dict[str, Dict[str, Any]] = {
+            entry["name"]: entry for entry in abi if entry.get("type") == "function"
+        }
+        self._selectors: Dict[str, bytes] = {
+            name: function_signature_to_4byte_selector(
+                f"{name}({','.join(_abi_type(param) for param in entry['inputs'])})"
+            )
+            for name, entry in self._functions.items()
+        }
+
+    def encode(self, function_name: str, args: Sequence[Any]) -> bytes:
+        """
+        Encode a call to a contract function.
+
+        Args:
+            function_name: Name of the function as it appears in the ABI
+            args: Positional arguments of the call
+
+        Returns:
+            bytes: The selector followed by the ABI-encoded arguments
+        """
+        if function_name not in self._functions:
+            raise ValueError(f"Function {function_name} not found in the contract ABI")
+
+        inputs = self._functions[function_name]["inputs"]
+        if len(inputs) != len(args):
+            raise ValueError(
+                f"Function {function_name} expects {len(inputs)} arguments, got {len(args)}"
+            )
+
+        types = [_abi_type(param) for param in inputs]
+        values = [_normalize_arg(param, value) for param, value in zip(inputs, args)]
+        return self._selectors[function_name] + encode(types, values)
+
+    def execute_rebalance(self, user: str, swaps: List[Dict[str, Any]]) -> bytes:
+        """Encode an `executeRebalance` call."""
+        return self.encode("executeRebalance", [user, swaps])
+
+    def store_report_hash(self, user: str, ipfs_hash: str) -> bytes:
+        """Encode a `storeReportHash` call."""
+        return self.encode("storeReportHash", [user, ipfs_hash])
+
+    def store_period_report(self, ipfs_directory: str) -> bytes:
+        """Encode a `storePeriodReport` call."""
+        return self.encode("storePeriodReport", [ipfs_directory])
+
+
+@lru_cache(maxsize=None)
+def get_portfolio_manager_encoder() -> PortfolioManagerCalldataEncoder:
+    """Load the PortfolioManager ABI once and return a shared encoder."""
+    with open(PORTFOLIO_MANAGER_BUILD_PATH, "r", encoding="utf-8") as build_file:
+        abi = json.load(build_file)["abi"]
+    return PortfolioManagerCalldataEncoder(abi)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the fixed-point helpers keeping token amounts and USD values as integers."""
+
+from decimal import Decimal, InvalidOperation, ROUND_FLOOR
+from typing import Union
+
+
+# USD prices and values are integer mantissas with the decimals of Chainlink's USD feeds
+USD_DECIMALS = 8
+
+# Percentages are carried as basis points
+BPS = 10_000
+
+
+def to_fixed(value: Union[float, int, str], decimals: int) -> int:
+    """
+    Convert a decimal value into its integer mantissa, rounding towards negative infinity.
+
+    Floats go through their shortest repr, so 0.1 becomes exactly 10 ** (decimals - 1).
+
+    :param value: the value, e.g. a price returned by an API.
+    :param decimals: number of decimals of the mantissa.
+    :return: the mantissa.
+    """
+    try:
+        scaled = Decimal(str(value)).scaleb(decimals)
+    except InvalidOperation as e:
+        raise ValueError(f"Not a decimal value: {value!r}") from e
+    if not scaled.is_finite():
+        raise ValueError(f"Not a finite value: {value!r}")
+    return int(scaled.to_integral_value(rounding=ROUND_FLOOR))
+
+
+def from_fixed(amount: int, decimals: int) -> float:
+    """Float approximation of a mantissa, for logs, prompts and reports only."""
+    return float(Decimal(amount).scaleb(-decimals))
+
+
+def rescale(amount: int, from_decimals: int, to_decimals: int) -> int:
+    """Change the number of decimals of a mantissa, flooring when decimals are dropped."""
+    if to_decimals >= from_decimals:
+        return amount * 10 ** (to_decimals - from_decimals)
+    return amount // 10 ** (from_decimals - to_decimals)
+
+
+def mul_div(a: int, b: int, denominator: int) -> int:
+    """Floor of a * b / denominator, without an intermediate rounding."""
+    return a * b // denominator
+
+
+def usd_value(balance: int, token_decimals: int, price: int) -> int:
+    """
+    USD value of a token balance.
+
+    :param balance: raw balance, in the token's smallest unit.
+    :param token_decimals: decimals of the token.
+    :param price: USD price of one whole token, with USD_DECIMALS decimals.
+    :return: the value, with USD_DECIMALS decimals.
+    """
+    return mul_div(balance, price, 10 ** token_decimals)
+
+
+def percentage_to_bps(percentage: str) -> int:
+    """
+    Parse a percentage such as "3%" or "2.5" into basis points.
+
+    :param percentage: the percentage, with or without a trailing "%".
+    :return: the basis points, more than 0 and at most BPS.
+    :raises ValueError: if it is not a number or not in (0, 100].
+    """
+    bps = to_fixed(percentage.strip().rstrip("%"), 2)
+    if not 0 < bps <= BPS:
+        raise ValueError(f"Percentage out of range: {percentage!r}")
+    return bps
+
+
+def apply_bps(amount: int, bps: int) -> int:
+    """Share of `amount` given in basis points, rounded down so it never exceeds the amount."""
+    return mul_div(amount, bps, BPS)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the latency-aware router choosing between LLM providers."""
+
+import math
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+# Latency samples a provider needs before its own p95 is used as hedge delay
+MIN_LATENCY_SAMPLES = 5
+
+
+class ProviderStats:
+    """Latency EWMA, error-rate EWMA and recent latencies of one provider."""
+
+    def __init__(self, alpha: float, window: int) -> None:
+        """Initialize empty statistics."""
+        self.alpha = alpha
+        self.latency_ewma: Optional[float] = None
+        self.error_rate = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def record_success(self, latency: float) -> None:
+        """Record a completed request."""
+        self.latency_ewma = latency if self.latency_ewma is None else (
+            self.alpha * latency + (1 - self.alpha) * self.latency_ewma
+        )
+        self.error_rate = (1 - self.alpha) * self.error_rate
+        self.latencies.append(latency)
+
+    def record_failure(self) -> None:
+        """Record a failed or timed out request."""
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+
+    def p95(self) -> Optional[float]:
+        """95th percentile of the recent latencies, None until there are enough samples."""
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+class LLMRouter:
+    """Orders LLM providers by health and latency, and tells how long to wait before hedging."""
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        window: int = 50,
+        max_error_rate: float = 0.5,
+        default_hedge_delay: float = 8.0,
+    ) -> None:
+        """
+        Initialize the router.
+
+        :param alpha: weight of the newest sample in the latency and error-rate EWMAs.
+        :param window: number of recent latencies the p95 is computed over.
+        :param max_error_rate: error rate above which a provider is only used as a last resort.
+        :param default_hedge_delay: hedge delay, in seconds, for providers without enough samples.
+        """
+        self.alpha = alpha
+        self.window = window
+        self.max_error_rate = max_error_rate
+        self.default_hedge_delay = default_hedge_delay
+        self._stats: Dict[str, ProviderStats] = {}
+
+    def stats(self, provider: str) -> ProviderStats:
+        """Statistics of a provider, created on first use."""
+        if provider not in self._stats:
+            self._stats[provider] = ProviderStats(self.alpha, self.window)
+        return self._stats[provider]
+
+    def rank(self, providers: List[str], preferred: Optional[str] = None) -> List[str]:
+        """
+        Order providers: healthy before unhealthy, then by latency EWMA.
+
+        Providers without measurements rank first among the healthy ones so they get measured,
+        and `preferred` wins ties.
+        """
+
+        def key(provider: str) -> tuple:
+            stats = self.stats(provider)
+            return (
+                stats.error_rate > self.max_error_rate,
+                stats.latency_ewma if stats.latency_ewma is not None else 0.0,
+                provider != preferred,
+            )
+
+        return sorted(providers, key=key)
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait for `provider` before hedging: its latency p95, or the default."""
+        p95 = self.stats(provider).p95()
+        return p95 if p95 is not None else self.default_hedge_delay
+
+    def record_success(self, provider: str, latency: float) -> None:
+        """Record a completed request of `provider`."""
+        self.stats(provider).record_success(latency)
+
+    def record_failure(self, provider: str) -> None:
+        """Record a failed request of `provider`."""
+        self.stats(provider).record_failure()
@@ -19,7 +19,7 @@
 
 """This module contains the shared state for the abci skill of PortfolioManagerAbciApp."""
 
-from typing import Any
+from typing import Any, Dict, List, Optional
 
 
 from packages.valory.skills.abstract_round_abci.models import ApiSpecs,BaseParams
@@ -30,6 +30,12 @@ from packages.valory.skills.abstract_round_abci.models import Requests as BaseRe
 from packages.valory.skills.abstract_round_abci.models import (
     SharedState as BaseSharedState,
 )
+from packages.aytunc.skills.portfolio_manager_abci.circuit_breaker import (
+    CircuitBreakers,
+    DegradedCache,
+)
+from packages.aytunc.skills.portfolio_manager_abci.llm_router import LLMRouter
+from packages.aytunc.skills.portfolio_manager_abci.rate_limiting import RateLimiter
 from packages.aytunc.skills.portfolio_manager_abci.rounds import PortfolioManagerAbciApp
 
 
@@ -38,6 +44,29 @@ class SharedState(BaseSharedState):
 
     abci_app_cls = PortfolioManagerAbciApp
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the state."""
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = RateLimiter({})
+        self.circuit_breakers = CircuitBreakers({})
+        self.degraded_cache = DegradedCache()
+        self.llm_router = LLMRouter()
+        # Spooled reports uploaded to IPFS and waiting to be committed on-chain, by period key
+        self.uploaded_report_hashes: Dict[str, str] = {}
+        # Last uploaded columnar history, the base of the next one until a later history is committed
+        self.report_history_hash: Optional[str] = None
+
+    def setup(self) -> None:
+        """Set up the state, with the rate limiter, circuit breakers and LLM router shared by every behaviour of the skill."""
+        super().setup()
+        self.rate_limiter = RateLimiter(self.context.params.rate_limits)
+        self.circuit_breakers = CircuitBreakers(self.context.params.circuit_breakers)
+        self.llm_router = LLMRouter(
+            alpha=self.context.params.llm_ewma_alpha,
+            max_error_rate=self.context.params.llm_max_error_rate,
+            default_hedge_delay=self.context.params.llm_hedge_default_delay,
+        )
+
 
 Requests = BaseRequests
 BenchmarkTool = BaseBenchmarkTool
@@ -54,6 +83,65 @@ class Params(BaseParams):
 
         self.llm_selection = kwargs.get("llm_selection", None)
 
+        # With several providers, route each LLM request to the fastest healthy one and hedge with the next
+        self.llm_providers: List[str] = kwargs.get("llm_providers", [])
+        self.llm_ewma_alpha: float = kwargs.get("llm_ewma_alpha", 0.2)
+        self.llm_max_error_rate: float = kwargs.get("llm_max_error_rate", 0.5)
+        self.llm_hedge_default_delay: float = kwargs.get("llm_hedge_default_delay", 8.0)
+
+        # Token budget of the rebalancing prompt, and cap on the completion
+        self.prompt_token_budget: int = kwargs.get("prompt_token_budget", 400)
+        self.prompt_tokenizer_encoding: str = kwargs.get("prompt_tokenizer_encoding", "o200k_base")
+        self.llm_max_completion_tokens: int = kwargs.get("llm_max_completion_tokens", 128)
+
+        # Ask for the decisions of up to llm_decision_batch_size portfolios in one LLM request
+        self.batch_llm_decisions: bool = kwargs.get("batch_llm_decisions", False)
+        self.llm_decision_batch_size: int = kwargs.get("llm_decision_batch_size", 10)
+        # Prompt tokens allowed for each portfolio of a batch beyond the first, on top of prompt_token_budget
+        self.prompt_tokens_per_batched_portfolio: int = kwargs.get("prompt_tokens_per_batched_portfolio", 48)
+
+        # BlockAnchor proposes the latest block minus this many confirmations as the period's read block
+        self.anchor_block_confirmations: int = kwargs.get("anchor_block_confirmations", 2)
+
+        # DataPull commits the median (or "trimmed_mean") of token values agreeing within this relative tolerance
+        self.data_pull_tolerance: float = kwargs.get("data_pull_tolerance", 0.01)
+        self.data_pull_aggregation: str = kwargs.get("data_pull_aggregation", "median")
+
+        # Encode PortfolioManager write calldata locally instead of via the contract-API connection
+        self.use_local_calldata_encoding: bool = kwargs.get("use_local_calldata_encoding", True)
+
+        # Commit one IPFS report directory per period instead of one report hash per user
+        self.batch_report_commitment: bool = kwargs.get("batch_report_commitment", False)
+
+        # Report format: "json" (one document per period) or "columnar" (compact history of every period)
+        self.report_format: str = kwargs.get("report_format", "json")
+
+        # Spool reports of the agreed decision, upload them after the TxPreparation vote and commit them the next transacting period
+        self.async_report_upload: bool = kwargs.get("async_report_upload", False)
+        self.report_spool_dir: str = kwargs.get("report_spool_dir", "report_spool")
+        self.report_upload_timeout: float = kwargs.get("report_upload_timeout", 10.0)
+
+        # Read balances, Chainlink answers and Uniswap V3 TWAPs in one Multicall3 call, CoinMarketCap as fallback
+        self.onchain_pricing: bool = kwargs.get("onchain_pricing", False)
+        self.multicall3_address: str = kwargs.get("multicall3_address", "0xcA11bde05977b3631167028862bE2a173976CA11")
+        self.chainlink_aggregators: Dict[str, str] = kwargs.get("chainlink_aggregators", {})
+        self.uniswap_v3_pools: Dict[str, Dict[str, Any]] = kwargs.get("uniswap_v3_pools", {})
+        self.twap_window: int = kwargs.get("twap_window", 1800)
+        self.oracle_max_age: int = kwargs.get("oracle_max_age", 3600)
+        self.oracle_max_deviation: float = kwargs.get("oracle_max_deviation", 0.02)
+
+        # Token-bucket limits per ApiSpecs api_id ({"rate": requests/second, "burst": size}) and 429 handling
+        self.rate_limits: Dict[str, Dict[str, float]] = kwargs.get("rate_limits", {})
+        self.rate_limit_max_retries: int = kwargs.get("rate_limit_max_retries", 3)
+        self.rate_limit_default_backoff: float = kwargs.get("rate_limit_default_backoff", 5.0)
+
+        # Circuit breakers per ApiSpecs api_id, and how long cached results may stand in while one is open
+        self.circuit_breakers: Dict[str, Dict[str, Any]] = kwargs.get("circuit_breakers", {})
+        self.degraded_cache_max_age: float = kwargs.get("degraded_cache_max_age", 900.0)
+
+        # Seconds kept free at the end of each round to send the payload; external calls stop before that
+        self.deadline_safety_margin: float = kwargs.get("deadline_safety_margin", 5.0)
+
         # self.transfer_target_address = self._ensure(
         #     "transfer_target_address", kwargs, str
         # )
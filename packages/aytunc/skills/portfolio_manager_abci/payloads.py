@@ -26,13 +26,20 @@ from typing import Dict, Optional
 from packages.valory.skills.abstract_round_abci.base import BaseTxPayload
 
 
+@dataclass(frozen=True)
+class BlockAnchorPayload(BaseTxPayload):
+    """Represent a transaction payload for the BlockAnchorRound."""
+
+    block_number: Optional[int]
+
+
 @dataclass(frozen=True)
 class DataPullPayload(BaseTxPayload):
     """Represent a transaction payload for the DataPullRound."""
 
     # TODO: define your attributes
     token_values: Optional[str]  # Store as JSON string for hashability
-    total_portfolio_value: Optional[float]
+    total_portfolio_value: Optional[int]  # USD with USD_DECIMALS decimals
 
 
 @dataclass(frozen=True)
@@ -43,6 +50,8 @@ class DecisionMakingPayload(BaseTxPayload):
     event: str
     adjustment_balances: Optional[str] # Store as JSON string for hashability
     ipfs_hash: str
+    # Report hashes uploaded after earlier TxPreparation votes and not committed yet, JSON of period key to hash
+    uploaded_report_hashes: Optional[str] = None
 
 
 @dataclass(frozen=True)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module derives USD token prices from Chainlink and Uniswap V3 readings."""
+
+from typing import Any, Dict, List, Optional
+
+from packages.aytunc.skills.portfolio_manager_abci.fixed_point import (
+    USD_DECIMALS,
+    mul_div,
+    rescale,
+    to_fixed,
+)
+
+
+# Uniswap V3 price of one tick
+TICK_BASE = 1.0001
+
+
+def tick_to_price(tick: float, base_decimals: int, quote_decimals: int, base_is_token0: bool) -> float:
+    """
+    Convert a Uniswap V3 tick into the price of the base token in quote tokens.
+
+    :param tick: pool tick, spot or time-weighted average.
+    :param base_decimals: decimals of the token being priced.
+    :param quote_decimals: decimals of the token the price is expressed in.
+    :param base_is_token0: whether the priced token is the pool's token0.
+    :return: quote tokens per base token.
+    """
+    # 1.0001^tick is the raw amount of token1 per raw token0
+    raw_price = TICK_BASE ** tick if base_is_token0 else TICK_BASE ** -tick
+    return raw_price * 10 ** (base_decimals - quote_decimals)
+
+
+def twap_tick(tick_cumulatives: List[int], window: int) -> float:
+    """Average tick over the window from an observe([window, 0]) reading."""
+    return (tick_cumulatives[1] - tick_cumulatives[0]) / window
+
+
+def chainlink_price(reading: Optional[Dict[str, Any]], now: float, max_age: float) -> Optional[int]:
+    """USD price of a Chainlink reading with USD_DECIMALS decimals, or None if it is missing, invalid or stale."""
+    if reading is None or reading["answer"] <= 0:
+        return None
+    if now - reading["updated_at"] > max_age:
+        return None
+    return rescale(reading["answer"], reading["decimals"], USD_DECIMALS)
+
+
+def uniswap_price(reading: Optional[Dict[str, Any]], source: Dict[str, Any], twap_window: int) -> Optional[float]:
+    """Price of a token in its pool's quote token, time-weighted when a TWAP reading is available."""
+    if reading is None:
+        return None
+    tick = reading["tick"]
+    if twap_window and reading.get("tick_cumulatives"):
+        tick = twap_tick(reading["tick_cumulatives"], twap_window)
+    return tick_to_price(tick, source["base_decimals"], source["quote_decimals"], source["base_is_token0"])
+
+
+def resolve_token_prices(
+    readings: Dict[str, Any],
+    chainlink_aggregators: Dict[str, str],
+    uniswap_v3_pools: Dict[str, Dict[str, Any]],
+    now: float,
+    twap_window: int,
+    max_age: float,
+    max_deviation: float,
+) -> Dict[str, int]:
+    """
+    Resolve USD prices from the on-chain readings of get_balances_and_prices.
+
+    Chainlink is the primary source and the Uniswap V3 TWAP, converted to USD through the
+    price of its quote token, the secondary one. When both exist and disagree by more than
+    max_deviation the token is left unpriced so the caller falls back to an off-chain source.
+
+    :param readings: pool and aggregator readings returned by the contract call.
+    :param chainlink_aggregators: token symbol to Chainlink USD aggregator address.
+    :param uniswap_v3_pools: token symbol to pool config (pool, quote, base/quote decimals, base_is_token0).
+    :param now: reference timestamp used for staleness checks.
+    :param twap_window: TWAP window in seconds, 0 for spot prices.
+    :param max_age: maximum age of a Chainlink answer, in seconds.
+    :param max_deviation: maximum relative difference between the two sources.
+    :return: token symbol to USD price with USD_DECIMALS decimals, for the tokens that could be priced.
+    """
+    chainlink_prices = {
+        symbol: chainlink_price(readings["aggregators"].get(aggregator), now, max_age)
+        for symbol, aggregator in chainlink_aggregators.items()
+    }
+
+    prices: Dict[str, int] = {}
+    for symbol in set(chainlink_aggregators) | set(uniswap_v3_pools):
+        primary = chainlink_prices.get(symbol)
+
+        secondary = None
+        source = uniswap_v3_pools.get(symbol)
+        if source is not None:
+            quote_usd = chainlink_prices.get(source["quote"])
+            pool_price = uniswap_price(readings["pools"].get(source["pool"]), source, twap_window)
+            if quote_usd is not None and pool_price is not None:
+                # The tick maths is inherently floating point, the result is fixed before it is combined
+                secondary = mul_div(to_fixed(pool_price, USD_DECIMALS), quote_usd, 10 ** USD_DECIMALS)
+
+        if primary is not None and secondary is not None:
+            if abs(primary - secondary) > primary * max_deviation:
+                continue
+            prices[symbol] = primary
+        elif primary is not None or secondary is not None:
+            prices[symbol] = primary if primary is not None else secondary
+
+    return prices
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module builds the rebalancing prompt within a token budget."""
+
+import json
+import re
+import statistics
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # pragma: nocover
+    tiktoken = None
+
+
+DEFAULT_ENCODING = "o200k_base"
+
+# Pieces a BPE tokenizer rarely merges across, used when tiktoken is not installed
+APPROXIMATE_TOKEN = re.compile(r"\w{1,4}|[^\w\s]")
+
+PROMPT_INSTRUCTIONS = """Provide a single swap recommendation as JSON with two fields:
+1. 'action': specify direction (WETH to USDC or USDC to WETH) and percentage to swap (1-10%)
+2. 'reason': brief explanation in 10 words or less
+
+Response format example:
+{"action": "swap 3% of weth to usdc", "reason": "decreasing volume suggests potential price decline"}"""
+
+BATCH_PROMPT_INSTRUCTIONS = """For each portfolio, provide a single swap recommendation with two fields:
+1. 'action': specify direction (WETH to USDC or USDC to WETH) and percentage to swap (1-10%)
+2. 'reason': brief explanation in 10 words or less
+
+Respond with JSON only, one entry per portfolio id, for example:
+{"decisions": [{"id": "p0", "action": "swap 3% of weth to usdc", "reason": "decreasing volume suggests potential price decline"}]}"""
+
+# Market sections from most to least detailed, the builder picks the first that fits the budget
+DETAIL_LEVELS = ("daily", "summary", "minimal")
+
+# Tokens whose price stays within this range over the lookback are summarised as stable
+STABLE_RANGE = 0.005
+
+_encodings: Dict[str, Any] = {}
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Count the tokens of `text`, exactly with tiktoken or approximately without it."""
+    if tiktoken is None:
+        return len(APPROXIMATE_TOKEN.findall(text))
+    if encoding_name not in _encodings:
+        _encodings[encoding_name] = tiktoken.get_encoding(encoding_name)
+    return len(_encodings[encoding_name].encode(text))
+
+
+def _round(value: float, digits: int = 4) -> float:
+    """Round to `digits` significant digits."""
+    return float(f"{value:.{digits}g}")
+
+
+def _change(latest: float, previous: float) -> Optional[float]:
+    """Percentage change, None when the previous value is zero."""
+    return _round((latest - previous) / previous * 100, 3) if previous else None
+
+
+def summarize_token(day_datas: List[Dict[str, Any]], level: str) -> Dict[str, Any]:
+    """
+    Summarise a token's daily data, newest first as returned by The Graph.
+
+    :param day_datas: tokenDayDatas entries with priceUSD and volumeUSD.
+    :param level: one of DETAIL_LEVELS.
+    :return: the compact market section of the token.
+    """
+    prices = [float(day["priceUSD"]) for day in day_datas]
+    volumes = [float(day["volumeUSD"]) for day in day_datas]
+    if not prices:
+        return {}
+
+    # Compared without dividing, so an all-zero series counts as flat instead of raising
+    if len(prices) > 1 and max(prices) - min(prices) <= STABLE_RANGE * max(prices):
+        return {"price": _round(prices[0]), "stable": True}
+
+    summary: Dict[str, Any] = {"price": _round(prices[0])}
+    if len(prices) > 1:
+        summary["chg_1d%"] = _change(prices[0], prices[1])
+        summary["vol_chg_1d%"] = _change(volumes[0], volumes[1])
+    if level == "minimal":
+        return summary
+
+    summary["chg_%dd%%" % (len(prices) - 1)] = _change(prices[0], prices[-1])
+    summary["low"] = _round(min(prices))
+    summary["high"] = _round(max(prices))
+    summary["avg_vol"] = _round(statistics.mean(volumes), 3)
+    returns = [(new - old) / old for new, old in zip(prices, prices[1:]) if old]
+    if len(returns) > 1:
+        summary["volatility%"] = _round(statistics.stdev(returns) * 100, 3)
+    if level == "daily":
+        # Oldest first reads naturally as a series
+        summary["closes"] = [_round(price) for price in reversed(prices)]
+    return summary
+
+
+def build_market_section(token_data: Dict[str, List[Dict[str, Any]]], level: str) -> Dict[str, Any]:
+    """Summaries of every token's daily data at the given detail level."""
+    return {symbol: summarize_token(days, level) for symbol, days in sorted(token_data.items())}
+
+
+def _fit_to_budget(render: Callable[[str], str], budget: int, encoding_name: str) -> Tuple[str, int, str]:
+    """Render the prompt at decreasing detail levels until it fits `budget` tokens."""
+    prompt, tokens, level = "", 0, DETAIL_LEVELS[-1]
+    for level in DETAIL_LEVELS:
+        prompt = render(level)
+        tokens = count_tokens(prompt, encoding_name)
+        if tokens <= budget:
+            break
+    return prompt, tokens, level
+
+
+def _compact(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"))
+
+
+def build_rebalancing_prompt(
+    portfolio: Dict[str, Any],
+    token_data: Dict[str, List[Dict[str, Any]]],
+    budget: int,
+    encoding_name: str = DEFAULT_ENCODING,
+) -> Tuple[str, int, str]:
+    """
+    Build the rebalancing prompt, compressing the market section until it fits `budget` tokens.
+
+    :param portfolio: total value and allocation of the portfolio.
+    :param token_data: token symbol to its daily data, newest first.
+    :param budget: maximum number of prompt tokens.
+    :param encoding_name: tiktoken encoding used to count tokens.
+    :return: the prompt, its token count and the detail level used.
+    """
+
+    def render(level: str) -> str:
+        summary = _compact({"portfolio": portfolio, "market": build_market_section(token_data, level)})
+        return f"Based on the following portfolio and market data:\n{summary}\n\n{PROMPT_INSTRUCTIONS}"
+
+    return _fit_to_budget(render, budget, encoding_name)
+
+
+def batch_token_budget(budget: int, tokens_per_portfolio: int, batch_size: int) -> int:
+    """
+    Token budget of a batched prompt.
+
+    The market section and the instructions are shared, so only the portfolio entries beyond
+    the first add to the single-portfolio budget.
+
+    :param budget: token budget of a prompt for one portfolio.
+    :param tokens_per_portfolio: tokens allowed for each additional portfolio entry.
+    :param batch_size: number of portfolios in the batch.
+    :return: the budget of the batched prompt.
+    """
+    return budget + tokens_per_portfolio * max(0, batch_size - 1)
+
+
+def build_batch_prompt(
+    portfolios: Dict[str, Dict[str, Any]],
+    token_data: Dict[str, List[Dict[str, Any]]],
+    budget: int,
+    encoding_name: str = DEFAULT_ENCODING,
+) -> Tuple[str, int, str]:
+    """
+    Build one prompt asking for a decision per portfolio, sharing a single market section.
+
+    :param portfolios: portfolio id to its total value and allocation.
+    :param token_data: token symbol to its daily data, newest first.
+    :param budget: maximum number of prompt tokens.
+    :param encoding_name: tiktoken encoding used to count tokens.
+    :return: the prompt, its token count and the detail level used.
+    """
+
+    def render(level: str) -> str:
+        market = _compact(build_market_section(token_data, level))
+        listed = _compact([{"id": portfolio_id, **portfolio} for portfolio_id, portfolio in portfolios.items()])
+        return f"Market data:\n{market}\n\nPortfolios:\n{listed}\n\n{BATCH_PROMPT_INSTRUCTIONS}"
+
+    return _fit_to_budget(render, budget, encoding_name)
+
+
+def extract_json(text: str) -> Optional[Any]:
+    """Parse the JSON object in an LLM answer, ignoring code fences and surrounding prose."""
+    start, end = text.find("{"), text.rfind("}") + 1
+    if start == -1 or end == 0:
+        return None
+    try:
+        return json.loads(text[start:end])
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_batch_decisions(text: str, portfolio_ids: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Extract the well-formed decisions of a batched answer.
+
+    :param text: the LLM answer.
+    :param portfolio_ids: ids of the portfolios in the batch.
+    :return: portfolio id to its decision, for the ids answered with a string action and reason.
+    """
+    answer = extract_json(text)
+    entries = answer.get("decisions") if isinstance(answer, dict) else None
+    if not isinstance(entries, list):
+        return {}
+
+    decisions = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or entry.get("id") not in portfolio_ids:
+            continue
+        if isinstance(entry.get("action"), str) and isinstance(entry.get("reason"), str):
+            decisions[entry["id"]] = {"action": entry["action"], "reason": entry["reason"]}
+    return decisions
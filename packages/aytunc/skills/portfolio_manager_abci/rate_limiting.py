@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the per-API token-bucket rate limiter shared by the skill's behaviours."""
+
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+# Status codes after which the provider asks us to slow down
+RATE_LIMITED_STATUS_CODES = (429, 503)
+
+
+class TokenBucket:
+    """A token bucket refilled at `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens accrued since the last update."""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _delay(self, now: float) -> float:
+        """Seconds until the next token is due, given the tokens already taken."""
+        tokens = self._tokens - 1
+        delay = 0.0 if tokens >= 0 else -tokens / self.rate
+        return max(delay, self._blocked_until - now)
+
+    def peek(self) -> float:
+        """Seconds a request would have to wait if a token were reserved now, without taking it."""
+        now = time.monotonic()
+        self._refill(now)
+        return self._delay(now)
+
+    def reserve(self) -> float:
+        """
+        Take one token, borrowing against the future if the bucket is empty.
+
+        Reserving instead of polling keeps concurrent callers in FIFO order: each one gets
+        its own slot and waits exactly until it is due. Only reserve when the request will
+        be sent; use `peek` to decide whether to wait at all.
+
+        :return: seconds to wait before sending the request.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        delay = self._delay(now)
+        self._tokens -= 1
+        return delay
+
+    def block(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds`, e.g. after a Retry-After, and drain the burst."""
+        now = time.monotonic()
+        self._refill(now)
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self._tokens = min(self._tokens, 0.0)
+
+
+class RateLimiter:
+    """Token buckets keyed by ApiSpecs `api_id`; APIs without a configured limit are not throttled."""
+
+    def __init__(self, limits: Dict[str, Dict[str, float]]) -> None:
+        """
+        Initialize the limiter.
+
+        :param limits: api_id to {"rate": requests per second, "burst": maximum burst size}.
+        """
+        self._buckets = {
+            api_id: TokenBucket(float(limit["rate"]), int(limit.get("burst", 1)))
+            for api_id, limit in limits.items()
+        }
+
+    def peek(self, api_id: str) -> float:
+        """Seconds a request to `api_id` would wait for its slot, without reserving it."""
+        bucket = self._buckets.get(api_id)
+        return bucket.peek() if bucket is not None else 0.0
+
+    def reserve(self, api_id: str) -> float:
+        """Reserve a request slot for `api_id` and return the seconds to wait for it."""
+        bucket = self._buckets.get(api_id)
+        return bucket.reserve() if bucket is not None else 0.0
+
+    def block(self, api_id: str, seconds: float) -> None:
+        """Pause all requests to `api_id` for `seconds`."""
+        bucket = self._buckets.get(api_id)
+        if bucket is not None:
+            bucket.block(seconds)
+
+
+def parse_headers(headers: str) -> Dict[str, str]:
+    """Parse the newline separated headers of an HttpMessage into a lower-cased dict."""
+    parsed = {}
+    for line in headers.splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            parsed[key.strip().lower()] = value.strip()
+    return parsed
+
+
+def retry_after_seconds(headers: str, default: float) -> float:
+    """
+    Seconds to wait according to a Retry-After header, given as seconds or as an HTTP date.
+
+    :param headers: raw HttpMessage headers.
+    :param default: delay to use when the header is absent or malformed.
+    :return: the delay in seconds.
+    """
+    value: Optional[str] = parse_headers(headers or "").get("retry-after")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the rebalancing report formats of PortfolioManagerAbciApp."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Both formats share the filename, readers tell them apart by the version field
+REPORT_FILENAME = "PortfolioRebalancer_Report.json"
+PERIOD_REPORT_DIRECTORY = "PortfolioRebalancer_Reports"
+PERIOD_REPORT_INDEX = "index.json"
+
+REPORT_FORMAT_JSON = "json"
+REPORT_FORMAT_COLUMNAR = "columnar"
+
+# Version 1 is one JSON document per period, version 2 a columnar history of every period
+REPORT_VERSION = 1
+COLUMNAR_REPORT_VERSION = 2
+
+HISTORY_COLUMNS = ("timestamp", "total_portfolio_value", "action", "reason")
+TOKEN_COLUMNS = ("value_usd", "percentage")
+
+VALUE_DECIMALS = 6
+PERCENTAGE_DECIMALS = 4
+
+
+def build_report(
+    timestamp: str,
+    token_values: Dict[str, float],
+    total_portfolio_value: float,
+    action: str,
+    reason: str,
+) -> Dict[str, Any]:
+    """Build a single-period rebalancing report."""
+    return {
+        "version": REPORT_VERSION,
+        "timestamp": timestamp,
+        "portfolio_status": {
+            token: {
+                "value_usd": value,
+                "percentage": (value / total_portfolio_value) * 100,
+            }
+            for token, value in token_values.items()
+        },
+        "total_portfolio_value": total_portfolio_value,
+        "rebalancing_recommendation": {
+            "action": action,
+            "reason": reason,
+        },
+    }
+
+
+def empty_history() -> Dict[str, Any]:
+    """Create an empty columnar report history."""
+    return {
+        "version": COLUMNAR_REPORT_VERSION,
+        "columns": {column: [] for column in HISTORY_COLUMNS},
+        "tokens": {},
+    }
+
+
+def _history_length(history: Dict[str, Any]) -> int:
+    """Get the number of periods stored in a columnar history."""
+    return len(history["columns"]["timestamp"])
+
+
+def append_report(history: Optional[Dict[str, Any]], report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Append a single-period report to a columnar history.
+
+    Args:
+        history: The previous history, a single version 1 report to seed it with, or None
+        report: The single-period report to append
+
+    Returns:
+        Dict[str, Any]: The history including the new report as its last row
+    """
+    if history is None:
+        history = empty_history()
+    elif history.get("version", REPORT_VERSION) != COLUMNAR_REPORT_VERSION:
+        history = append_report(empty_history(), history)
+
+    columns = history["columns"]
+    tokens = history["tokens"]
+    row = _history_length(history)
+    recommendation = report.get("rebalancing_recommendation", {})
+
+    columns["timestamp"].append(report["timestamp"])
+    columns["total_portfolio_value"].append(
+        round(report["total_portfolio_value"], VALUE_DECIMALS)
+    )
+    columns["action"].append(recommendation.get("action"))
+    columns["reason"].append(recommendation.get("reason"))
+
+    status = report.get("portfolio_status", {})
+    for token in sorted(set(tokens) | set(status)):
+        # Tokens first seen in this period are back-filled with nulls
+        token_columns = tokens.setdefault(token, {column: [None] * row for column in TOKEN_COLUMNS})
+        token_status = status.get(token, {})
+        value = token_status.get("value_usd")
+        percentage = token_status.get("percentage")
+        token_columns["value_usd"].append(None if value is None else round(value, VALUE_DECIMALS))
+        token_columns["percentage"].append(
+            None if percentage is None else round(percentage, PERCENTAGE_DECIMALS)
+        )
+
+    return history
+
+
+def history_to_reports(history: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Expand a columnar history back into single-period reports, oldest first."""
+    columns = history["columns"]
+    reports = []
+    for row in range(_history_length(history)):
+        reports.append({
+            "version": REPORT_VERSION,
+            "timestamp": columns["timestamp"][row],
+            "portfolio_status": {
+                token: {column: values[row] for column, values in token_columns.items()}
+                for token, token_columns in history["tokens"].items()
+                if token_columns["value_usd"][row] is not None
+            },
+            "total_portfolio_value": columns["total_portfolio_value"][row],
+            "rebalancing_recommendation": {
+                "action": columns["action"][row],
+                "reason": columns["reason"][row],
+            },
+        })
+    return reports
+
+
+def serialize_compact_json(filename: str, obj: Any, **kwargs: Any) -> Dict[str, str]:
+    """IPFS storer that writes JSON without indentation or padding."""
+    return {filename: json.dumps(obj, separators=(",", ":"), sort_keys=True)}
+
+
+class ReportSpool:
+    """A local directory of reports waiting to be uploaded to IPFS."""
+
+    def __init__(self, directory: str) -> None:
+        """Initialize the spool, creating its directory if needed."""
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    def add(self, key: str, report: Dict[str, Any]) -> Path:
+        """Spool a report under the given key, replacing any report with the same key."""
+        path = self._directory / f"{key}.json"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as spool_file:
+            json.dump(report, spool_file, sort_keys=True)
+        # Atomic rename, a crash never leaves a half written report behind
+        os.replace(tmp_path, path)
+        return path
+
+    def pending(self) -> List[Tuple[Path, Dict[str, Any]]]:
+        """Get the spooled reports, oldest key first."""
+        reports = []
+        for path in sorted(self._directory.glob("*.json")):
+            with open(path, "r", encoding="utf-8") as spool_file:
+                reports.append((path, json.load(spool_file)))
+        return reports
+
+    @staticmethod
+    def remove(path: Path) -> None:
+        """Remove a report from the spool once it has been uploaded."""
+        path.unlink(missing_ok=True)
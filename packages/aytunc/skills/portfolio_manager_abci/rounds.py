@@ -19,14 +19,20 @@
 
 """This package contains the rounds of PortfolioManagerAbciApp."""
 
+import json
+import statistics
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import replace
 from enum import Enum
-from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, cast
 
 from packages.valory.skills.abstract_round_abci.base import (
     AbciApp,
     AbciAppTransitionFunction,
     AppState,
     BaseSynchronizedData,
+    BaseTxPayload,
     CollectSameUntilThresholdRound,
     CollectionRound,
     DegenerateRound,
@@ -35,7 +41,12 @@ from packages.valory.skills.abstract_round_abci.base import (
     get_name,
 )
 
+from packages.aytunc.skills.portfolio_manager_abci.aggregation import (
+    AGGREGATION_MEDIAN,
+    aggregate_within_tolerance,
+)
 from packages.aytunc.skills.portfolio_manager_abci.payloads import (
+    BlockAnchorPayload,
     DataPullPayload,
     DecisionMakingPayload,
     TxPreparationPayload,
@@ -63,13 +74,23 @@ class SynchronizedData(BaseSynchronizedData):
         serialized = self.db.get_strict(key)
         return CollectionRound.deserialize_collection(serialized)
 
+    @property
+    def anchor_block(self) -> Optional[int]:
+        """Get the block number every on-chain read of the period is pinned to."""
+        return self.db.get("anchor_block", None)
+
+    @property
+    def participant_to_block_anchor_round(self) -> DeserializedCollection:
+        """Agent to payload mapping for the BlockAnchorRound."""
+        return self._get_deserialized("participant_to_block_anchor_round")
+
     @property
     def token_values(self) -> Optional[str]:
         """Get the token values."""
         return self.db.get("token_values", None)
 
     @property
-    def total_portfolio_value(self) -> Optional[float]:
+    def total_portfolio_value(self) -> Optional[int]:
         """Get the total portfolio value."""
         return self.db.get("total_portfolio_value", None)
 
@@ -84,6 +105,11 @@ class SynchronizedData(BaseSynchronizedData):
         """Get the ipfs hash."""
         return self.db.get("ipfs_hash", None)
 
+    @property
+    def uploaded_report_hashes(self) -> Optional[str]:
+        """Get the uploaded report hashes agreed for commitment, as a JSON of period key to hash."""
+        return self.db.get("uploaded_report_hashes", None)
+
     @property
     def participant_to_data_round(self) -> DeserializedCollection:
         """Agent to payload mapping for the DataPullRound."""
@@ -111,45 +137,151 @@ class SynchronizedData(BaseSynchronizedData):
         return str(self.db.get_strict("tx_submitter"))
 
 
-class DataPullRound(CollectSameUntilThresholdRound):
-    """DataPullRound"""
+class BlockAnchorRound(CollectSameUntilThresholdRound):
+    """
+    Agrees on the block number every on-chain read of the period is executed at.
 
-    payload_class = DataPullPayload
-    # payload_attribute = ""  # TODO: update
+    Each agent proposes its latest block minus a few confirmations, one proposal per sender; the
+    lower median of the proposals is committed, so agents whose node lags by a block still agree.
+    If enough agents could not read a block number, None is committed and the period reads the
+    latest state.
+    """
+
+    payload_class = BlockAnchorPayload
     synchronized_data_class = SynchronizedData
     done_event = Event.DONE
     no_majority_event = Event.NO_MAJORITY
 
-    # TODO: replace AbstractRound with one of CollectDifferentUntilAllRound,
-    # CollectSameUntilAllRound, CollectSameUntilThresholdRound,
-    # CollectDifferentUntilThresholdRound, OnlyKeeperSendsRound, VotingRound,
-    # from packages/valory/skills/abstract_round_abci/base.py
-    # or implement the methods
+    collection_key = get_name(SynchronizedData.participant_to_block_anchor_round)
 
-    # def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
-    #     """Process the end of the block."""
-    #     raise NotImplementedError
+    def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Event]]:
+        """Process the end of the block."""
+        threshold = self.synchronized_data.consensus_threshold
+        if len(self.collection) < threshold:
+            return None
+
+        proposals = [cast(BlockAnchorPayload, payload).block_number for payload in self.collection.values()]
+        blocks = [block for block in proposals if block is not None]
+
+        if len(blocks) >= threshold:
+            anchor_block: Optional[int] = statistics.median_low(blocks)
+        elif len(proposals) - len(blocks) >= threshold:
+            anchor_block = None
+        elif len(self.collection) >= self.synchronized_data.nb_participants:
+            return self.synchronized_data, self.no_majority_event
+        else:
+            return None
+
+        synchronized_data = self.synchronized_data.update(
+            synchronized_data_class=SynchronizedData,
+            **{
+                get_name(SynchronizedData.anchor_block): anchor_block,
+                self.collection_key: self.serialized_collection,
+            },
+        )
+        return synchronized_data, self.done_event
+
+
+class NumericAggregationRound(CollectSameUntilThresholdRound, ABC):
+    """
+    Collects numeric observations from different agents and commits their aggregate.
 
-    # def check_payload(self, payload: DataPullPayload) -> None:
-    #     """Check payload."""
-    #     raise NotImplementedError
+    Payloads are collected one per sender and do not need to be identical: once at least the
+    consensus threshold of agents agree within `tolerance` of the median, the median (or trimmed mean)
+    of their values is committed. Agents that could not observe anything submit None; if enough of
+    them do, None is committed. No majority is declared only once every agent has voted.
+    """
 
-    # def process_payload(self, payload: DataPullPayload) -> None:
-    #     """Process payload."""
-    #     raise NotImplementedError
+    done_event: Event
+    no_majority_event: Event
 
+    @property
+    @abstractmethod
+    def tolerance(self) -> float:
+        """Maximum relative distance of an agreeing observation from the median."""
+
+    @property
+    def aggregation_method(self) -> str:
+        """AGGREGATION_MEDIAN or AGGREGATION_TRIMMED_MEAN."""
+        return AGGREGATION_MEDIAN
+
+    @abstractmethod
+    def payload_values(self, payload: BaseTxPayload) -> Optional[Dict[str, float]]:
+        """The numeric observation of a payload, None if the agent observed nothing."""
+
+    @abstractmethod
+    def update_synchronized_data(self, values: Optional[Dict[str, float]]) -> BaseSynchronizedData:
+        """Synchronized data with the aggregated observation committed."""
+
+    def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Event]]:
+        """Process the end of the block."""
+        threshold = self.synchronized_data.consensus_threshold
+        if len(self.collection) < threshold:
+            return None
+
+        samples = [self.payload_values(payload) for payload in self.collection.values()]
+
+        if sum(1 for sample in samples if sample is None) >= threshold:
+            return self.update_synchronized_data(None), self.done_event
+
+        values = aggregate_within_tolerance(
+            [sample for sample in samples if sample is not None],
+            self.tolerance,
+            threshold,
+            self.aggregation_method,
+        )
+        if values is not None:
+            return self.update_synchronized_data(values), self.done_event
+
+        # Later payloads may still complete an agreeing majority
+        if len(self.collection) >= self.synchronized_data.nb_participants:
+            return self.synchronized_data, self.no_majority_event
+        return None
+
+
+class DataPullRound(NumericAggregationRound):
+    """DataPullRound"""
+
+    payload_class = DataPullPayload
+    synchronized_data_class = SynchronizedData
+    done_event = Event.DONE
+    no_majority_event = Event.NO_MAJORITY
 
-    # Collection key specifies where in the synchronized data the agento to payload mapping will be stored
+    # Collection key specifies where in the synchronized data the agent to payload mapping will be stored
     collection_key = get_name(SynchronizedData.participant_to_data_round)
 
-    # Selection key specifies how to extract all the different objects from each agent's payload
-    # and where to store it in the synchronized data. Notice that the order follows the same order
-    # from the payload class.
-    selection_key = (
-        get_name(SynchronizedData.token_values),
-        get_name(SynchronizedData.total_portfolio_value),
-    )
-    
+    @property
+    def tolerance(self) -> float:
+        """Maximum relative distance of an agent's token values from the median."""
+        return self.context.params.data_pull_tolerance
+
+    @property
+    def aggregation_method(self) -> str:
+        """How the agreeing token values are aggregated."""
+        return self.context.params.data_pull_aggregation
+
+    def payload_values(self, payload: BaseTxPayload) -> Optional[Dict[str, int]]:
+        """Token USD values of a DataPull payload, integers with USD_DECIMALS decimals."""
+        payload = cast(DataPullPayload, payload)
+        if payload.token_values is None:
+            return None
+        return {symbol: int(value) for symbol, value in json.loads(payload.token_values).items()}
+
+    def update_synchronized_data(self, values: Optional[Dict[str, int]]) -> BaseSynchronizedData:
+        """Commit the aggregated token values, and their sum as the total portfolio value."""
+        return self.synchronized_data.update(
+            synchronized_data_class=SynchronizedData,
+            **{
+                get_name(SynchronizedData.token_values): (
+                    json.dumps(values, sort_keys=True) if values is not None else None
+                ),
+                get_name(SynchronizedData.total_portfolio_value): (
+                    sum(values.values()) if values is not None else None
+                ),
+                self.collection_key: self.serialized_collection,
+            },
+        )
+
 
 class DecisionMakingRound(CollectSameUntilThresholdRound):
     """DecisionMakingRound"""
@@ -183,6 +315,27 @@ class DecisionMakingRound(CollectSameUntilThresholdRound):
         get_name(SynchronizedData.ipfs_hash),
     )
 
+    @property
+    def payload_values_count(self) -> Counter:
+        """Count the decisions only, so agents holding different uploaded reports still agree."""
+        return Counter(
+            (payload.event, payload.adjustment_balances, payload.ipfs_hash)
+            for payload in self.collection.values()
+        )
+
+    @property
+    def agreed_report_hashes(self) -> Optional[str]:
+        """Uploaded report hashes sent by at least the consensus threshold, as a JSON of period key to hash."""
+        counts: Counter = Counter()
+        for payload in self.collection.values():
+            counts.update(json.loads(payload.uploaded_report_hashes or "{}").items())
+        agreed = {
+            key: ipfs_hash
+            for (key, ipfs_hash), count in counts.items()
+            if count >= self.synchronized_data.consensus_threshold
+        }
+        return json.dumps(agreed, sort_keys=True) if agreed else None
+
     def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Event]]:
         """Process the end of the block."""
 
@@ -205,7 +358,8 @@ class DecisionMakingRound(CollectSameUntilThresholdRound):
             if adjustment_balances is not None:
                 new_synchronized_data = self.synchronized_data.update(
                     adjustment_balances=adjustment_balances,
-                    ipfs_hash=ipfs_hash
+                    ipfs_hash=ipfs_hash,
+                    uploaded_report_hashes=self.agreed_report_hashes,
                 )
             else:
                 self.context.logger.warning("Adjustment balances not found in payload.")
@@ -213,9 +367,11 @@ class DecisionMakingRound(CollectSameUntilThresholdRound):
 
             return new_synchronized_data, Event.TRANSACT
 
-        if not self.is_majority_possible(
-            self.collection, self.synchronized_data.nb_participants
-        ):
+        decisions = {
+            sender: replace(payload, uploaded_report_hashes=None)
+            for sender, payload in self.collection.items()
+        }
+        if not self.is_majority_possible(decisions, self.synchronized_data.nb_participants):
             return self.synchronized_data, Event.NO_MAJORITY
 
         return None
@@ -266,9 +422,14 @@ class FinishedTxPreparationRound(DegenerateRound):
 class PortfolioManagerAbciApp(AbciApp[Event]):
     """PortfolioManagerAbciApp"""
 
-    initial_round_cls: AppState = DataPullRound
-    initial_states: Set[AppState] = {DataPullRound}
+    initial_round_cls: AppState = BlockAnchorRound
+    initial_states: Set[AppState] = {BlockAnchorRound}
     transition_function: AbciAppTransitionFunction = {
+        BlockAnchorRound: {
+            Event.DONE: DataPullRound,
+            Event.NO_MAJORITY: BlockAnchorRound,
+            Event.ROUND_TIMEOUT: BlockAnchorRound
+        },
         DataPullRound: {
             Event.DONE: DecisionMakingRound,
             Event.NO_MAJORITY: DataPullRound,
@@ -296,7 +457,7 @@ class PortfolioManagerAbciApp(AbciApp[Event]):
     event_to_timeout: EventToTimeout = {}
     cross_period_persisted_keys: FrozenSet[str] = frozenset()
     db_pre_conditions: Dict[AppState, Set[str]] = {
-        DataPullRound: set(),
+        BlockAnchorRound: set(),
     }
     db_post_conditions: Dict[AppState, Set[str]] = {
         FinishedDecisionMakingRound: set(),
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Tests for the aggregation module."""
+
+import pytest
+
+from packages.aytunc.skills.portfolio_manager_abci.aggregation import (
+    AGGREGATION_MEDIAN,
+    AGGREGATION_TRIMMED_MEAN,
+    aggregate,
+    aggregate_within_tolerance,
+    median,
+    trimmed_mean,
+    within_tolerance,
+)
+
+
+def test_median_keeps_integers() -> None:
+    """An even number of integers has an integer median, rounded down."""
+    assert median([1, 2, 3, 4]) == 2
+    assert isinstance(median([10, 20]), int)
+    assert median([1, 5, 3]) == 3
+    assert median([1.0, 2.0]) == 1.5
+
+
+def test_trimmed_mean() -> None:
+    """The trimmed mean drops the extremes and floors integer results."""
+    values = [0, 10, 10, 10, 10, 10, 10, 10, 10, 1000]
+    assert trimmed_mean(values) == 10
+    assert trimmed_mean([1, 2]) == 1
+    assert aggregate([1, 2, 4], AGGREGATION_TRIMMED_MEAN) == 2
+    assert aggregate([1, 2, 4], AGGREGATION_MEDIAN) == 2
+
+
+@pytest.mark.parametrize(
+    "value, reference, tolerance, expected",
+    [
+        (101, 100, 0.01, True),
+        (102, 100, 0.01, False),
+        (0, 0, 0.01, True),
+        (1, 0, 0.01, False),
+    ],
+)
+def test_within_tolerance(value: int, reference: int, tolerance: float, expected: bool) -> None:
+    """Tolerance is relative to the reference."""
+    assert within_tolerance(value, reference, tolerance) is expected
+
+
+def test_aggregate_within_tolerance_ignores_outlier() -> None:
+    """An outlier does not prevent the other agents from agreeing."""
+    samples = [{"WETH": 100}, {"WETH": 101}, {"WETH": 200}, {"WETH": 100}]
+    assert aggregate_within_tolerance(samples, 0.05, 3) == {"WETH": 100}
+
+
+def test_aggregate_within_tolerance_identical_samples() -> None:
+    """Identical observations aggregate to themselves."""
+    samples = [{"USDC": 5, "WETH": 7}] * 4
+    assert aggregate_within_tolerance(samples, 0.0, 3) == {"USDC": 5, "WETH": 7}
+
+
+def test_aggregate_within_tolerance_no_agreement() -> None:
+    """None is returned when fewer than `threshold` agents agree."""
+    samples = [{"WETH": 100}, {"WETH": 150}, {"WETH": 200}]
+    assert aggregate_within_tolerance(samples, 0.01, 2) is None
+    assert aggregate_within_tolerance([], 0.01, 1) is None
+
+
+def test_aggregate_within_tolerance_mismatching_keys() -> None:
+    """Only samples with the most common key set are compared."""
+    samples = [{"WETH": 100}, {"WETH": 100, "USDC": 1}, {"WETH": 100}]
+    assert aggregate_within_tolerance(samples, 0.01, 2) == {"WETH": 100}
+    assert aggregate_within_tolerance(samples, 0.01, 3) is None
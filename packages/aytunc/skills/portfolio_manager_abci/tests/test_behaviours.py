@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Tests for the behaviours module."""
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Generator, List
+from unittest import mock
+
+from packages.aytunc.skills.portfolio_manager_abci.behaviours import (
+    DecisionMakingBehaviour,
+    PortfolioManagerBaseBehaviour,
+    TxPreparationBehaviour,
+)
+from packages.aytunc.skills.portfolio_manager_abci.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+from packages.aytunc.skills.portfolio_manager_abci.llm_router import LLMRouter
+from packages.aytunc.skills.portfolio_manager_abci.reports import ReportSpool
+from packages.valory.protocols.contract_api import ContractApiMessage
+from packages.valory.skills.abstract_round_abci.behaviour_utils import TimeoutException
+
+
+def returns(value: Any) -> Generator[None, None, Any]:
+    """A behaviour generator returning `value` without yielding."""
+    return value
+    yield  # pylint: disable=unreachable
+
+
+def run(generator: Generator) -> Any:
+    """Drive a behaviour generator to completion and return its result."""
+    try:
+        while True:
+            next(generator)
+    except StopIteration as stop:
+        return stop.value
+
+
+def half_open_breaker() -> CircuitBreaker:
+    """A breaker that has just become half-open."""
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == STATE_HALF_OPEN
+    return breaker
+
+
+def make_behaviour(breaker: CircuitBreaker, send_result: Any) -> mock.MagicMock:
+    """A stand-in behaviour whose rate-limited send returns `send_result`."""
+    behaviour = mock.MagicMock()
+    behaviour.local_state.circuit_breakers.get.return_value = breaker
+    behaviour._send_rate_limited.side_effect = lambda api_id, **kwargs: returns(send_result)
+    return behaviour
+
+
+def test_cut_short_request_releases_the_probe() -> None:
+    """A half-open probe cut short by the deadline lets the next request probe again."""
+    breaker = half_open_breaker()
+    behaviour = make_behaviour(breaker, (None, True))
+
+    response = run(PortfolioManagerBaseBehaviour.get_rate_limited_http_response(behaviour, "coinmarketcap"))
+    assert response is None
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_answered_probe_closes_the_breaker() -> None:
+    """A probe that got an answer resolves the breaker."""
+    breaker = half_open_breaker()
+    behaviour = make_behaviour(breaker, (mock.MagicMock(status_code=200), False))
+
+    run(PortfolioManagerBaseBehaviour.get_rate_limited_http_response(behaviour, "coinmarketcap"))
+    assert breaker.state == STATE_CLOSED
+
+
+def make_llm_behaviour(breakers: Dict[str, CircuitBreaker], remaining: float) -> mock.MagicMock:
+    """A stand-in behaviour routing between openai and nillion, each with its own breaker."""
+    behaviour = mock.MagicMock()
+    behaviour.params.llm_providers = ["openai", "nillion"]
+    behaviour.local_state.llm_router = LLMRouter(default_hedge_delay=0.0)
+    behaviour.local_state.circuit_breakers = breakers
+    behaviour.get_llm_specs.side_effect = lambda provider: SimpleNamespace(api_id=provider)
+    behaviour.deadline.remaining.return_value = remaining
+    behaviour.context.requests.request_id_to_callback = {}
+
+    def send_llm_request(provider: str, *args: Any) -> Generator[None, None, str]:
+        breakers[provider].allow_request()
+        return f"nonce-{provider}"
+        yield  # pylint: disable=unreachable
+
+    behaviour.send_llm_request.side_effect = send_llm_request
+    return behaviour
+
+
+def test_rate_limited_provider_keeps_its_probe() -> None:
+    """A provider skipped for its rate limit does not consume the half-open probe."""
+    breaker = half_open_breaker()
+    behaviour = mock.MagicMock()
+    behaviour.local_state.circuit_breakers.get.return_value = breaker
+    behaviour.local_state.rate_limiter.peek.return_value = 5.0
+
+    nonce = run(DecisionMakingBehaviour.send_llm_request(behaviour, "openai", "prompt", False))
+    assert nonce is None
+    assert breaker.allow_request()
+
+
+def test_losing_hedge_releases_its_probe() -> None:
+    """When the hedge wins, the slow primary's probe is released for a later request."""
+    breakers = {"openai": half_open_breaker(), "nillion": half_open_breaker()}
+    behaviour = make_llm_behaviour(breakers, remaining=60.0)
+    answers: List[Any] = [TimeoutException(), SimpleNamespace(dialogue_reference=("nonce-nillion", ""), status_code=200)]
+
+    def wait_for_message(**kwargs: Any) -> Generator[None, None, Any]:
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+        yield  # pylint: disable=unreachable
+
+    behaviour.wait_for_message.side_effect = wait_for_message
+
+    response, provider = run(
+        DecisionMakingBehaviour.get_hedged_llm_response(behaviour, "prompt", preferred="openai")
+    )
+    assert provider == "nillion" and response.status_code == 200
+    assert breakers["nillion"].state == STATE_CLOSED
+    assert breakers["openai"].state == STATE_HALF_OPEN
+    assert breakers["openai"].allow_request()
+    assert behaviour.context.requests.request_id_to_callback == {}
+
+
+def test_unanswered_requests_fail_their_breaker() -> None:
+    """A provider still silent at the deadline counts as failed in the router and its breaker."""
+    breaker = half_open_breaker()
+    breaker.reset_timeout = 3600.0
+    behaviour = make_llm_behaviour({"openai": breaker, "nillion": CircuitBreaker()}, remaining=0.0)
+
+    response, provider = run(
+        DecisionMakingBehaviour.get_hedged_llm_response(behaviour, "prompt", preferred="openai")
+    )
+    assert (response, provider) == (None, None)
+    assert breaker.state == STATE_OPEN
+    assert behaviour.local_state.llm_router.stats("openai").error_rate > 0
+
+
+def make_history_behaviour(remaining_timeout: float) -> mock.MagicMock:
+    """A stand-in behaviour with a committed report hash and an IPFS node that never answers."""
+    behaviour = mock.MagicMock()
+    behaviour.params.batch_report_commitment = False
+    behaviour.params.request_timeout = 10.0
+    behaviour.deadline.timeout_for.return_value = remaining_timeout
+    behaviour.get_contract_api_response_before_deadline.side_effect = lambda **kwargs: returns(
+        SimpleNamespace(
+            performative=ContractApiMessage.Performative.STATE,
+            state=SimpleNamespace(body={"reports": ["QmPrevious"]}),
+        )
+    )
+
+    def get_from_ipfs(ipfs_hash: str, **kwargs: Any) -> Generator[None, None, Any]:
+        raise TimeoutException()
+        yield  # pylint: disable=unreachable
+
+    behaviour.get_from_ipfs = mock.MagicMock(side_effect=get_from_ipfs)
+    behaviour.fetch_report_history.side_effect = lambda ipfs_hash: PortfolioManagerBaseBehaviour.fetch_report_history(
+        behaviour, ipfs_hash
+    )
+    return behaviour
+
+
+def test_previous_history_read_is_bounded_by_the_deadline() -> None:
+    """The IPFS read gets the remaining round budget as timeout, and a timeout yields no history."""
+    behaviour = make_history_behaviour(remaining_timeout=2.5)
+
+    assert run(PortfolioManagerBaseBehaviour.get_previous_report_history(behaviour)) is None
+    behaviour.deadline.timeout_for.assert_called_once_with(10.0)
+    assert behaviour.get_from_ipfs.call_args.kwargs["timeout"] == 2.5
+
+
+def test_previous_history_read_is_skipped_past_the_deadline() -> None:
+    """Once the round budget is spent the IPFS node is not queried at all."""
+    behaviour = make_history_behaviour(remaining_timeout=0.0)
+
+    assert run(PortfolioManagerBaseBehaviour.get_previous_report_history(behaviour)) is None
+    behaviour.get_from_ipfs.assert_not_called()
+
+
+def test_spooled_hash_is_committed_one_period_later(tmp_path: Path) -> None:
+    """A report uploaded after period 5's vote is offered in period 6 and committed in its transaction."""
+    local_state = SimpleNamespace(uploaded_report_hashes={}, report_history_hash=None)
+
+    # Period 5: the spooled report is uploaded once the TxPreparation payload is out
+    flusher = mock.MagicMock()
+    flusher.local_state = local_state
+    flusher.params.report_format = "json"
+    flusher.report_spool = ReportSpool(str(tmp_path))
+    flusher.report_spool.add(f"{5:010d}", {"period": 5})
+    flusher.deadline.expired.return_value = False
+    flusher.upload_report.side_effect = lambda report, timeout: returns("QmReport5")
+
+    assert run(TxPreparationBehaviour.flush_report_spool(flusher)) == ["QmReport5"]
+    assert flusher.report_spool.pending() == []
+    assert local_state.uploaded_report_hashes == {"0000000005": "QmReport5"}
+
+    # Period 6: DecisionMaking offers the uploaded hash alongside its decision
+    decider = mock.MagicMock()
+    decider.local_state = local_state
+    decision = json.dumps({"action": "swap 10% of USDC to WETH"})
+    decider.get_next_event.side_effect = lambda: returns(("transact", decision, None))
+    decider.send_a2a_transaction.side_effect = lambda payload: returns(None)
+    decider.wait_until_round_end.side_effect = lambda: returns(None)
+
+    run(DecisionMakingBehaviour.async_act(decider))
+    payload = decider.send_a2a_transaction.call_args.args[0]
+    assert json.loads(payload.uploaded_report_hashes) == {"0000000005": "QmReport5"}
+
+    # Period 6: TxPreparation commits the hash agreed in DecisionMaking
+    preparer = mock.MagicMock()
+    preparer.local_state = local_state
+    preparer.params.async_report_upload = True
+    preparer.synchronized_data.adjustment_balances = decision
+    preparer.synchronized_data.ipfs_hash = None
+    preparer.synchronized_data.uploaded_report_hashes = payload.uploaded_report_hashes
+    preparer.get_token_balances.side_effect = lambda: returns({"USDC": 1_000_000, "WETH": 0})
+    preparer.take_agreed_report_hashes.side_effect = lambda: TxPreparationBehaviour.take_agreed_report_hashes(
+        preparer
+    )
+    preparer.generate_multisend_transactions.side_effect = lambda rebalancing, hashes: returns("0xsafe")
+    preparer.send_a2a_transaction.side_effect = lambda payload: returns(None)
+    preparer.flush_report_spool.side_effect = lambda: returns([])
+    preparer.wait_until_round_end.side_effect = lambda: returns(None)
+
+    run(TxPreparationBehaviour.async_act(preparer))
+    assert preparer.generate_multisend_transactions.call_args.args[1] == ["QmReport5"]
+    assert local_state.uploaded_report_hashes == {}
+
+
+def test_columnar_history_extends_the_last_uploaded_one(tmp_path: Path) -> None:
+    """A history uploaded but not committed yet is the base of the next one, so no period is lost."""
+    local_state = SimpleNamespace(uploaded_report_hashes={"0000000005": "QmHistory5"}, report_history_hash="QmHistory5")
+    behaviour = mock.MagicMock()
+    behaviour.local_state = local_state
+    behaviour.params.report_format = "columnar"
+    behaviour.report_spool = ReportSpool(str(tmp_path))
+    behaviour.report_spool.add(f"{6:010d}", {"period": 6})
+    behaviour.fetch_report_history.side_effect = lambda ipfs_hash: returns({"periods": [5]})
+    uploaded: List[Any] = []
+    behaviour.upload_report.side_effect = lambda history, timeout: returns(uploaded.append(history) or "QmHistory6")
+
+    with mock.patch(
+        "packages.aytunc.skills.portfolio_manager_abci.behaviours.append_report",
+        side_effect=lambda history, report: {"periods": history["periods"] + [report["period"]]},
+    ):
+        assert run(TxPreparationBehaviour.flush_report_spool(behaviour)) == ["QmHistory6"]
+
+    behaviour.fetch_report_history.assert_called_once_with("QmHistory5")
+    behaviour.get_previous_report_history.assert_not_called()
+    assert uploaded == [{"periods": [5, 6]}]
+    assert local_state.report_history_hash == "QmHistory6"
+    assert local_state.uploaded_report_hashes == {"0000000006": "QmHistory6"}
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Tests for the circuit_breaker module."""
+
+from typing import Iterator
+from unittest import mock
+
+import pytest
+
+from packages.aytunc.skills.portfolio_manager_abci import circuit_breaker
+from packages.aytunc.skills.portfolio_manager_abci.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitBreakers,
+    DegradedCache,
+)
+
+
+class Clock:
+    """A controllable clock."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Iterator[Clock]:
+    """Patch the module's monotonic and wall clocks."""
+    fake = Clock()
+    with mock.patch.object(circuit_breaker.time, "monotonic", fake), mock.patch.object(
+        circuit_breaker.time, "time", fake
+    ):
+        yield fake
+
+
+def make_breaker() -> CircuitBreaker:
+    """A breaker opening at half of at least four calls failing."""
+    return CircuitBreaker(failure_rate_threshold=0.5, window=60.0, min_calls=4, reset_timeout=30.0)
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    """Record enough failures to open the breaker."""
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+
+
+def test_stays_closed_below_min_calls(clock: Clock) -> None:
+    """A few failures are not enough to judge the failure rate."""
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+
+
+def test_stays_closed_below_failure_rate(clock: Clock) -> None:
+    """The breaker only opens once the failure rate reaches the threshold."""
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+
+
+def test_old_outcomes_leave_the_window(clock: Clock) -> None:
+    """Failures older than the window no longer count."""
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 61.0
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_single_probe_when_half_open(clock: Clock) -> None:
+    """After the reset timeout exactly one probe request is let through."""
+    breaker = make_breaker()
+    open_breaker(breaker)
+
+    clock.now = 29.0
+    assert not breaker.allow_request()
+
+    clock.now = 30.0
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes(clock: Clock) -> None:
+    """A successful probe closes the breaker and forgets the old failures."""
+    breaker = make_breaker()
+    open_breaker(breaker)
+    clock.now = 30.0
+    assert breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_failed_probe_reopens(clock: Clock) -> None:
+    """A failed probe opens the breaker for another reset timeout."""
+    breaker = make_breaker()
+    open_breaker(breaker)
+    clock.now = 30.0
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    clock.now = 59.0
+    assert not breaker.allow_request()
+    clock.now = 60.0
+    assert breaker.allow_request()
+
+
+def test_breakers_by_api_id(clock: Clock) -> None:
+    """Only configured dependencies get a breaker."""
+    breakers = CircuitBreakers({"coingecko": {"min_calls": 1}})
+    assert breakers.get("the_graph") is None
+
+    breakers.get("coingecko").record_failure()
+    assert breakers.states() == {"coingecko": STATE_OPEN}
+
+
+def test_degraded_cache(clock: Clock) -> None:
+    """Cached results are served up to their maximum age."""
+    cache = DegradedCache()
+    assert cache.get("price", 60) is None
+
+    cache.put("price", 2000)
+    clock.now = 60.0
+    assert cache.get("price", 60) == 2000
+    clock.now = 61.0
+    assert cache.get("price", 60) is None
+
+
+def test_released_probe_can_be_retried(clock: Clock) -> None:
+    """A probe cut short without an outcome frees the half-open slot for the next request."""
+    breaker = make_breaker()
+    open_breaker(breaker)
+    clock.now = 30.0
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.release_probe()
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_release_probe_outside_half_open(clock: Clock) -> None:
+    """Releasing a probe never closes an open breaker."""
+    breaker = make_breaker()
+    open_breaker(breaker)
+    breaker.release_probe()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Tests for the deadline module."""
+
+from typing import Iterator
+from unittest import mock
+
+import pytest
+
+from packages.aytunc.skills.portfolio_manager_abci import deadline
+from packages.aytunc.skills.portfolio_manager_abci.deadline import Deadline
+
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture(autouse=True)
+def frozen_time() -> Iterator[None]:
+    """Freeze the module's wall clock."""
+    with mock.patch.object(deadline.time, "time", return_value=NOW):
+        yield
+
+
+def test_from_round() -> None:
+    """The deadline keeps the safety margin free before the round times out."""
+    assert Deadline.from_round(NOW - 10, 30, 5).expires_at == NOW + 15
+
+
+def test_remaining_is_never_negative() -> None:
+    """An expired deadline has no time left."""
+    assert Deadline(NOW + 12).remaining() == 12
+    assert Deadline(NOW - 12).remaining() == 0
+
+
+def test_expired() -> None:
+    """The deadline expires once no time is left."""
+    assert not Deadline(NOW + 1).expired()
+    assert Deadline(NOW).expired()
+
+
+@pytest.mark.parametrize(
+    "default, expected",
+    [
+        (None, 8.0),
+        (5.0, 5.0),
+        (20.0, 8.0),
+    ],
+)
+def test_timeout_for(default, expected) -> None:
+    """A call's timeout is cut down to the remaining budget."""
+    assert Deadline(NOW + 8).timeout_for(default) == expected
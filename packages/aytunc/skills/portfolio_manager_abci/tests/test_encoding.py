@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Tests for the encoding module."""
+
+import json
+
+import pytest
+from web3 import Web3
+
+from packages.aytunc.skills.portfolio_manager_abci.encoding import (
+    PORTFOLIO_MANAGER_BUILD_PATH,
+    get_portfolio_manager_encoder,
+)
+
+
+USER = "0x000000000000000000000000000000000000dEaD"
+USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+
+
+@pytest.fixture(scope="module")
+def contract():
+    """A web3 contract object used as the reference encoder."""
+    with open(PORTFOLIO_MANAGER_BUILD_PATH, "r", encoding="utf-8") as build_file:
+        abi = json.load(build_file)["abi"]
+    return Web3().eth.contract(abi=abi)
+
+
+def test_execute_rebalance_matches_web3(contract) -> None:
+    """Swaps given as dicts encode like the web3 tuple encoding."""
+    swap = {
+        "tokenToSell": USDC,
+        "tokenToBuy": WETH,
+        "amountToSell": 123_456_789,
+        "amountOutMin": 0,
+        "poolFee": 3000,
+    }
+    calldata = get_portfolio_manager_encoder().execute_rebalance(USER, [swap])
+    expected = contract.encodeABI("executeRebalance", [USER, [tuple(swap.values())]])
+    assert "0x" + calldata.hex() == expected
+
+
+def test_store_report_hash_matches_web3(contract) -> None:
+    """A report hash call encodes like web3."""
+    ipfs_hash = "bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi"
+    calldata = get_portfolio_manager_encoder().store_report_hash(USER, ipfs_hash)
+    assert "0x" + calldata.hex() == contract.encodeABI("storeReportHash", [USER, ipfs_hash])
+
+
+def test_store_period_report_matches_web3(contract) -> None:
+    """A period report call encodes like web3."""
+    calldata = get_portfolio_manager_encoder().store_period_report("bafydirectory")
+    assert "0x" + calldata.hex() == contract.encodeABI("storePeriodReport", ["bafydirectory"])
+
+
+def test_unknown_function() -> None:
+    """Functions missing from the ABI are rejected."""
+    with pytest.raises(ValueError, match="not found"):
+        get_portfolio_manager_encoder().encode("rugPull", [])
+
+
+def test_wrong_argument_count() -> None:
+    """Calls with the wrong number of arguments are rejected."""
+    with pytest.raises(ValueError, match="expects 1 arguments, got 2"):
+        get_portfolio_manager_encoder().encode("storePeriodReport", ["a", "b"])
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Tests for the fixed_point module."""
+
+import pytest
+
+from packages.aytunc.skills.portfolio_manager_abci.fixed_point import (
+    BPS,
+    USD_DECIMALS,
+    apply_bps,
+    from_fixed,
+    mul_div,
+    percentage_to_bps,
+    rescale,
+    to_fixed,
+    usd_value,
+)
+
+
+@pytest.mark.parametrize(
+    "value, decimals, expected",
+    [
+        (0.1, 8, 10_000_000),
+        ("2500.12345678912", 8, 250_012_345_678),
+        (1, 18, 10**18),
+        (-0.5, 2, -50),
+        ("0.999", 2, 99),
+    ],
+)
+def test_to_fixed(value: object, decimals: int, expected: int) -> None:
+    """Values are scaled exactly and rounded down."""
+    assert to_fixed(value, decimals) == expected
+
+
+@pytest.mark.parametrize("value", ["abc", "nan", "inf", float("inf")])
+def test_to_fixed_invalid(value: object) -> None:
+    """Non-numbers and non-finite values are rejected."""
+    with pytest.raises(ValueError):
+        to_fixed(value, 8)
+
+
+def test_from_fixed() -> None:
+    """Mantissas convert back to floats for display."""
+    assert from_fixed(250_012_345_678, 8) == 2500.12345678
+    assert from_fixed(0, 18) == 0.0
+
+
+def test_rescale() -> None:
+    """Rescaling adds decimals exactly and floors dropped ones."""
+    assert rescale(123, 2, 4) == 12_300
+    assert rescale(12_399, 4, 2) == 123
+    assert rescale(5, 8, 8) == 5
+
+
+def test_mul_div_large_values() -> None:
+    """Products beyond float precision stay exact."""
+    balance = 123_456_789_123_456_789_123
+    assert mul_div(balance, 3, 3) == balance
+
+
+def test_usd_value() -> None:
+    """Token values keep USD_DECIMALS decimals."""
+    price = to_fixed(2500.5, USD_DECIMALS)
+    assert usd_value(3 * 10**18, 18, price) == 750_150_000_000
+    assert usd_value(1_500_000, 6, to_fixed(1.0001, USD_DECIMALS)) == 150_015_000
+
+
+@pytest.mark.parametrize(
+    "percentage, expected",
+    [("3%", 300), ("2.5%", 250), ("10", 1_000), (" 100% ", BPS), ("0.01%", 1)],
+)
+def test_percentage_to_bps(percentage: str, expected: int) -> None:
+    """Percentages parse into basis points."""
+    assert percentage_to_bps(percentage) == expected
+
+
+@pytest.mark.parametrize("percentage", ["-5%", "0%", "0.001%", "100.01%", "150%", "five%", "%"])
+def test_percentage_to_bps_out_of_range(percentage: str) -> None:
+    """Zero, negative, over-100% and malformed percentages raise ValueError."""
+    with pytest.raises(ValueError):
+        percentage_to_bps(percentage)
+
+
+def test_apply_bps() -> None:
+    """Shares are rounded down and never exceed the amount."""
+    assert apply_bps(10**18, 250) == 25 * 10**15
+    assert apply_bps(999, 3_333) == 332
+    assert apply_bps(12_345, BPS) == 12_345
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Tests for the llm_router module."""
+
+import pytest
+
+from packages.aytunc.skills.portfolio_manager_abci.llm_router import (
+    MIN_LATENCY_SAMPLES,
+    LLMRouter,
+    ProviderStats,
+)
+
+
+def test_latency_ewma() -> None:
+    """The first sample seeds the EWMA, later ones are blended in."""
+    stats = ProviderStats(alpha=0.5, window=10)
+    stats.record_success(2.0)
+    assert stats.latency_ewma == 2.0
+    stats.record_success(4.0)
+    assert stats.latency_ewma == 3.0
+
+
+def test_error_rate_ewma() -> None:
+    """Failures raise the error rate, successes decay it."""
+    stats = ProviderStats(alpha=0.5, window=10)
+    stats.record_failure()
+    assert stats.error_rate == 0.5
+    stats.record_failure()
+    assert stats.error_rate == 0.75
+    stats.record_success(1.0)
+    assert stats.error_rate == 0.375
+
+
+def test_p95() -> None:
+    """The p95 needs a few samples and only looks at the recent window."""
+    stats = ProviderStats(alpha=0.2, window=20)
+    for latency in range(1, MIN_LATENCY_SAMPLES):
+        stats.record_success(float(latency))
+    assert stats.p95() is None
+
+    for latency in range(1, 41):
+        stats.record_success(float(latency))
+    # The window holds 21..40, its p95 is the 19th of 20 samples
+    assert stats.p95() == 39.0
+
+
+def test_rank_by_latency() -> None:
+    """Faster providers come first, unmeasured ones before all measured ones."""
+    router = LLMRouter()
+    router.record_success("openai", 3.0)
+    router.record_success("anthropic", 1.0)
+    assert router.rank(["openai", "anthropic", "gemini"]) == ["gemini", "anthropic", "openai"]
+
+
+def test_rank_unhealthy_last() -> None:
+    """A provider above the maximum error rate is only a last resort, however fast."""
+    router = LLMRouter(alpha=0.5, max_error_rate=0.5)
+    router.record_success("openai", 5.0)
+    router.record_success("anthropic", 1.0)
+    for _ in range(2):
+        router.record_failure("anthropic")
+    assert router.rank(["anthropic", "openai"]) == ["openai", "anthropic"]
+
+
+def test_rank_preferred_wins_ties() -> None:
+    """The preferred provider goes first among equals."""
+    router = LLMRouter()
+    assert router.rank(["openai", "anthropic"], preferred="anthropic") == ["anthropic", "openai"]
+
+
+def test_hedge_delay() -> None:
+    """Providers are hedged after their p95, or the default until it is known."""
+    router = LLMRouter(default_hedge_delay=8.0)
+    assert router.hedge_delay("openai") == 8.0
+
+    for _ in range(MIN_LATENCY_SAMPLES):
+        router.record_success("openai", 2.5)
+    assert router.hedge_delay("openai") == pytest.approx(2.5)
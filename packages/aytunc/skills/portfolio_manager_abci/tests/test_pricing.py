@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Tests for the pricing module."""
+
+import math
+
+import pytest
+
+from packages.aytunc.skills.portfolio_manager_abci.fixed_point import USD_DECIMALS
+from packages.aytunc.skills.portfolio_manager_abci.pricing import (
+    chainlink_price,
+    resolve_token_prices,
+    tick_to_price,
+    twap_tick,
+)
+
+
+NOW = 1_700_000_000
+ONE_USD = 10**USD_DECIMALS
+
+USDC_AGGREGATOR = "0xusdc_aggregator"
+ETH_AGGREGATOR = "0xeth_aggregator"
+WETH_POOL = "0xweth_usdc_pool"
+
+# USDC (6 decimals) is token0 and WETH (18 decimals) token1 of the mainnet pool
+WETH_SOURCE = {
+    "pool": WETH_POOL,
+    "quote": "USDC",
+    "base_decimals": 18,
+    "quote_decimals": 6,
+    "base_is_token0": False,
+}
+
+
+def tick_for_price(price: float) -> int:
+    """The pool tick of a WETH price in USDC."""
+    return round(-math.log(price * 10 ** (6 - 18)) / math.log(1.0001))
+
+
+def reading(price: float, decimals: int = 8, age: float = 0) -> dict:
+    """A Chainlink latestRoundData reading."""
+    return {"answer": round(price * 10**decimals), "decimals": decimals, "updated_at": NOW - age}
+
+
+def resolve(readings: dict, **kwargs) -> dict:
+    """Resolve prices for WETH and USDC with test defaults."""
+    params = dict(
+        chainlink_aggregators={"USDC": USDC_AGGREGATOR, "WETH": ETH_AGGREGATOR},
+        uniswap_v3_pools={"WETH": WETH_SOURCE},
+        now=NOW,
+        twap_window=0,
+        max_age=3600,
+        max_deviation=0.02,
+    )
+    params.update(kwargs)
+    return resolve_token_prices(readings, **params)
+
+
+def test_tick_to_price() -> None:
+    """A tick converts to the price of the base token in quote tokens."""
+    assert tick_to_price(tick_for_price(2000), 18, 6, False) == pytest.approx(2000, rel=1e-4)
+    # The same pool priced the other way round
+    assert tick_to_price(tick_for_price(2000), 6, 18, True) == pytest.approx(1 / 2000, rel=1e-4)
+
+
+def test_twap_tick() -> None:
+    """The average tick is the cumulative difference over the window."""
+    assert twap_tick([1_000, 1_000 + 1800 * 200_000], 1800) == 200_000
+
+
+@pytest.mark.parametrize(
+    "chainlink_reading, expected",
+    [
+        (None, None),
+        (reading(0), None),
+        (reading(2000, age=7200), None),
+        (reading(2000), 2000 * ONE_USD),
+        (reading(2000, decimals=18), 2000 * ONE_USD),
+    ],
+)
+def test_chainlink_price(chainlink_reading, expected) -> None:
+    """Missing, non-positive and stale answers are rejected, others rescaled to USD_DECIMALS."""
+    assert chainlink_price(chainlink_reading, NOW, 3600) == expected
+
+
+def test_chainlink_is_primary() -> None:
+    """Chainlink prices are used when the pool agrees within the deviation."""
+    prices = resolve({
+        "aggregators": {USDC_AGGREGATOR: reading(1.0), ETH_AGGREGATOR: reading(2000)},
+        "pools": {WETH_POOL: {"tick": tick_for_price(2010)}},
+    })
+    assert prices == {"USDC": ONE_USD, "WETH": 2000 * ONE_USD}
+
+
+def test_pool_is_the_fallback() -> None:
+    """Without a Chainlink answer the pool price is converted to USD through its quote token."""
+    prices = resolve({
+        "aggregators": {USDC_AGGREGATOR: reading(1.0)},
+        "pools": {WETH_POOL: {"tick": tick_for_price(2000)}},
+    })
+    assert prices["WETH"] == pytest.approx(2000 * ONE_USD, rel=1e-4)
+    assert isinstance(prices["WETH"], int)
+
+
+def test_twap_is_used_when_available() -> None:
+    """The time-weighted tick takes precedence over the spot tick."""
+    window = 1800
+    average = tick_for_price(2000)
+    prices = resolve(
+        {
+            "aggregators": {USDC_AGGREGATOR: reading(1.0)},
+            "pools": {WETH_POOL: {"tick": tick_for_price(3000), "tick_cumulatives": [0, average * window]}},
+        },
+        twap_window=window,
+    )
+    assert prices["WETH"] == pytest.approx(2000 * ONE_USD, rel=1e-4)
+
+
+def test_disagreeing_sources_leave_the_token_unpriced() -> None:
+    """A deviation beyond the limit drops the token so an off-chain source is used."""
+    prices = resolve({
+        "aggregators": {USDC_AGGREGATOR: reading(1.0), ETH_AGGREGATOR: reading(2000)},
+        "pools": {WETH_POOL: {"tick": tick_for_price(2500)}},
+    })
+    assert prices == {"USDC": ONE_USD}
+
+
+def test_pool_without_quote_price() -> None:
+    """A pool cannot price a token when its quote token has no USD price."""
+    prices = resolve({"aggregators": {}, "pools": {WETH_POOL: {"tick": tick_for_price(2000)}}})
+    assert prices == {}
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Tests for the prompts module."""
+
+from typing import Any, Dict, List
+
+from packages.aytunc.skills.portfolio_manager_abci.prompts import (
+    DETAIL_LEVELS,
+    PROMPT_INSTRUCTIONS,
+    batch_token_budget,
+    build_batch_prompt,
+    build_rebalancing_prompt,
+    count_tokens,
+    extract_json,
+    parse_batch_decisions,
+    summarize_token,
+)
+
+
+def day_datas(prices: List[float]) -> List[Dict[str, Any]]:
+    """The Graph tokenDayDatas, newest first."""
+    return [{"priceUSD": str(price), "volumeUSD": str(1_000_000 + 1_000 * index)} for index, price in enumerate(prices)]
+
+
+TOKEN_DATA = {
+    "WETH": day_datas([2512.3, 2480.1, 2450.7, 2533.9, 2601.2, 2577.4, 2490.0, 2466.6]),
+    "USDC": day_datas([1.0001, 0.9999, 1.0, 1.0002, 0.9998, 1.0, 1.0001, 1.0]),
+}
+
+
+def portfolios(count: int) -> Dict[str, Dict[str, Any]]:
+    """Portfolio id to a typical portfolio entry."""
+    return {
+        f"p{index}": {"total_usd": 1_234_567.89 + index, "allocation%": {"USDC": 40.12, "WETH": 59.88}}
+        for index in range(count)
+    }
+
+
+PORTFOLIO = {"total_usd": 1_234_567.89, "allocation%": {"USDC": 40.12, "WETH": 59.88}}
+
+
+def test_stable_token_is_collapsed() -> None:
+    """A token trading in a narrow range is reduced to its price."""
+    assert summarize_token(TOKEN_DATA["USDC"], "daily") == {"price": 1.0, "stable": True}
+
+
+def test_zero_priced_token_is_stable() -> None:
+    """A series with no price at all is flat rather than a division by zero."""
+    assert summarize_token(day_datas([0, 0, 0]), "daily") == {"price": 0.0, "stable": True}
+
+
+def test_summary_levels() -> None:
+    """Lower detail levels drop the daily closes, then the window statistics."""
+    daily = summarize_token(TOKEN_DATA["WETH"], "daily")
+    summary = summarize_token(TOKEN_DATA["WETH"], "summary")
+    minimal = summarize_token(TOKEN_DATA["WETH"], "minimal")
+
+    assert daily["closes"][0] == 2467.0 and daily["closes"][-1] == 2512.0
+    assert "closes" not in summary and summary["high"] == 2601.0 and "chg_7d%" in summary
+    assert set(minimal) == {"price", "chg_1d%", "vol_chg_1d%"}
+    assert summarize_token([], "daily") == {}
+
+
+def test_rebalancing_prompt_uses_most_detail_that_fits() -> None:
+    """The prompt keeps full detail when the budget allows it."""
+    prompt, tokens, level = build_rebalancing_prompt(PORTFOLIO, TOKEN_DATA, 10_000)
+    assert level == DETAIL_LEVELS[0]
+    assert tokens == count_tokens(prompt)
+    assert prompt.endswith(PROMPT_INSTRUCTIONS)
+
+
+def test_rebalancing_prompt_fits_budget() -> None:
+    """A tighter budget compresses the market section until the prompt fits."""
+    _, detailed_tokens, _ = build_rebalancing_prompt(PORTFOLIO, TOKEN_DATA, 10_000)
+    prompt, tokens, level = build_rebalancing_prompt(PORTFOLIO, TOKEN_DATA, detailed_tokens - 1)
+    assert tokens <= detailed_tokens - 1
+    assert level != DETAIL_LEVELS[0]
+    assert '"total_usd":1234567.89' in prompt
+
+
+def test_rebalancing_prompt_over_budget() -> None:
+    """When nothing fits, the most compact prompt is returned with its real size."""
+    _, tokens, level = build_rebalancing_prompt(PORTFOLIO, TOKEN_DATA, 1)
+    assert level == DETAIL_LEVELS[-1]
+    assert tokens > 1
+
+
+def test_batch_token_budget() -> None:
+    """Only portfolios beyond the first add to the budget."""
+    assert batch_token_budget(400, 48, 1) == 400
+    assert batch_token_budget(400, 48, 10) == 832
+    assert batch_token_budget(400, 48, 0) == 400
+
+
+def test_full_batch_fits_scaled_budget() -> None:
+    """A default-sized batch fits the scaled budget, so it is not split into single requests."""
+    _, single_tokens, _ = build_batch_prompt(portfolios(1), TOKEN_DATA, 400)
+    assert single_tokens <= 400
+
+    budget = batch_token_budget(400, 48, 10)
+    prompt, tokens, level = build_batch_prompt(portfolios(10), TOKEN_DATA, budget)
+    assert tokens <= budget
+    assert level in DETAIL_LEVELS
+    assert all(f'"id":"p{index}"' in prompt for index in range(10))
+
+
+def test_batch_prompt_compresses_market_section() -> None:
+    """The market section is compressed before the budget is exceeded."""
+    _, detailed_tokens, detailed_level = build_batch_prompt(portfolios(2), TOKEN_DATA, 10_000)
+    _, tokens, level = build_batch_prompt(portfolios(2), TOKEN_DATA, detailed_tokens - 1)
+    assert detailed_level == DETAIL_LEVELS[0]
+    assert level != DETAIL_LEVELS[0]
+    assert tokens < detailed_tokens
+
+
+def test_extract_json() -> None:
+    """JSON is found inside code fences and prose."""
+    assert extract_json('Sure:\n```json\n{"a": 1}\n```') == {"a": 1}
+    assert extract_json("no json here") is None
+    assert extract_json("{not json}") is None
+
+
+def test_parse_batch_decisions() -> None:
+    """Only well-formed decisions of known ids are kept."""
+    answer = (
+        '{"decisions": ['
+        '{"id": "p0", "action": "swap 3% of weth to usdc", "reason": "r"},'
+        '{"id": "p1", "action": 3, "reason": "r"},'
+        '{"id": "p9", "action": "swap 1% of usdc to weth", "reason": "r"},'
+        '"garbage"]}'
+    )
+    assert parse_batch_decisions(answer, ["p0", "p1"]) == {
+        "p0": {"action": "swap 3% of weth to usdc", "reason": "r"}
+    }
+    assert parse_batch_decisions('{"decisions": {}}', ["p0"]) == {}
+    assert parse_batch_decisions("not json", ["p0"]) == {}
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Tests for the rate_limiting module."""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Iterator
+from unittest import mock
+
+import pytest
+
+from packages.aytunc.skills.portfolio_manager_abci import rate_limiting
+from packages.aytunc.skills.portfolio_manager_abci.rate_limiting import (
+    RateLimiter,
+    TokenBucket,
+    parse_headers,
+    retry_after_seconds,
+)
+
+
+class Clock:
+    """A controllable monotonic clock."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Iterator[Clock]:
+    """Patch the module's monotonic clock."""
+    fake = Clock()
+    with mock.patch.object(rate_limiting.time, "monotonic", fake):
+        yield fake
+
+
+def test_burst_then_throttle(clock: Clock) -> None:
+    """The burst is served immediately, later requests are spaced by the rate."""
+    bucket = TokenBucket(rate=2.0, burst=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_refill(clock: Clock) -> None:
+    """Tokens accrue over time up to the burst."""
+    bucket = TokenBucket(rate=1.0, burst=1)
+    assert bucket.reserve() == 0.0
+    clock.now = 10.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_peek_does_not_consume(clock: Clock) -> None:
+    """Peeking repeatedly leaves the bucket untouched."""
+    bucket = TokenBucket(rate=1.0, burst=1)
+    assert bucket.reserve() == 0.0
+    for _ in range(5):
+        assert bucket.peek() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_abandoned_requests_do_not_delay_later_ones(clock: Clock) -> None:
+    """A caller that gives up after peeking does not charge the bucket."""
+    limiter = RateLimiter({"api": {"rate": 1.0, "burst": 1}})
+    assert limiter.reserve("api") == 0.0
+    assert limiter.peek("api") > 0
+    clock.now = 1.0
+    assert limiter.peek("api") == 0.0
+    assert limiter.reserve("api") == 0.0
+
+
+def test_block(clock: Clock) -> None:
+    """Blocking drains the burst and delays every request until it expires."""
+    bucket = TokenBucket(rate=10.0, burst=5)
+    bucket.block(3.0)
+    assert bucket.peek() == pytest.approx(3.0)
+    assert bucket.reserve() == pytest.approx(3.0)
+    clock.now = 3.0
+    assert bucket.peek() < 1.0
+
+
+def test_unlimited_api() -> None:
+    """APIs without a configured limit are not throttled."""
+    limiter = RateLimiter({})
+    assert limiter.peek("other") == 0.0
+    assert limiter.reserve("other") == 0.0
+    limiter.block("other", 10.0)
+    assert limiter.reserve("other") == 0.0
+
+
+def test_parse_headers() -> None:
+    """Headers are parsed case-insensitively."""
+    assert parse_headers("Retry-After: 5\nX-Other:a:b\ninvalid") == {"retry-after": "5", "x-other": "a:b"}
+
+
+def test_retry_after_seconds() -> None:
+    """Retry-After is read as seconds or as an HTTP date, with a default otherwise."""
+    assert retry_after_seconds("Retry-After: 7", 1.0) == 7.0
+    assert retry_after_seconds("", 1.0) == 1.0
+    assert retry_after_seconds("Retry-After: soon", 2.0) == 2.0
+    date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 50 < retry_after_seconds(f"Retry-After: {date}", 1.0) <= 60
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""Tests for the reports module."""
+
+import json
+
+from packages.aytunc.skills.portfolio_manager_abci.reports import (
+    COLUMNAR_REPORT_VERSION,
+    REPORT_VERSION,
+    ReportSpool,
+    append_report,
+    build_report,
+    history_to_reports,
+    serialize_compact_json,
+)
+
+
+def make_report(timestamp: str, token_values: dict, action: str = "hold") -> dict:
+    """Build a single-period report with the given token values."""
+    return build_report(
+        timestamp=timestamp,
+        token_values=token_values,
+        total_portfolio_value=sum(token_values.values()),
+        action=action,
+        reason="test",
+    )
+
+
+def test_build_report() -> None:
+    """A report holds each token's value and share of the portfolio."""
+    report = make_report("2025-01-01T00:00:00", {"USDC": 750.0, "WETH": 250.0})
+    assert report["version"] == REPORT_VERSION
+    assert report["total_portfolio_value"] == 1000.0
+    assert report["portfolio_status"]["USDC"] == {"value_usd": 750.0, "percentage": 75.0}
+    assert report["rebalancing_recommendation"] == {"action": "hold", "reason": "test"}
+
+
+def test_append_to_empty_history() -> None:
+    """The first report starts a columnar history."""
+    history = append_report(None, make_report("t0", {"USDC": 500.0, "WETH": 500.0}))
+    assert history["version"] == COLUMNAR_REPORT_VERSION
+    assert history["columns"]["timestamp"] == ["t0"]
+    assert history["tokens"]["WETH"]["percentage"] == [50.0]
+
+
+def test_append_seeds_history_with_a_single_report() -> None:
+    """A previous version 1 report becomes the first row of the history."""
+    previous = make_report("t0", {"USDC": 1000.0})
+    history = append_report(previous, make_report("t1", {"USDC": 1000.0}))
+    assert history["columns"]["timestamp"] == ["t0", "t1"]
+
+
+def test_new_tokens_are_back_filled() -> None:
+    """Tokens missing from a period hold nulls for that row."""
+    history = append_report(None, make_report("t0", {"USDC": 1000.0}))
+    history = append_report(history, make_report("t1", {"USDC": 600.0, "WETH": 400.0}))
+    history = append_report(history, make_report("t2", {"WETH": 1000.0}))
+
+    assert history["tokens"]["WETH"]["value_usd"] == [None, 400.0, 1000.0]
+    assert history["tokens"]["USDC"]["value_usd"] == [1000.0, 600.0, None]
+
+
+def test_history_round_trip() -> None:
+    """Expanding a history gives back the appended reports, oldest first."""
+    reports = [
+        make_report("t0", {"USDC": 1000.0}),
+        make_report("t1", {"USDC": 600.0, "WETH": 400.0}, action="swap 40% of USDC to WETH"),
+    ]
+    history = None
+    for report in reports:
+        history = append_report(history, report)
+
+    assert history_to_reports(history) == reports
+
+
+def test_history_values_are_rounded() -> None:
+    """Values and percentages are stored with a bounded number of decimals."""
+    history = append_report(None, make_report("t0", {"USDC": 1 / 3, "WETH": 2 / 3}))
+    assert history["tokens"]["USDC"]["value_usd"] == [0.333333]
+    assert history["tokens"]["USDC"]["percentage"] == [33.3333]
+
+
+def test_serialize_compact_json() -> None:
+    """The IPFS storer writes sorted keys without whitespace."""
+    serialized = serialize_compact_json("report.json", {"b": 1, "a": [1, 2]})
+    assert serialized == {"report.json": '{"a":[1,2],"b":1}'}
+    assert json.loads(serialized["report.json"]) == {"a": [1, 2], "b": 1}
+
+
+def test_spool_returns_reports_oldest_first(tmp_path) -> None:
+    """Pending reports come back in key order, whatever order they were added in."""
+    spool = ReportSpool(str(tmp_path / "spool"))
+    spool.add("0000000002", make_report("t2", {"USDC": 1.0}))
+    spool.add("0000000001", make_report("t1", {"USDC": 1.0}))
+
+    pending = spool.pending()
+    assert [path.name for path, _ in pending] == ["0000000001.json", "0000000002.json"]
+    assert pending[0][1]["timestamp"] == "t1"
+
+
+def test_spool_replaces_a_key(tmp_path) -> None:
+    """Spooling the same period twice keeps only the latest report."""
+    spool = ReportSpool(str(tmp_path))
+    spool.add("0000000001", make_report("t1", {"USDC": 1.0}))
+    spool.add("0000000001", make_report("t1", {"USDC": 2.0}))
+
+    pending = spool.pending()
+    assert len(pending) == 1
+    assert pending[0][1]["total_portfolio_value"] == 2.0
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_spool_remove(tmp_path) -> None:
+    """Uploaded reports leave the spool, removing twice is harmless."""
+    spool = ReportSpool(str(tmp_path))
+    path = spool.add("0000000001", make_report("t1", {"USDC": 1.0}))
+
+    spool.remove(path)
+    spool.remove(path)
+    assert spool.pending() == []
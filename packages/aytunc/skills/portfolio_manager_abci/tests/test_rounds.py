@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2025 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Tests for the rounds of the skill."""
+
+# pylint: skip-file
+
+import json
+from typing import Any, Dict, List, Optional
+from unittest.mock import MagicMock
+
+from packages.valory.skills.abstract_round_abci.base import AbstractRound
+from packages.valory.skills.abstract_round_abci.test_tools.rounds import (
+    BaseRoundTestClass,
+)
+
+from packages.aytunc.skills.portfolio_manager_abci.aggregation import AGGREGATION_MEDIAN
+from packages.aytunc.skills.portfolio_manager_abci.payloads import (
+    BlockAnchorPayload,
+    DataPullPayload,
+    DecisionMakingPayload,
+)
+from packages.aytunc.skills.portfolio_manager_abci.rounds import (
+    BlockAnchorRound,
+    DataPullRound,
+    DecisionMakingRound,
+    Event,
+    SynchronizedData,
+)
+
+
+def get_context(**params: Any) -> MagicMock:
+    """A skill context with the given params."""
+    context = MagicMock()
+    for name, value in params.items():
+        setattr(context.params, name, value)
+    return context
+
+
+class BaseRoundTest(BaseRoundTestClass):
+    """Base class of the round tests, four agents with a consensus threshold of three."""
+
+    _synchronized_data_class = SynchronizedData
+    _event_class = Event
+
+    def process(self, round_obj: AbstractRound, payloads: List[Any]) -> Optional[Any]:
+        """Process the payloads one by one, returning the first result of end_block."""
+        for payload in payloads:
+            round_obj.process_payload(payload)
+            result = round_obj.end_block()
+            if result is not None:
+                return result
+        return None
+
+
+class TestBlockAnchorRound(BaseRoundTest):
+    """Tests for BlockAnchorRound."""
+
+    def payloads(self, blocks: List[Optional[int]]) -> List[BlockAnchorPayload]:
+        """One block proposal per participant."""
+        return [
+            BlockAnchorPayload(sender=sender, block_number=block)
+            for sender, block in zip(sorted(self.participants), blocks)
+        ]
+
+    def make_round(self) -> BlockAnchorRound:
+        """A BlockAnchorRound."""
+        return BlockAnchorRound(synchronized_data=self.synchronized_data, context=MagicMock())
+
+    def test_identical_proposals(self) -> None:
+        """Agents agreeing on the anchor all send the same block, which is accepted."""
+        round_obj = self.make_round()
+        result = self.process(round_obj, self.payloads([100] * 4))
+
+        assert result is not None
+        synchronized_data, event = result
+        assert event == Event.DONE
+        assert len(round_obj.collection) == 3
+        assert SynchronizedData(synchronized_data.db).anchor_block == 100
+
+    def test_lagging_node(self) -> None:
+        """The lower median of differing proposals is committed."""
+        round_obj = self.make_round()
+        result = self.process(round_obj, self.payloads([101, 100, 102, 103]))
+
+        assert result is not None
+        synchronized_data, event = result
+        assert event == Event.DONE
+        assert SynchronizedData(synchronized_data.db).anchor_block == 101
+
+    def test_no_block_numbers(self) -> None:
+        """None is committed when enough agents could not read a block number."""
+        round_obj = self.make_round()
+        result = self.process(round_obj, self.payloads([None] * 4))
+
+        assert result is not None
+        synchronized_data, event = result
+        assert event == Event.DONE
+        assert SynchronizedData(synchronized_data.db).anchor_block is None
+
+    def test_no_majority(self) -> None:
+        """No majority once every agent voted and neither blocks nor failures reach the threshold."""
+        round_obj = self.make_round()
+        result = self.process(round_obj, self.payloads([100, None, 101, None]))
+
+        assert result is not None
+        _, event = result
+        assert event == Event.NO_MAJORITY
+
+
+class TestDataPullRound(BaseRoundTest):
+    """Tests for DataPullRound."""
+
+    def make_round(self, tolerance: float = 0.01) -> DataPullRound:
+        """A DataPullRound with the given tolerance."""
+        return DataPullRound(
+            synchronized_data=self.synchronized_data,
+            context=get_context(data_pull_tolerance=tolerance, data_pull_aggregation=AGGREGATION_MEDIAN),
+        )
+
+    def payloads(self, token_values: List[Optional[Dict[str, int]]]) -> List[DataPullPayload]:
+        """One DataPull payload per participant."""
+        return [
+            DataPullPayload(
+                sender=sender,
+                token_values=json.dumps(values, sort_keys=True) if values is not None else None,
+                total_portfolio_value=sum(values.values()) if values is not None else None,
+            )
+            for sender, values in zip(sorted(self.participants), token_values)
+        ]
+
+    def test_identical_values(self) -> None:
+        """Agents reading the same block send identical payloads, which are all accepted."""
+        round_obj = self.make_round()
+        values = {"USDC": 100, "WETH": 250}
+        result = self.process(round_obj, self.payloads([values] * 4))
+
+        assert result is not None
+        synchronized_data, event = result
+        assert event == Event.DONE
+        assert len(round_obj.collection) == 3
+        synchronized_data = SynchronizedData(synchronized_data.db)
+        assert json.loads(synchronized_data.token_values) == values
+        assert synchronized_data.total_portfolio_value == 350
+
+    def test_values_within_tolerance(self) -> None:
+        """Observations within the tolerance are aggregated with the median."""
+        round_obj = self.make_round(tolerance=0.01)
+        result = self.process(
+            round_obj, self.payloads([{"WETH": 1000}, {"WETH": 1005}, {"WETH": 1002}, {"WETH": 1001}])
+        )
+
+        assert result is not None
+        synchronized_data, event = result
+        assert event == Event.DONE
+        assert json.loads(SynchronizedData(synchronized_data.db).token_values) == {"WETH": 1002}
+
+    def test_waits_for_agreeing_majority(self) -> None:
+        """An outlier delays the decision until enough agents agree."""
+        round_obj = self.make_round(tolerance=0.01)
+        payloads = self.payloads([{"WETH": 1000}, {"WETH": 2000}, {"WETH": 1000}, {"WETH": 1000}])
+        for payload in payloads[:3]:
+            round_obj.process_payload(payload)
+            assert round_obj.end_block() is None
+
+        round_obj.process_payload(payloads[3])
+        result = round_obj.end_block()
+        assert result is not None
+        synchronized_data, event = result
+        assert event == Event.DONE
+        assert json.loads(SynchronizedData(synchronized_data.db).token_values) == {"WETH": 1000}
+
+    def test_no_majority(self) -> None:
+        """No majority is declared once every agent voted without agreement."""
+        round_obj = self.make_round(tolerance=0.01)
+        result = self.process(
+            round_obj, self.payloads([{"WETH": 1000}, {"WETH": 2000}, {"WETH": 3000}, {"WETH": 4000}])
+        )
+
+        assert result is not None
+        _, event = result
+        assert event == Event.NO_MAJORITY
+
+    def test_failed_pulls_commit_none(self) -> None:
+        """Identical None payloads are accepted and commit empty data."""
+        round_obj = self.make_round()
+        result = self.process(round_obj, self.payloads([None] * 4))
+
+        assert result is not None
+        synchronized_data, event = result
+        assert event == Event.DONE
+        synchronized_data = SynchronizedData(synchronized_data.db)
+        assert synchronized_data.token_values is None
+        assert synchronized_data.total_portfolio_value is None
+
+
+class TestDecisionMakingRound(BaseRoundTest):
+    """Tests for DecisionMakingRound."""
+
+    DECISION = json.dumps({"action": "swap 10% of USDC to WETH"})
+
+    def make_round(self) -> DecisionMakingRound:
+        """A DecisionMakingRound."""
+        return DecisionMakingRound(synchronized_data=self.synchronized_data, context=MagicMock())
+
+    def payloads(self, decisions: List[str], uploaded: List[Optional[Dict[str, str]]]) -> List[DecisionMakingPayload]:
+        """One decision per participant, each with the report hashes its agent uploaded."""
+        return [
+            DecisionMakingPayload(
+                sender=sender,
+                event=Event.TRANSACT.value,
+                adjustment_balances=decision,
+                ipfs_hash=None,
+                uploaded_report_hashes=json.dumps(hashes, sort_keys=True) if hashes else None,
+            )
+            for sender, decision, hashes in zip(sorted(self.participants), decisions, uploaded)
+        ]
+
+    def test_hashes_sent_by_the_threshold_are_committed(self) -> None:
+        """Differing uploads do not split the decision; only hashes enough agents sent are committed."""
+        round_obj = self.make_round()
+        uploaded = [
+            {"0000000005": "QmReport5", "0000000004": "QmReport4"},
+            {"0000000005": "QmReport5"},
+            {"0000000005": "QmReport5"},
+            None,
+        ]
+        result = self.process(round_obj, self.payloads([self.DECISION] * 4, uploaded))
+
+        assert result is not None
+        synchronized_data, event = result
+        assert event == Event.TRANSACT
+        synchronized_data = SynchronizedData(synchronized_data.db)
+        assert synchronized_data.adjustment_balances == self.DECISION
+        assert json.loads(synchronized_data.uploaded_report_hashes) == {"0000000005": "QmReport5"}
+
+    def test_no_hashes_without_threshold(self) -> None:
+        """Nothing is committed when no hash was sent by enough agents."""
+        round_obj = self.make_round()
+        uploaded = [{"0000000005": "QmReport5"}, None, None, None]
+        result = self.process(round_obj, self.payloads([self.DECISION] * 4, uploaded))
+
+        assert result is not None
+        synchronized_data, event = result
+        assert event == Event.TRANSACT
+        assert SynchronizedData(synchronized_data.db).uploaded_report_hashes is None
+
+    def test_no_majority_ignores_uploaded_hashes(self) -> None:
+        """Only differing decisions, not differing uploads, make a majority impossible."""
+        round_obj = self.make_round()
+        decisions = [self.DECISION, json.dumps({"action": "hold"}), self.DECISION, json.dumps({"action": "swap"})]
+        uploaded = [{"0000000005": "QmReport5"}, None, {"0000000005": "QmOther"}, None]
+        payloads = self.payloads(decisions, uploaded)
+
+        for payload in payloads[:3]:
+            round_obj.process_payload(payload)
+            assert round_obj.end_block() is None
+
+        round_obj.process_payload(payloads[3])
+        result = round_obj.end_block()
+        assert result is not None
+        _, event = result
+        assert event == Event.NO_MAJORITY
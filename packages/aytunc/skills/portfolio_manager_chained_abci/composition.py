@@ -18,12 +18,12 @@ from packages.valory.skills.termination_abci.rounds import (
 
 
 abci_app_transition_mapping: AbciAppTransitionMapping = {
-    RegistrationAbci.FinishedRegistrationRound: PortfolioManagerAbci.DataPullRound,
+    RegistrationAbci.FinishedRegistrationRound: PortfolioManagerAbci.BlockAnchorRound,
     PortfolioManagerAbci.FinishedDecisionMakingRound: ResetAndPauseAbci.ResetAndPauseRound,
     PortfolioManagerAbci.FinishedTxPreparationRound: TxSettlementAbci.RandomnessTransactionSubmissionRound,
     TxSettlementAbci.FinishedTransactionSubmissionRound: ResetAndPauseAbci.ResetAndPauseRound,
     TxSettlementAbci.FailedRound: TxSettlementAbci.RandomnessTransactionSubmissionRound,
-    ResetAndPauseAbci.FinishedResetAndPauseRound: PortfolioManagerAbci.DataPullRound,
+    ResetAndPauseAbci.FinishedResetAndPauseRound: PortfolioManagerAbci.BlockAnchorRound,
     ResetAndPauseAbci.FinishedResetAndPauseErrorRound: RegistrationAbci.RegistrationRound,
 }
 
@@ -8,6 +8,10 @@ import '@uniswap/v3-periphery/contracts/interfaces/ISwapRouter.sol';
 // 0xE592427A0AEce92De3Edee1F18E0157C05861564 swap router
 // 0x35c72A4ebcbEa3E90F3885493FB54FB896B56689 safe
 
+interface IERC20Permit {
+    function permit(address owner, address spender, uint256 value, uint256 deadline, uint8 v, bytes32 r, bytes32 s) external;
+}
+
 contract AgenticEthereumPortfolioManager {
     struct SwapParams {
         address tokenToSell;
@@ -29,6 +33,13 @@ contract AgenticEthereumPortfolioManager {
     ISwapRouter public immutable swapRouter; // Uniswap V3 Router
     
     mapping(address => UserPortfolio) public portfolios; // Mapping of user portfolios
+    string[] public periodReports;                       // One IPFS report directory per period, covering all users
+
+    event Deposited(address indexed user, address indexed token, uint256 amount);
+    event Withdrawn(address indexed user, address indexed token, uint256 amount);
+    event Swapped(address indexed user, address indexed tokenSold, address indexed tokenBought, uint256 amountSold, uint256 amountBought);
+    event ReportHashStored(address indexed user, string ipfsHash);
+    event PeriodReportStored(uint256 indexed period, string ipfsDirectory);
 
     constructor(address _safeAddress, ISwapRouter _swapRouter) {
         safeAddress = _safeAddress;
@@ -41,14 +52,32 @@ contract AgenticEthereumPortfolioManager {
     }
 
     function deposit(address token, uint256 amount) external {
+        _deposit(msg.sender, token, amount);
+    }
+
+    function depositWithPermit(
+        address token,
+        uint256 amount,
+        uint256 deadline,
+        uint8 v,
+        bytes32 r,
+        bytes32 s
+    ) external {
+        // EIP-2612: approval and deposit in one transaction. A failed permit (e.g. front-run with the
+        // same signature) is ignored, the transfer below still requires a sufficient allowance.
+        try IERC20Permit(token).permit(msg.sender, address(this), amount, deadline, v, r, s) {} catch {}
+        _deposit(msg.sender, token, amount);
+    }
+
+    function _deposit(address user, address token, uint256 amount) internal {
         require(amount > 0, "Amount must be > 0");
-        UserPortfolio storage portfolio = portfolios[msg.sender];
+        UserPortfolio storage portfolio = portfolios[user];
 
         if (!portfolio.registered) {
             portfolio.registered = true;
         }
 
-        TransferHelper.safeTransferFrom(token, msg.sender, address(this), amount);
+        TransferHelper.safeTransferFrom(token, user, address(this), amount);
 
         if (!portfolio.tokenExists[token]) {
             portfolio.tokens.push(token);
@@ -56,6 +85,7 @@ contract AgenticEthereumPortfolioManager {
         }
 
         portfolio.balances[token] += amount;
+        emit Deposited(user, token, amount);
     }
 
     function withdraw(address token, uint256 amount) external {
@@ -66,6 +96,7 @@ contract AgenticEthereumPortfolioManager {
 
         portfolio.balances[token] -= amount;
         TransferHelper.safeTransfer(token, msg.sender, amount);
+        emit Withdrawn(msg.sender, token, amount);
     }
 
     function checkAllowance(address token, address user) external view returns (uint256) {
@@ -113,6 +144,7 @@ contract AgenticEthereumPortfolioManager {
             portfolio.tokenExists[params.tokenToBuy] = true;
         }
         portfolio.balances[params.tokenToBuy] += amountOut;
+        emit Swapped(user, params.tokenToSell, params.tokenToBuy, params.amountToSell, amountOut);
     }
 
     function storeReportHash(address user, string calldata ipfsHash) external onlySafe {
@@ -128,10 +160,34 @@ contract AgenticEthereumPortfolioManager {
         }
 
         portfolio.ipfsReports.push(ipfsHash);
+        emit ReportHashStored(user, ipfsHash);
     }
 
     function getIpfsReports(address user) external view returns (string[] memory) {
         require(portfolios[user].registered, "User not registered");
         return portfolios[user].ipfsReports;
     }
+
+    function storePeriodReport(string calldata ipfsDirectory) external onlySafe {
+        // The directory holds an index.json plus one <user>.json report per rebalanced portfolio
+        periodReports.push(ipfsDirectory);
+        emit PeriodReportStored(periodReports.length - 1, ipfsDirectory);
+    }
+
+    function getPeriodReportCount() external view returns (uint256) {
+        return periodReports.length;
+    }
+
+    function getPeriodReports(uint256 offset, uint256 limit) external view returns (string[] memory) {
+        uint256 total = periodReports.length;
+        if (offset >= total) {
+            return new string[](0);
+        }
+        uint256 end = offset + limit > total ? total : offset + limit;
+        string[] memory page = new string[](end - offset);
+        for (uint256 i = offset; i < end; i++) {
+            page[i - offset] = periodReports[i];
+        }
+        return page;
+    }
 }
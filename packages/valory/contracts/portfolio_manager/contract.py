@@ -1,12 +1,60 @@
-from typing import List
+from typing import Dict, List, Optional
 from aea.common import JSONLike
 from aea.configurations.base import PublicId
 from aea.contracts.base import Contract
 from aea.crypto.base import LedgerApi
 from aea_ledger_ethereum import EthereumApi
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector
 
 PUBLIC_ID = PublicId.from_str("valory/portfolio_manager:0.1.0")
 
+# Canonical Multicall3 deployment, same address on every EVM chain
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+    {
+        "inputs": [],
+        "name": "getBlockNumber",
+        "outputs": [{"name": "blockNumber", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+]
+
+# Uniswap V3 pool: slot0() and observe(uint32[])
+UNISWAP_V3_SLOT0_TYPES = ["uint160", "int24", "uint16", "uint16", "uint16", "uint8", "bool"]
+UNISWAP_V3_OBSERVE_TYPES = ["int56[]", "uint160[]"]
+
+# Chainlink aggregator: latestRoundData() and decimals()
+CHAINLINK_LATEST_ROUND_TYPES = ["uint80", "int256", "uint256", "uint256", "uint80"]
+
 class PORTFOLIOMANAGER(Contract):
     """Wrapper class for interacting with the Portfolio Manager contract."""
 
@@ -37,6 +85,41 @@ class PORTFOLIOMANAGER(Contract):
         })
         return transaction
 
+    @classmethod
+    def deposit_with_permit(
+        cls,
+        ledger_api: EthereumApi,
+        contract_address: str,
+        token: str,
+        amount: int,
+        deadline: int,
+        v: int,
+        r: bytes,
+        s: bytes,
+        from_address: str,
+    ) -> JSONLike:
+        """
+        Approve via an EIP-2612 permit signature and deposit tokens in one transaction.
+
+        :param ledger_api: Ethereum API instance for contract interaction.
+        :param contract_address: Address of the deployed contract.
+        :param token: Token address to deposit, must implement EIP-2612.
+        :param amount: Amount of tokens to deposit.
+        :param deadline: Expiry timestamp of the permit signature.
+        :param v: Recovery id of the permit signature.
+        :param r: First 32 bytes of the permit signature.
+        :param s: Second 32 bytes of the permit signature.
+        :param from_address: Address initiating the transaction, the permit signer.
+        :return: Transaction dictionary.
+        """
+        contract_instance = cls.get_instance(ledger_api, contract_address)
+        transaction = contract_instance.functions.depositWithPermit(
+            token, amount, deadline, v, r, s
+        ).build_transaction({
+            "from": from_address
+        })
+        return transaction
+
     @classmethod
     def withdraw(
         cls,
@@ -115,6 +198,7 @@ class PORTFOLIOMANAGER(Contract):
         contract_address: str,
         user: str,
         tokens: List[str],
+        block_identifier: Optional[int] = None,
     ) -> JSONLike:
         """
         Get balances for multiple tokens for a user.
@@ -123,10 +207,11 @@ class PORTFOLIOMANAGER(Contract):
         :param contract_address: Address of the deployed contract.
         :param user: User address to check balances for.
         :param tokens: List of token addresses to check balances for.
+        :param block_identifier: Block to read at, latest if not given.
         :return: Dictionary containing the token balances.
         """
         contract_instance = cls.get_instance(ledger_api, contract_address)
-        balances = contract_instance.functions.getUserBalances(user, tokens).call()
+        balances = contract_instance.functions.getUserBalances(user, tokens).call(block_identifier=block_identifier)
         return {"balances": balances}
 
     @classmethod
@@ -213,10 +298,178 @@ class PORTFOLIOMANAGER(Contract):
         ledger_api: EthereumApi,
         contract_address: str,
         user: str,
+        block_identifier: Optional[int] = None,
+    ) -> JSONLike:
+        """
+        Get the array of IPFS report hashes for a user, at `block_identifier` if given.
+        """
+        contract_instance = cls.get_instance(ledger_api, contract_address)
+        reports = contract_instance.functions.getIpfsReports(user).call(block_identifier=block_identifier)
+        return {"reports": reports}
+
+    @classmethod
+    def store_period_report(
+        cls,
+        ledger_api: EthereumApi,
+        contract_address: str,
+        ipfs_directory: str,
+        from_address: str,
+    ) -> JSONLike:
+        """
+        Store one IPFS report directory covering every user rebalanced in a period. Only callable by the safeAddress.
+
+        The directory contains an `index.json` and one `<user>.json` report per portfolio,
+        so a single write replaces one `storeReportHash` call per user.
+
+        :param ledger_api: Ethereum API instance for contract interaction.
+        :param contract_address: Address of the deployed contract.
+        :param ipfs_directory: IPFS hash of the period report directory.
+        :param from_address: Address initiating the transaction (should be the safe).
+        :return: Transaction dictionary.
+        """
+        contract_instance = cls.get_instance(ledger_api, contract_address)
+        transaction = contract_instance.functions.storePeriodReport(ipfs_directory).build_transaction({
+            "from": from_address
+        })
+        return transaction
+
+    @classmethod
+    def get_period_reports(
+        cls,
+        ledger_api: EthereumApi,
+        contract_address: str,
+        offset: int,
+        limit: int,
+    ) -> JSONLike:
+        """
+        Get a page of period report directories, oldest first.
+
+        :param ledger_api: Ethereum API instance for contract interaction.
+        :param contract_address: Address of the deployed contract.
+        :param offset: Index of the first period to return.
+        :param limit: Maximum number of periods to return.
+        :return: Dictionary containing the period report directories and the total count.
+        """
+        contract_instance = cls.get_instance(ledger_api, contract_address)
+        reports = contract_instance.functions.getPeriodReports(offset, limit).call()
+        count = contract_instance.functions.getPeriodReportCount().call()
+        return {"reports": reports, "count": count}
+
+    @classmethod
+    def get_latest_period_report(
+        cls,
+        ledger_api: EthereumApi,
+        contract_address: str,
+        block_identifier: Optional[int] = None,
+    ) -> JSONLike:
+        """
+        Get the most recent period report directory.
+
+        :param ledger_api: Ethereum API instance for contract interaction.
+        :param contract_address: Address of the deployed contract.
+        :param block_identifier: Block to read at, latest if not given.
+        :return: Dictionary containing the latest period report directory, or None if no period was committed.
+        """
+        contract_instance = cls.get_instance(ledger_api, contract_address)
+        count = contract_instance.functions.getPeriodReportCount().call(block_identifier=block_identifier)
+        report = (
+            contract_instance.functions.periodReports(count - 1).call(block_identifier=block_identifier)
+            if count
+            else None
+        )
+        return {"report": report}
+
+    @classmethod
+    def get_balances_and_prices(
+        cls,
+        ledger_api: EthereumApi,
+        contract_address: str,
+        user: str,
+        tokens: List[str],
+        pools: Optional[List[str]] = None,
+        aggregators: Optional[List[str]] = None,
+        twap_window: int = 0,
+        multicall_address: str = MULTICALL3_ADDRESS,
+        block_identifier: Optional[int] = None,
     ) -> JSONLike:
         """
-        Get the array of IPFS report hashes for a user.
+        Read a user's balances and on-chain price sources in one Multicall3 call.
+
+        Every read shares the same block. Failed price reads are returned as None so the
+        caller can fall back to another source.
+
+        :param ledger_api: Ethereum API instance for contract interaction.
+        :param contract_address: Address of the deployed contract.
+        :param user: User address to check balances for.
+        :param tokens: List of token addresses to check balances for.
+        :param pools: Uniswap V3 pool addresses to read slot0 (and observe, with twap_window) from.
+        :param aggregators: Chainlink aggregator addresses to read latestRoundData and decimals from.
+        :param twap_window: TWAP window in seconds, 0 to read only the spot price.
+        :param multicall_address: Address of the Multicall3 contract.
+        :param block_identifier: Block to read at, latest if not given.
+        :return: Dictionary with the balances, pool and aggregator readings and the block number.
         """
+        pools = pools or []
+        aggregators = aggregators or []
         contract_instance = cls.get_instance(ledger_api, contract_address)
-        reports = contract_instance.functions.getIpfsReports(user).call()
-        return {"reports": reports}
\ No newline at end of file
+        multicall = ledger_api.api.eth.contract(
+            address=ledger_api.api.to_checksum_address(multicall_address), abi=MULTICALL3_ABI
+        )
+
+        def selector(signature: str) -> bytes:
+            return function_signature_to_4byte_selector(signature)
+
+        calls = [
+            (multicall.address, False, multicall.encodeABI("getBlockNumber", [])),
+            (contract_instance.address, False, contract_instance.encodeABI("getUserBalances", [user, tokens])),
+        ]
+        for pool in pools:
+            pool = ledger_api.api.to_checksum_address(pool)
+            calls.append((pool, True, selector("slot0()")))
+            if twap_window:
+                calls.append((pool, True, selector("observe(uint32[])") + encode(["uint32[]"], [[twap_window, 0]])))
+        for aggregator in aggregators:
+            aggregator = ledger_api.api.to_checksum_address(aggregator)
+            calls.append((aggregator, True, selector("latestRoundData()")))
+            calls.append((aggregator, True, selector("decimals()")))
+
+        results = iter(multicall.functions.aggregate3(calls).call(block_identifier=block_identifier))
+
+        def next_result(types: List[str]) -> Optional[tuple]:
+            success, data = next(results)
+            if not success or not data:
+                return None
+            try:
+                return decode(types, data)
+            except Exception:  # pylint: disable=broad-except
+                return None
+
+        block_number = next_result(["uint256"])[0]
+        balances = next_result(["uint256[]"])[0]
+
+        pool_readings: Dict[str, Optional[dict]] = {}
+        for pool in pools:
+            slot0 = next_result(UNISWAP_V3_SLOT0_TYPES)
+            observation = next_result(UNISWAP_V3_OBSERVE_TYPES) if twap_window else None
+            pool_readings[pool] = None if slot0 is None else {
+                "sqrt_price_x96": slot0[0],
+                "tick": slot0[1],
+                "tick_cumulatives": list(observation[0]) if observation else None,
+            }
+
+        aggregator_readings: Dict[str, Optional[dict]] = {}
+        for aggregator in aggregators:
+            round_data = next_result(CHAINLINK_LATEST_ROUND_TYPES)
+            decimals = next_result(["uint8"])
+            aggregator_readings[aggregator] = None if round_data is None or decimals is None else {
+                "answer": round_data[1],
+                "updated_at": round_data[3],
+                "decimals": decimals[0],
+            }
+
+        return {
+            "balances": list(balances),
+            "pools": pool_readings,
+            "aggregators": aggregator_readings,
+            "block_number": block_number,
+        }
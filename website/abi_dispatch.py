@@ -0,0 +1,84 @@
+from typing import Any, Dict, List
+import re
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+VIEW_MUTABILITIES = ('view', 'pure')
+WRITE_MUTABILITIES = ('nonpayable', 'payable')
+
+ARRAY_TYPE = re.compile(r'^(.*)\[(\d*)\]$')
+
+
+def function_abis(abi: List[dict], mutabilities) -> Dict[str, dict]:
+    """Map function name to ABI entry for the functions of the given state mutabilities."""
+    return {
+        entry['name']: entry
+        for entry in abi
+        if entry.get('type') == 'function' and entry.get('stateMutability') in mutabilities
+    }
+
+
+def coerce_value(abi_input: dict, value: Any) -> Any:
+    """Convert a JSON value to the Python type web3 expects for an ABI input."""
+    abi_type = abi_input['type']
+
+    array = ARRAY_TYPE.match(abi_type)
+    if array:
+        if not isinstance(value, list):
+            raise ValueError(f"Expected a list for {abi_type}")
+        if array.group(2) and len(value) != int(array.group(2)):
+            raise ValueError(f"Expected {array.group(2)} items for {abi_type}")
+        item_input = {**abi_input, 'type': array.group(1)}
+        return [coerce_value(item_input, item) for item in value]
+
+    if abi_type == 'tuple':
+        components = abi_input['components']
+        if isinstance(value, dict):
+            value = [value[component['name']] for component in components]
+        if len(value) != len(components):
+            raise ValueError(f"Expected {len(components)} fields for {abi_input.get('name') or 'tuple'}")
+        return tuple(coerce_value(component, item) for component, item in zip(components, value))
+
+    if abi_type == 'address':
+        return Web3.to_checksum_address(value)
+
+    if abi_type.startswith(('uint', 'int')):
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(f"Expected an integer for {abi_type}")
+        # Large amounts arrive as decimal or hex strings, JSON numbers lose precision
+        return int(value, 0) if isinstance(value, str) else value
+
+    if abi_type == 'bool':
+        if isinstance(value, str):
+            if value.lower() not in ('true', 'false'):
+                raise ValueError("Expected true or false for bool")
+            return value.lower() == 'true'
+        return bool(value)
+
+    if abi_type.startswith('bytes'):
+        return HexBytes(value)
+
+    if abi_type == 'string':
+        return str(value)
+
+    raise ValueError(f"Unsupported ABI type {abi_type}")
+
+
+def coerce_args(function_abi: dict, args: List[Any]) -> List[Any]:
+    """Validate and convert positional JSON arguments against a function's ABI inputs."""
+    inputs = function_abi.get('inputs', [])
+    if len(args) != len(inputs):
+        raise ValueError(f"{function_abi['name']} expects {len(inputs)} arguments, got {len(args)}")
+    return [coerce_value(abi_input, arg) for abi_input, arg in zip(inputs, args)]
+
+
+def to_json(value: Any) -> Any:
+    """Convert a decoded contract result to JSON-serializable values."""
+    if isinstance(value, (bytes, bytearray)):
+        return HexBytes(value).hex()
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    return value
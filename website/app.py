@@ -1,10 +1,30 @@
 from flask import Flask, render_template, jsonify, request
-from blockchain import BlockchainManager
+from blockchain import BlockchainManager, load_abi
+from abi_dispatch import to_json
+from deposits import (
+    MULTISEND_CALL_ONLY_ADDRESS,
+    PERMIT_TTL,
+    SAFE_DELEGATECALL_OPERATION,
+    build_permit_typed_data,
+    encode_multisend,
+    split_signature
+)
+from ipfs_reports import (
+    MAX_PERIOD_REPORTS,
+    ReportFetcher,
+    build_report_sources,
+    collect_reports,
+    paginate
+)
+from price_service import PriceService
+from indexer import DEFAULT_INDEX_DB, IndexStore
+from tx_manager import DEFAULT_NONCE_DB
+import json
 import os
+import time
 from dotenv import load_dotenv
 from decimal import Decimal
 from web3 import Web3
-import requests
 
 load_dotenv()  # Load environment variables
 
@@ -14,8 +34,24 @@ app = Flask(__name__)
 USDC_DECIMALS = 6
 WETH_DECIMALS = 18
 
+# Maximum number of calls accepted by the batch read endpoint
+MAX_BATCH_READS = 50
+
+# Tokens implementing EIP-2612 permits, USDC by default
+PERMIT_TOKENS = [
+    address.strip().lower()
+    for address in os.getenv('PERMIT_TOKENS', os.getenv('USDC_ADDRESS', '')).split(',') if address.strip()
+]
+PERMIT_ABI = load_abi('IERC20Permit.json')
+
 # Initialize blockchain connection
-blockchain = BlockchainManager(os.getenv('RPC_URL'))
+blockchain = BlockchainManager(
+    os.getenv('RPC_URL'),
+    timeout=float(os.getenv('RPC_TIMEOUT', '10')),
+    max_retries=int(os.getenv('RPC_MAX_RETRIES', '3')),
+    block_poll_interval=float(os.getenv('BLOCK_POLL_INTERVAL', '2')),
+    nonce_db=os.getenv('NONCE_DB', DEFAULT_NONCE_DB)
+)
 
 # Load Portfolio Manager contract
 blockchain.load_contract(
@@ -31,19 +67,89 @@ blockchain.load_contract(
     'IERC20.json'
 )
 
+# Shared, cached CoinMarketCap price service
+price_service = PriceService(
+    os.getenv('COINMARKETCAP_API_KEY'),
+    ttl=float(os.getenv('PRICE_CACHE_TTL', '60')),
+    stale_ttl=float(os.getenv('PRICE_STALE_TTL', '600'))
+)
+
+# Concurrent IPFS report fetcher with an on-disk cache
+report_fetcher = ReportFetcher(
+    gateways=os.getenv('IPFS_GATEWAYS', 'https://gateway.autonolas.tech').split(','),
+    cache_dir=os.getenv('IPFS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ipfs_cache')),
+    max_workers=int(os.getenv('IPFS_FETCH_WORKERS', '16'))
+)
+
+# Read-only view of the event index written by indexer.py
+index_store = IndexStore(os.getenv('INDEX_DB', DEFAULT_INDEX_DB))
+
+def warmup():
+    """Prime the RPC connection, contracts and price cache of this worker."""
+    chain_id = blockchain.warmup()
+    try:
+        price_service.get_prices(('ETH', 'USDC'))
+    except Exception as e:  # Prices are refreshed on demand, a cold cache only costs the first request
+        print(f"Price warmup failed: {str(e)}")
+    print(f"Worker {os.getpid()} warmed up on chain {chain_id}")
+
+def shutdown():
+    """Release the pooled connections and background threads of this worker."""
+    price_service.close()
+    report_fetcher.close()
+    blockchain.close()
+
 @app.route('/')
 def index():
     return render_template('index.html', config={
         'USDC_ADDRESS': os.getenv('USDC_ADDRESS'),
-        'WETH_ADDRESS': os.getenv('WETH_ADDRESS')
+        'WETH_ADDRESS': os.getenv('WETH_ADDRESS'),
+        # Live updates are served by the ASGI app, e.g. routed to it by the reverse proxy
+        'STREAM_URL': os.getenv('STREAM_URL', '')
     })
 
-# Example endpoint to read from blockchain
-@app.route('/api/blockchain/read/<method_name>')
+# Generic read of any allowlisted view function, arguments as a JSON list in `args`
+@app.route('/api/blockchain/read/<method_name>', methods=['GET', 'POST'])
 def read_blockchain(method_name):
     try:
-        result = blockchain.read_contract(method_name)
-        return jsonify({'success': True, 'data': result})
+        if request.method == 'POST':
+            data = request.json or {}
+            args, contract_name = data.get('args', []), data.get('contract', 'portfolio_manager')
+        else:
+            args = json.loads(request.args.get('args', '[]'))
+            contract_name = request.args.get('contract', 'portfolio_manager')
+
+        result = blockchain.read_contract(method_name, *args, contract_name=contract_name)
+        return jsonify({'success': True, 'data': to_json(result)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+# Many reads in one request, executed as a single block-cached RPC batch
+@app.route('/api/blockchain/read_batch', methods=['POST'])
+def read_blockchain_batch():
+    try:
+        calls = (request.json or {}).get('calls', [])
+        if len(calls) > MAX_BATCH_READS:
+            return jsonify({'success': False, 'error': f"At most {MAX_BATCH_READS} calls per batch"}), 400
+
+        results = [None] * len(calls)
+        bound = {}
+        for index, call in enumerate(calls):
+            try:
+                bound[index] = blockchain.bind_read(
+                    call['method'], call.get('args', []), call.get('contract', 'portfolio_manager')
+                )
+            except Exception as e:
+                results[index] = {'success': False, 'error': str(e)}
+
+        outputs = blockchain.cached_batch_call(list(bound.values()), allow_failure=True)
+        for index, output in zip(bound, outputs):
+            if isinstance(output, Exception):
+                results[index] = {'success': False, 'error': str(output)}
+            else:
+                results[index] = {'success': True, 'data': to_json(output)}
+
+        return jsonify({'success': True, 'results': results})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
@@ -52,46 +158,108 @@ def read_blockchain(method_name):
 def write_blockchain(method_name):
     try:
         data = request.json
-        result = blockchain.write_contract(
+        tx_hash = blockchain.write_contract(
             method_name,
-            sender_address=os.getenv('SENDER_ADDRESS'),
-            private_key=os.getenv('PRIVATE_KEY'),
-            *data.get('args', [])
+            os.getenv('SENDER_ADDRESS'),
+            os.getenv('PRIVATE_KEY'),
+            *data.get('args', []),
+            contract_name=data.get('contract', 'portfolio_manager')
         )
-        return jsonify({'success': True, 'transaction': result.hex()})
+        # Returned as soon as the transaction is sent, poll the status endpoint for the receipt
+        return jsonify({'success': True, 'transaction': tx_hash, 'status': 'pending'}), 202
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/blockchain/tx/<tx_hash>', methods=['GET'])
+def transaction_status(tx_hash):
+    status = blockchain.transaction_status(tx_hash)
+    if status is None:
+        return jsonify({'success': False, 'error': 'Unknown transaction'}), 404
+    return jsonify({'success': True, 'transaction': status})
+
+def scale_amount(token_address, amount):
+    # Determine decimals based on token
+    decimals = USDC_DECIMALS if token_address.lower() == os.getenv('USDC_ADDRESS').lower() else WETH_DECIMALS
+
+    # Calculate amount with decimals
+    return int(Decimal(amount) * Decimal(10 ** decimals))
+
 @app.route('/api/approve_and_deposit', methods=['POST'])
 def approve_and_deposit():
     try:
         data = request.json
-        token_address = data['tokenAddress']
-        amount = data['amount']
-        user_address = data['userAddress']
+        token_address = Web3.to_checksum_address(data['tokenAddress'])
+        user_address = Web3.to_checksum_address(data['userAddress'])
+        scaled_amount = scale_amount(token_address, data['amount'])
         
-        # Determine decimals based on token
-        decimals = USDC_DECIMALS if token_address.lower() == os.getenv('USDC_ADDRESS').lower() else WETH_DECIMALS
-        
-        # Calculate amount with decimals
-        scaled_amount = int(Decimal(amount) * Decimal(10 ** decimals))
-        
-        # Get contract instances
+        # Get contract instances, one token contract per request
+        portfolio_manager = blockchain.get_contract('portfolio_manager')
+        token_contract = blockchain.w3.eth.contract(address=token_address, abi=blockchain.get_contract('ierc20').abi)
+
+        deposit_data = {
+            'to': portfolio_manager.address,
+            'data': portfolio_manager.encodeABI('deposit', [token_address, scaled_amount])
+        }
+
+        # Skip the approve when the current allowance already covers the deposit
+        allowance, = blockchain.cached_batch_call([
+            portfolio_manager.functions.checkAllowance(token_address, user_address)
+        ])
+        if allowance >= scaled_amount:
+            return jsonify({'success': True, 'approveData': None, 'depositData': deposit_data})
+
+        approve_data = {
+            'to': token_address,
+            'data': token_contract.encodeABI('approve', [portfolio_manager.address, scaled_amount])
+        }
+        response = {
+            'success': True,
+            'approveData': approve_data,
+            'depositData': deposit_data,
+            # Approve and deposit in one transaction for wallets that batch calls (EIP-5792) or Safes
+            'batchData': {
+                'calls': [approve_data, deposit_data],
+                'multiSend': {
+                    'to': MULTISEND_CALL_ONLY_ADDRESS,
+                    'operation': SAFE_DELEGATECALL_OPERATION,
+                    'data': encode_multisend([approve_data, deposit_data])
+                }
+            }
+        }
+
+        # EIP-2612 tokens: sign a permit off-chain and call depositWithPermit instead of approve
+        if token_address.lower() in PERMIT_TOKENS:
+            permit_token = blockchain.w3.eth.contract(address=token_address, abi=PERMIT_ABI)
+            token_name, token_version, nonce = blockchain.cached_batch_call([
+                permit_token.functions.name(),
+                permit_token.functions.version(),
+                permit_token.functions.nonces(user_address)
+            ])
+            response['permit'] = build_permit_typed_data(
+                blockchain.chain_id, token_address, token_name, token_version,
+                user_address, portfolio_manager.address, scaled_amount, nonce, int(time.time()) + PERMIT_TTL
+            )
+
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/deposit_with_permit', methods=['POST'])
+def deposit_with_permit():
+    try:
+        data = request.json
+        token_address = Web3.to_checksum_address(data['tokenAddress'])
+        scaled_amount = scale_amount(token_address, data['amount'])
+        v, r, s = split_signature(data['signature'])
+
         portfolio_manager = blockchain.get_contract('portfolio_manager')
-        
-        # Update token contract address
-        blockchain.contracts['ierc20'].address = token_address
-        token_contract = blockchain.get_contract('ierc20')
-        
         return jsonify({
             'success': True,
-            'approveData': {
-                'to': token_address,
-                'data': token_contract.encodeABI('approve', [portfolio_manager.address, scaled_amount])
-            },
             'depositData': {
                 'to': portfolio_manager.address,
-                'data': portfolio_manager.encodeABI('deposit', [token_address, scaled_amount])
+                'data': portfolio_manager.encodeABI(
+                    'depositWithPermit', [token_address, scaled_amount, int(data['deadline']), v, r, s]
+                )
             }
         })
     except Exception as e:
@@ -102,14 +270,7 @@ def withdraw():
     try:
         data = request.json
         token_address = data['tokenAddress']
-        amount = data['amount']
-        user_address = data['userAddress']
-        
-        # Determine decimals based on token
-        decimals = USDC_DECIMALS if token_address.lower() == os.getenv('USDC_ADDRESS').lower() else WETH_DECIMALS
-        
-        # Calculate amount with decimals
-        scaled_amount = int(Decimal(amount) * Decimal(10 ** decimals))
+        scaled_amount = scale_amount(token_address, data['amount'])
         
         # Get contract instance
         portfolio_manager = blockchain.get_contract('portfolio_manager')
@@ -132,44 +293,32 @@ def get_balances():
             return jsonify({'success': False, 'error': 'No address provided'}), 400
 
         portfolio_manager = blockchain.get_contract('portfolio_manager')
-        
-        # Check if user is registered
-        is_registered = portfolio_manager.functions.portfolios(
-            Web3.to_checksum_address(user_address)
-        ).call()
-        
-        if not is_registered:
-            return jsonify({'success': False, 'error': 'User not registered'}), 400
-            
+        checksum_address = Web3.to_checksum_address(user_address)
         token_addresses = [
             Web3.to_checksum_address(os.getenv('USDC_ADDRESS')),
             Web3.to_checksum_address(os.getenv('WETH_ADDRESS'))
         ]
-        
-        balances = portfolio_manager.functions.getUserBalances(
-            Web3.to_checksum_address(user_address),
-            token_addresses
-        ).call()
+
+        # Registration check and balance read share one batched RPC request per block
+        is_registered, balances = blockchain.cached_batch_call([
+            portfolio_manager.functions.portfolios(checksum_address),
+            portfolio_manager.functions.getUserBalances(checksum_address, token_addresses)
+        ], allow_failure=True)
+
+        if isinstance(is_registered, Exception):
+            raise is_registered
+        if not is_registered:
+            return jsonify({'success': False, 'error': 'User not registered'}), 400
+        if isinstance(balances, Exception):
+            raise balances
         
         usdc_formatted = balances[0] / (10 ** USDC_DECIMALS)
         weth_formatted = balances[1] / (10 ** WETH_DECIMALS)
         
-        # Fetch token prices from CoinMarketCap
-        headers = {
-            'X-CMC_PRO_API_KEY': os.getenv('COINMARKETCAP_API_KEY'),
-            'Accept': 'application/json'
-        }
-        
-        # Using ETH price for WETH
-        response = requests.get(
-            'https://pro-api.coinmarketcap.com/v2/cryptocurrency/quotes/latest',
-            params={'symbol': 'ETH,USDC'},
-            headers=headers
-        )
-        
-        price_data = response.json()
-        weth_price = price_data['data']['ETH'][0]['quote']['USD']['price']
-        usdc_price = price_data['data']['USDC'][0]['quote']['USD']['price']
+        # Fetch token prices from the shared price cache, using ETH price for WETH
+        prices = price_service.get_prices(('ETH', 'USDC'))
+        weth_price = prices['ETH']
+        usdc_price = prices['USDC']
         
         # Calculate USD values
         usdc_value = usdc_formatted * usdc_price
@@ -201,70 +350,72 @@ def get_reports():
 
         portfolio_manager = blockchain.get_contract('portfolio_manager')
         
-        # Check if user is registered
-        is_registered = portfolio_manager.functions.portfolios(
-            Web3.to_checksum_address(user_address)
-        ).call()
-        
+        checksum_address = Web3.to_checksum_address(user_address)
+
+        # Registration check and the user's IPFS reports share one batched RPC request per block
+        is_registered, ipfs_hashes = blockchain.cached_batch_call([
+            portfolio_manager.functions.portfolios(checksum_address),
+            portfolio_manager.functions.getIpfsReports(checksum_address)
+        ], allow_failure=True)
+
+        if isinstance(is_registered, Exception):
+            raise is_registered
         if not is_registered:
             return jsonify({'success': False, 'error': 'User not registered'}), 400
+        if isinstance(ipfs_hashes, Exception):
+            raise ipfs_hashes
 
-        # Get IPFS reports for the user
-        ipfs_hashes = portfolio_manager.functions.getIpfsReports(
-            Web3.to_checksum_address(user_address)
-        ).call()
+        # Batched period directories hold one <user>.json report per rebalanced portfolio
+        try:
+            period_count, = blockchain.cached_batch_call([portfolio_manager.functions.getPeriodReportCount()])
+            period_directories, = blockchain.cached_batch_call([
+                portfolio_manager.functions.getPeriodReports(
+                    max(period_count - MAX_PERIOD_REPORTS, 0), MAX_PERIOD_REPORTS
+                )
+            ])
+        except Exception:  # Contract deployed without batched report support
+            period_directories = []
 
-        # Format the reports with gateway URLs and validate them
-        reports = []
-        processed_hashes = set()  # Keep track of processed hashes
-        gateways = [
-            "https://gateway.autonolas.tech"
-        ]
+        report_sources = build_report_sources(ipfs_hashes, period_directories, user_address)
 
-        for ipfs_hash in ipfs_hashes:
-            if not ipfs_hash or ipfs_hash in processed_hashes:  # Skip empty or already processed hashes
-                continue
-
-            processed_hashes.add(ipfs_hash)
-            report_found = False
-
-            for gateway in gateways:
-                if report_found:
-                    break
-
-                try:
-                    report_url = f"{gateway}/ipfs/{ipfs_hash}/PortfolioRebalancer_Report.json"
-                    # First check if the report exists
-                    head_response = requests.head(report_url, timeout=5)
-                    
-                    if head_response.status_code == 200:
-                        # Fetch the actual report content
-                        get_response = requests.get(report_url, timeout=5)
-                        if get_response.status_code == 200:
-                            report_data = get_response.json()
-                            
-                            # Extract only the needed fields
-                            reports.append({
-                                'url': report_url,
-                                'timestamp': report_data.get('timestamp', 'N/A'),
-                                'recommendation': report_data.get('recommendation', {}).get('action', 'N/A')
-                            })
-                            report_found = True
-                except requests.exceptions.RequestException:
-                    continue
-                except ValueError:  # JSON decode error
-                    continue
-
-        # Sort reports by timestamp in descending order (newest first)
-        reports.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Fetch every report concurrently; warmed reports come straight from the disk cache
+        fetched = report_fetcher.fetch_many(path for paths in report_sources for path in paths)
+        reports = collect_reports(report_sources, fetched, report_fetcher.url)
 
+        # Paginate the report history
         return jsonify({
             'success': True,
-            'reports': reports
+            **paginate(
+                reports,
+                request.args.get('page', type=int),
+                request.args.get('page_size', type=int)
+            )
         })
     except Exception as e:
         print(f"Error in get_reports: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/history', methods=['GET'])
+def get_history():
+    try:
+        user_address = request.args.get('address')
+        if not user_address:
+            return jsonify({'success': False, 'error': 'No address provided'}), 400
+
+        if not index_store.available():
+            return jsonify({'success': False, 'error': 'Event index not available'}), 503
+
+        # Served from the local index, no RPC calls
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        return jsonify({
+            'success': True,
+            'indexed_block': index_store.indexed_block(),
+            'events': index_store.events(user_address, limit=limit, offset=request.args.get('offset', 0, type=int)),
+            'balance_history': index_store.balance_history(user_address, request.args.get('token'), limit=limit)
+        })
+    except Exception as e:
+        print(f"Error in get_history: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,531 @@
+from quart import Quart, Response, render_template, jsonify, request
+from blockchain import load_abi
+from abi_dispatch import VIEW_MUTABILITIES, WRITE_MUTABILITIES, coerce_args, function_abis, to_json
+from async_clients import AsyncPriceService, AsyncReportFetcher
+from ipfs_reports import MAX_PERIOD_REPORTS, build_report_sources, collect_reports, paginate
+from indexer import DEFAULT_INDEX_DB, IndexStore
+from updates import UpdateHub
+from deposits import (
+    MULTISEND_CALL_ONLY_ADDRESS,
+    PERMIT_TTL,
+    SAFE_DELEGATECALL_OPERATION,
+    build_permit_typed_data,
+    encode_multisend,
+    split_signature
+)
+from tx_manager import DEFAULT_NONCE_DB, TX_CONFIRMED, TX_PENDING, TX_REVERTED, NonceManager
+import asyncio
+import json
+import os
+import time
+from dotenv import load_dotenv
+from decimal import Decimal
+from web3 import AsyncWeb3
+from web3.exceptions import TransactionNotFound
+import httpx
+
+load_dotenv()  # Load environment variables
+
+# ASGI variant of app.py: same routes, but every RPC and HTTP call is awaited so a single
+# worker serves many concurrent dashboard users. Run with: uvicorn asgi_app:app
+app = Quart(__name__)
+
+# Token decimals
+USDC_DECIMALS = 6
+WETH_DECIMALS = 18
+
+# Initialize async blockchain connection
+w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(os.getenv('RPC_URL')))
+
+# Maximum number of calls accepted by the batch read endpoint
+MAX_BATCH_READS = 50
+
+# Load Portfolio Manager contract
+PORTFOLIO_MANAGER_ABI = load_abi('PortfolioManager.json')
+portfolio_manager = w3.eth.contract(
+    address=os.getenv('PORTFOLIO_MANAGER_ADDRESS'),
+    abi=PORTFOLIO_MANAGER_ABI
+)
+
+# Allowlists of callable functions, precomputed from the ABI
+VIEW_FUNCTIONS = function_abis(PORTFOLIO_MANAGER_ABI, VIEW_MUTABILITIES)
+WRITE_FUNCTIONS = function_abis(PORTFOLIO_MANAGER_ABI, WRITE_MUTABILITIES)
+
+# IERC20 ABI, the address is set per request based on the token
+IERC20_ABI = load_abi('IERC20.json')
+
+# Tokens implementing EIP-2612 permits, USDC by default
+PERMIT_TOKENS = [
+    address.strip().lower()
+    for address in os.getenv('PERMIT_TOKENS', os.getenv('USDC_ADDRESS', '')).split(',') if address.strip()
+]
+PERMIT_ABI = load_abi('IERC20Permit.json')
+
+# Nonces of SENDER_ADDRESS, shared with every other worker and with app.py
+nonce_manager = NonceManager(os.getenv('NONCE_DB', DEFAULT_NONCE_DB))
+
+# Read-only view of the event index written by indexer.py
+index_store = IndexStore(os.getenv('INDEX_DB', DEFAULT_INDEX_DB))
+
+
+@app.before_serving
+async def startup():
+    # One pooled HTTP client per worker, shared by the price service and the report fetcher
+    app.http_client = httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    )
+    app.price_service = AsyncPriceService(
+        app.http_client,
+        os.getenv('COINMARKETCAP_API_KEY'),
+        ttl=float(os.getenv('PRICE_CACHE_TTL', '60')),
+        stale_ttl=float(os.getenv('PRICE_STALE_TTL', '600'))
+    )
+    app.report_fetcher = AsyncReportFetcher(
+        app.http_client,
+        gateways=os.getenv('IPFS_GATEWAYS', 'https://gateway.autonolas.tech').split(','),
+        cache_dir=os.getenv('IPFS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ipfs_cache')),
+        max_concurrency=int(os.getenv('IPFS_FETCH_WORKERS', '16'))
+    )
+
+    # One shared watcher pushes state changes to every open dashboard stream
+    app.update_hub = UpdateHub(
+        fetch_user_states,
+        lambda: w3.eth.block_number,
+        poll_interval=float(os.getenv('BLOCK_POLL_INTERVAL', '2'))
+    )
+    app.update_hub.start()
+
+    # Per-worker warmup: open the RPC connection and check the contract is deployed
+    app.chain_id = chain_id = await w3.eth.chain_id
+    if not await w3.eth.get_code(portfolio_manager.address):
+        raise Exception(f"No contract code for 'portfolio_manager' at {portfolio_manager.address}")
+    print(f"Worker {os.getpid()} warmed up on chain {chain_id}")
+
+
+@app.after_serving
+async def shutdown():
+    await app.update_hub.close()
+    await app.http_client.aclose()
+
+
+def scale_amount(token_address, amount):
+    # Determine decimals based on token
+    decimals = USDC_DECIMALS if token_address.lower() == os.getenv('USDC_ADDRESS').lower() else WETH_DECIMALS
+
+    # Calculate amount with decimals
+    return int(Decimal(amount) * Decimal(10 ** decimals))
+
+
+async def fetch_user_state(user_address, token_addresses, block_number):
+    checksum_address = AsyncWeb3.to_checksum_address(user_address)
+    balances, ipfs_hashes = await asyncio.gather(
+        portfolio_manager.functions.getUserBalances(checksum_address, token_addresses).call(
+            block_identifier=block_number
+        ),
+        portfolio_manager.functions.getIpfsReports(checksum_address).call(block_identifier=block_number),
+        return_exceptions=True
+    )
+    if isinstance(balances, Exception) or isinstance(ipfs_hashes, Exception):
+        # Unregistered users revert, they get their first state after a deposit
+        return {'registered': False}
+    return {
+        'registered': True,
+        # Raw uint256 amounts as strings, JSON numbers would lose precision
+        'balances': {'usdc': str(balances[0]), 'weth': str(balances[1])},
+        'reports': {'count': len(ipfs_hashes), 'latest': ipfs_hashes[-1] if ipfs_hashes else None}
+    }
+
+async def fetch_user_states(user_addresses, block_number):
+    """Read the balances and report hashes of several users concurrently, pinned to one block."""
+    token_addresses = [
+        AsyncWeb3.to_checksum_address(os.getenv('USDC_ADDRESS')),
+        AsyncWeb3.to_checksum_address(os.getenv('WETH_ADDRESS'))
+    ]
+    period_count, *states = await asyncio.gather(
+        portfolio_manager.functions.getPeriodReportCount().call(block_identifier=block_number),
+        *(fetch_user_state(user_address, token_addresses, block_number) for user_address in user_addresses),
+        return_exceptions=True
+    )
+    if isinstance(period_count, Exception):
+        period_count = 0
+
+    results = {}
+    for user_address, state in zip(user_addresses, states):
+        if isinstance(state, Exception):  # Skipped this block, retried on the next one
+            continue
+        if state['registered']:
+            state['period_reports'] = period_count
+        results[user_address] = state
+    return results
+
+
+@app.route('/')
+async def index():
+    return await render_template('index.html', config={
+        'USDC_ADDRESS': os.getenv('USDC_ADDRESS'),
+        'WETH_ADDRESS': os.getenv('WETH_ADDRESS'),
+        'STREAM_URL': '/api/stream'
+    })
+
+def bind(allowlist, method_name, args):
+    function_abi = allowlist.get(method_name)
+    if function_abi is None:
+        kind = 'view' if allowlist is VIEW_FUNCTIONS else 'write'
+        raise ValueError(f"'{method_name}' is not a {kind} function of 'portfolio_manager'")
+    return portfolio_manager.functions[method_name](*coerce_args(function_abi, list(args)))
+
+# Generic read of any allowlisted view function, arguments as a JSON list in `args`
+@app.route('/api/blockchain/read/<method_name>', methods=['GET', 'POST'])
+async def read_blockchain(method_name):
+    try:
+        if request.method == 'POST':
+            args = (await request.get_json() or {}).get('args', [])
+        else:
+            args = json.loads(request.args.get('args', '[]'))
+
+        result = await bind(VIEW_FUNCTIONS, method_name, args).call()
+        return jsonify({'success': True, 'data': to_json(result)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+async def read_one(call):
+    try:
+        result = await bind(VIEW_FUNCTIONS, call['method'], call.get('args', [])).call()
+        return {'success': True, 'data': to_json(result)}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+# Many reads in one request, executed concurrently
+@app.route('/api/blockchain/read_batch', methods=['POST'])
+async def read_blockchain_batch():
+    try:
+        calls = (await request.get_json() or {}).get('calls', [])
+        if len(calls) > MAX_BATCH_READS:
+            return jsonify({'success': False, 'error': f"At most {MAX_BATCH_READS} calls per batch"}), 400
+
+        results = await asyncio.gather(*(read_one(call) for call in calls))
+        return jsonify({'success': True, 'results': list(results)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+async def next_nonce(sender_address):
+    # SQLite allocations run off the event loop, the chain is only asked for a sender's first nonce
+    nonce = await asyncio.to_thread(nonce_manager.allocate, sender_address)
+    if nonce is None:
+        start = await w3.eth.get_transaction_count(sender_address, 'pending')
+        nonce = await asyncio.to_thread(nonce_manager.allocate, sender_address, start)
+    return nonce
+
+# Example endpoint to write to blockchain
+@app.route('/api/blockchain/write/<method_name>', methods=['POST'])
+async def write_blockchain(method_name):
+    try:
+        data = await request.get_json()
+        sender_address = os.getenv('SENDER_ADDRESS')
+        method = bind(WRITE_FUNCTIONS, method_name, data.get('args', []))
+        nonce = await next_nonce(sender_address)
+
+        try:
+            transaction = await method.build_transaction({
+                'from': sender_address,
+                'nonce': nonce,
+                'gas': 2000000,  # Adjust gas limit as needed
+                'gasPrice': await w3.eth.gas_price
+            })
+
+            # Sign and send transaction
+            signed_txn = w3.eth.account.sign_transaction(transaction, os.getenv('PRIVATE_KEY'))
+            tx_hash = await w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        except Exception:
+            # The nonce was not used, resync from the node for the next write
+            await asyncio.to_thread(nonce_manager.reset, sender_address)
+            raise
+
+        # Returned as soon as the transaction is sent, poll the status endpoint for the receipt
+        return jsonify({'success': True, 'transaction': tx_hash.hex(), 'status': 'pending'}), 202
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/blockchain/tx/<tx_hash>', methods=['GET'])
+async def transaction_status(tx_hash):
+    try:
+        receipt = await w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        receipt = None
+
+    if receipt is not None:
+        status = {
+            'hash': tx_hash,
+            'status': TX_CONFIRMED if receipt['status'] == 1 else TX_REVERTED,
+            'block_number': receipt['blockNumber'],
+            'gas_used': receipt['gasUsed'],
+        }
+    else:
+        try:
+            await w3.eth.get_transaction(tx_hash)
+        except TransactionNotFound:
+            return jsonify({'success': False, 'error': 'Unknown transaction'}), 404
+        status = {'hash': tx_hash, 'status': TX_PENDING}
+    return jsonify({'success': True, 'transaction': status})
+
+@app.route('/api/approve_and_deposit', methods=['POST'])
+async def approve_and_deposit():
+    try:
+        data = await request.get_json()
+        token_address = AsyncWeb3.to_checksum_address(data['tokenAddress'])
+        user_address = AsyncWeb3.to_checksum_address(data['userAddress'])
+        scaled_amount = scale_amount(token_address, data['amount'])
+
+        # Encoding calldata is local, no RPC round trip
+        token_contract = w3.eth.contract(address=token_address, abi=IERC20_ABI)
+
+        deposit_data = {
+            'to': portfolio_manager.address,
+            'data': portfolio_manager.encodeABI('deposit', [token_address, scaled_amount])
+        }
+
+        # The permit reads are only needed without enough allowance, but run concurrently with its check
+        is_permit_token = token_address.lower() in PERMIT_TOKENS
+        permit_token = w3.eth.contract(address=token_address, abi=PERMIT_ABI)
+        allowance, *permit_fields = await asyncio.gather(
+            portfolio_manager.functions.checkAllowance(token_address, user_address).call(),
+            *((
+                permit_token.functions.name().call(),
+                permit_token.functions.version().call(),
+                permit_token.functions.nonces(user_address).call()
+            ) if is_permit_token else ()),
+            return_exceptions=True
+        )
+
+        if isinstance(allowance, Exception):
+            raise allowance
+        # Skip the approve when the current allowance already covers the deposit
+        if allowance >= scaled_amount:
+            return jsonify({'success': True, 'approveData': None, 'depositData': deposit_data})
+
+        approve_data = {
+            'to': token_address,
+            'data': token_contract.encodeABI('approve', [portfolio_manager.address, scaled_amount])
+        }
+        response = {
+            'success': True,
+            'approveData': approve_data,
+            'depositData': deposit_data,
+            # Approve and deposit in one transaction for wallets that batch calls (EIP-5792) or Safes
+            'batchData': {
+                'calls': [approve_data, deposit_data],
+                'multiSend': {
+                    'to': MULTISEND_CALL_ONLY_ADDRESS,
+                    'operation': SAFE_DELEGATECALL_OPERATION,
+                    'data': encode_multisend([approve_data, deposit_data])
+                }
+            }
+        }
+
+        # EIP-2612 tokens: sign a permit off-chain and call depositWithPermit instead of approve
+        if is_permit_token:
+            for result in permit_fields:
+                if isinstance(result, Exception):
+                    raise result
+            token_name, token_version, nonce = permit_fields
+            response['permit'] = build_permit_typed_data(
+                app.chain_id, token_address, token_name, token_version,
+                user_address, portfolio_manager.address, scaled_amount, nonce, int(time.time()) + PERMIT_TTL
+            )
+
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/deposit_with_permit', methods=['POST'])
+async def deposit_with_permit():
+    try:
+        data = await request.get_json()
+        token_address = AsyncWeb3.to_checksum_address(data['tokenAddress'])
+        scaled_amount = scale_amount(token_address, data['amount'])
+        v, r, s = split_signature(data['signature'])
+
+        return jsonify({
+            'success': True,
+            'depositData': {
+                'to': portfolio_manager.address,
+                'data': portfolio_manager.encodeABI(
+                    'depositWithPermit', [token_address, scaled_amount, int(data['deadline']), v, r, s]
+                )
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/withdraw', methods=['POST'])
+async def withdraw():
+    try:
+        data = await request.get_json()
+        token_address = data['tokenAddress']
+        scaled_amount = scale_amount(token_address, data['amount'])
+
+        return jsonify({
+            'success': True,
+            'withdrawData': {
+                'to': portfolio_manager.address,
+                'data': portfolio_manager.encodeABI('withdraw', [token_address, scaled_amount])
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/balances', methods=['GET'])
+async def get_balances():
+    try:
+        user_address = request.args.get('address')
+        if not user_address:
+            return jsonify({'success': False, 'error': 'No address provided'}), 400
+
+        user_address = AsyncWeb3.to_checksum_address(user_address)
+        token_addresses = [
+            AsyncWeb3.to_checksum_address(os.getenv('USDC_ADDRESS')),
+            AsyncWeb3.to_checksum_address(os.getenv('WETH_ADDRESS'))
+        ]
+
+        # Registration check, balance read and price fetch run concurrently,
+        # using ETH price for WETH
+        is_registered, balances, prices = await asyncio.gather(
+            portfolio_manager.functions.portfolios(user_address).call(),
+            portfolio_manager.functions.getUserBalances(user_address, token_addresses).call(),
+            app.price_service.get_prices(('ETH', 'USDC')),
+            return_exceptions=True
+        )
+
+        # Registration takes precedence over errors of the speculative reads
+        if isinstance(is_registered, Exception):
+            raise is_registered
+        if not is_registered:
+            return jsonify({'success': False, 'error': 'User not registered'}), 400
+        for result in (balances, prices):
+            if isinstance(result, Exception):
+                raise result
+
+        usdc_formatted = balances[0] / (10 ** USDC_DECIMALS)
+        weth_formatted = balances[1] / (10 ** WETH_DECIMALS)
+
+        # Calculate USD values
+        usdc_value = usdc_formatted * prices['USDC']
+        weth_value = weth_formatted * prices['ETH']
+        total_value = usdc_value + weth_value
+
+        return jsonify({
+            'success': True,
+            'balances': {
+                'usdc': usdc_formatted,
+                'weth': weth_formatted
+            },
+            'usd_values': {
+                'usdc': usdc_value,
+                'weth': weth_value,
+                'total': total_value
+            }
+        })
+    except Exception as e:
+        print(f"Error in get_balances: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+async def get_period_directories():
+    # Batched period directories hold one <user>.json report per rebalanced portfolio
+    try:
+        period_count = await portfolio_manager.functions.getPeriodReportCount().call()
+        return await portfolio_manager.functions.getPeriodReports(
+            max(period_count - MAX_PERIOD_REPORTS, 0), MAX_PERIOD_REPORTS
+        ).call()
+    except Exception:  # Contract deployed without batched report support
+        return []
+
+@app.route('/api/reports', methods=['GET'])
+async def get_reports():
+    try:
+        user_address = request.args.get('address')
+        if not user_address:
+            return jsonify({'success': False, 'error': 'No address provided'}), 400
+
+        checksum_address = AsyncWeb3.to_checksum_address(user_address)
+
+        # Registration check and report hash reads run concurrently
+        is_registered, ipfs_hashes, period_directories = await asyncio.gather(
+            portfolio_manager.functions.portfolios(checksum_address).call(),
+            portfolio_manager.functions.getIpfsReports(checksum_address).call(),
+            get_period_directories(),
+            return_exceptions=True
+        )
+
+        if isinstance(is_registered, Exception):
+            raise is_registered
+        if not is_registered:
+            return jsonify({'success': False, 'error': 'User not registered'}), 400
+        if isinstance(ipfs_hashes, Exception):
+            raise ipfs_hashes
+
+        report_sources = build_report_sources(ipfs_hashes, period_directories, user_address)
+
+        # Fetch every report concurrently; warmed reports come straight from the disk cache
+        fetched = await app.report_fetcher.fetch_many(path for paths in report_sources for path in paths)
+        reports = collect_reports(report_sources, fetched, app.report_fetcher.url)
+
+        # Paginate the report history
+        return jsonify({
+            'success': True,
+            **paginate(
+                reports,
+                request.args.get('page', type=int),
+                request.args.get('page_size', type=int)
+            )
+        })
+    except Exception as e:
+        print(f"Error in get_reports: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/stream', methods=['GET'])
+async def stream_updates():
+    user_address = request.args.get('address')
+    if not user_address:
+        return jsonify({'success': False, 'error': 'No address provided'}), 400
+
+    response = Response(
+        app.update_hub.stream(user_address),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # The stream stays open as long as the dashboard, not bounded by RESPONSE_TIMEOUT
+    response.timeout = None
+    return response
+
+@app.route('/api/history', methods=['GET'])
+async def get_history():
+    try:
+        user_address = request.args.get('address')
+        if not user_address:
+            return jsonify({'success': False, 'error': 'No address provided'}), 400
+
+        if not index_store.available():
+            return jsonify({'success': False, 'error': 'Event index not available'}), 503
+
+        # Served from the local index, no RPC calls; SQLite reads run off the event loop
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        indexed_block, events, balance_history = await asyncio.gather(
+            asyncio.to_thread(index_store.indexed_block),
+            asyncio.to_thread(
+                index_store.events, user_address, limit=limit, offset=request.args.get('offset', 0, type=int)
+            ),
+            asyncio.to_thread(index_store.balance_history, user_address, request.args.get('token'), limit=limit)
+        )
+        return jsonify({
+            'success': True,
+            'indexed_block': indexed_block,
+            'events': events,
+            'balance_history': balance_history
+        })
+    except Exception as e:
+        print(f"Error in get_history: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+if __name__ == '__main__':
+    app.run(debug=True)
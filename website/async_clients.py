@@ -0,0 +1,103 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import time
+
+import httpx
+
+from ipfs_reports import ReportCache
+from price_service import COINMARKETCAP_QUOTES_URL
+
+
+class AsyncPriceService:
+    """Asyncio counterpart of PriceService: TTL cache, single-flight and stale-while-revalidate."""
+
+    def __init__(self, client: httpx.AsyncClient, api_key: str, ttl: float = 60, stale_ttl: float = 600,
+                 url: str = COINMARKETCAP_QUOTES_URL):
+        self.client = client
+        self.api_key = api_key or ''
+        self.url = url
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self._cache: Dict[Tuple[str, ...], Tuple[Dict[str, float], float]] = {}
+        self._inflight: Dict[Tuple[str, ...], asyncio.Task] = {}
+
+    async def _refresh(self, key: Tuple[str, ...]) -> Dict[str, float]:
+        try:
+            response = await self.client.get(
+                self.url,
+                params={'symbol': ','.join(key)},
+                headers={'X-CMC_PRO_API_KEY': self.api_key, 'Accept': 'application/json'}
+            )
+            response.raise_for_status()
+            data = response.json()['data']
+            prices = {symbol: data[symbol][0]['quote']['USD']['price'] for symbol in key}
+            self._cache[key] = (prices, time.monotonic())
+            return prices
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """Return the USD price of each symbol."""
+        key = tuple(sorted(set(symbols)))
+        cached = self._cache.get(key)
+        age = time.monotonic() - cached[1] if cached else None
+
+        if cached and age < self.ttl:
+            return cached[0]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(key))
+            self._inflight[key] = task
+
+        if cached and age < self.stale_ttl:
+            # Retrieve a failed background refresh's exception so it is not reported as unhandled
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            return cached[0]
+
+        # shield: a cancelled request must not cancel the refresh other requests wait on
+        return await asyncio.shield(task)
+
+
+class AsyncReportFetcher:
+    """Asyncio counterpart of ReportFetcher, bounded by a semaphore and backed by the same disk cache."""
+
+    def __init__(self, client: httpx.AsyncClient, gateways: List[str], cache_dir: str,
+                 max_concurrency: int = 16, timeout: float = 5):
+        self.client = client
+        self.gateways = [gateway.rstrip('/') for gateway in gateways]
+        self.cache = ReportCache(cache_dir)
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    def url(self, ipfs_path: str) -> str:
+        return f"{self.gateways[0]}/ipfs/{ipfs_path}"
+
+    async def fetch(self, ipfs_path: str) -> Optional[dict]:
+        """Return the JSON document at an IPFS path, or None if no gateway serves it."""
+        report = self.cache.get(ipfs_path)
+        if report is not None:
+            return report
+
+        async with self.semaphore:
+            for gateway in self.gateways:
+                try:
+                    response = await self.client.get(f"{gateway}/ipfs/{ipfs_path}", timeout=self.timeout)
+                    if response.status_code != 200:
+                        continue
+                    report = response.json()
+                except httpx.HTTPError:
+                    continue
+                except ValueError:  # JSON decode error
+                    continue
+
+                self.cache.put(ipfs_path, report)
+                return report
+
+        return None
+
+    async def fetch_many(self, ipfs_paths: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """Fetch several IPFS paths concurrently."""
+        ipfs_paths = list(dict.fromkeys(ipfs_paths))
+        results = await asyncio.gather(*(self.fetch(ipfs_path) for ipfs_path in ipfs_paths))
+        return dict(zip(ipfs_paths, results))
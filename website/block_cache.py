@@ -0,0 +1,99 @@
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+import threading
+
+
+class BlockReadCache:
+    """Caches contract reads for the latest block only.
+
+    A watcher thread polls the block number every `poll_interval` seconds and drops every
+    cached read once a new block is observed, so view results are never older than one block.
+    Concurrent misses for the same read wait on a single RPC request.
+    """
+
+    def __init__(self, get_block_number: Callable[[], int], poll_interval: float = 2.0):
+        self.get_block_number = get_block_number
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._block: Optional[int] = None
+        self._entries: Dict[Hashable, Future] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[int], None]] = []
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                block = self.get_block_number()
+            except Exception as e:  # Keep serving the last block until the RPC recovers
+                print(f"Block watcher error: {str(e)}")
+                continue
+            with self._lock:
+                if self._block is not None and block <= self._block:
+                    continue
+                self._block = block
+                self._entries = {}
+
+            for listener in self._listeners:
+                try:
+                    listener(block)
+                except Exception as e:
+                    print(f"Block listener error: {str(e)}")
+
+    def _ensure_started(self):
+        # Started lazily so the thread is created in the serving process, not before a fork
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._block = self.get_block_number()
+            self._thread = threading.Thread(target=self._watch, name='block-watcher', daemon=True)
+            self._thread.start()
+
+    def add_listener(self, listener: Callable[[int], None]):
+        """Call `listener(block_number)` from the watcher thread whenever a new block is observed."""
+        self._listeners.append(listener)
+
+    @property
+    def block_number(self) -> int:
+        self._ensure_started()
+        return self._block
+
+    def get_many(self, keys: Sequence[Hashable],
+                 fetch: Callable[[List[int], int], List[Any]]) -> Tuple[int, List[Any]]:
+        """Return the cached value of every key at the latest block.
+
+        `fetch(indexes, block)` reads the missing keys (given as indexes into `keys`) pinned to
+        `block` and returns their values in the same order.
+        """
+        self._ensure_started()
+        owned: List[int] = []
+        with self._lock:
+            block, entries = self._block, self._entries
+            futures = []
+            for index, key in enumerate(keys):
+                future = entries.get(key)
+                if future is None:
+                    future = entries[key] = Future()
+                    owned.append(index)
+                futures.append(future)
+
+        if owned:
+            try:
+                values = fetch(owned, block)
+            except Exception as e:
+                # Transport failures are not cached, the next request retries them
+                with self._lock:
+                    for index in owned:
+                        entries.pop(keys[index], None)
+                        futures[index].set_exception(e)
+            else:
+                for index, value in zip(owned, values):
+                    futures[index].set_result(value)
+
+        return block, [future.result() for future in futures]
+
+    def close(self):
+        self._stop.set()
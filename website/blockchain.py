@@ -1,71 +1,216 @@
 from web3 import Web3
-from typing import Dict
+from web3.exceptions import TransactionNotFound
+from web3._utils.abi import get_abi_output_types
+from hexbytes import HexBytes
+from typing import Dict, List
+from rpc_provider import PooledHTTPProvider
+from block_cache import BlockReadCache
+from tx_manager import DEFAULT_NONCE_DB, TX_CONFIRMED, TX_PENDING, TX_REVERTED, NonceManager, TransactionTracker
+from abi_dispatch import VIEW_MUTABILITIES, WRITE_MUTABILITIES, coerce_args, function_abis
 import json
 import os
 
+def load_abi(abi_filename: str):
+    # Get absolute path
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    abi_path = os.path.join(
+        current_dir,
+        'contracts',
+        'abis',
+        abi_filename
+    )
+
+    # Debug prints
+    print(f"Looking for ABI file at: {abi_path}")
+    print(f"File exists: {os.path.exists(abi_path)}")
+
+    with open(abi_path, 'r') as file:
+        return json.load(file)
+
 class BlockchainManager:
-    def __init__(self, rpc_url: str):
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+    def __init__(self, rpc_url: str, block_poll_interval: float = 2.0, nonce_db: str = DEFAULT_NONCE_DB,
+                 **provider_kwargs):
+        # rpc_url may list several comma-separated endpoints, used in order for failover
+        self.provider = PooledHTTPProvider(rpc_url.split(','), **provider_kwargs)
+        self.w3 = Web3(self.provider)
         self.contracts: Dict[str, any] = {}
+        self._chain_id = None
+        # Per contract allowlists of callable functions, precomputed from the ABI
+        self.view_functions: Dict[str, Dict[str, dict]] = {}
+        self.write_functions: Dict[str, Dict[str, dict]] = {}
+        self.read_cache = BlockReadCache(lambda: self.w3.eth.block_number, block_poll_interval)
+
+        # Writes return as soon as the transaction is sent, receipts are checked once per block.
+        # Nonces are shared with every other worker through the nonce database
+        self.nonce_manager = NonceManager(nonce_db, lambda sender: self.w3.eth.get_transaction_count(
+            Web3.to_checksum_address(sender), 'pending'
+        ))
+        self.tx_tracker = TransactionTracker(
+            self._get_receipts,
+            self._transaction_exists,
+            on_dropped=lambda transaction: self.nonce_manager.reset(transaction['sender'])
+        )
+        self.read_cache.add_listener(self.tx_tracker.on_block)
         
+    @property
+    def chain_id(self) -> int:
+        # The chain never changes for a provider, read it once
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+
     def connect(self) -> bool:
         return self.w3.is_connected()
+
+    def warmup(self) -> int:
+        # Open the RPC connection and check every loaded contract is deployed before serving traffic
+        chain_id = self.chain_id
+        for name, contract in self.contracts.items():
+            if contract.address and not self.w3.eth.get_code(contract.address):
+                raise Exception(f"No contract code for '{name}' at {contract.address}")
+        return chain_id
     
     def load_contract(self, name: str, contract_address: str, abi_filename: str):
         try:
-            # Get absolute path
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            abi_path = os.path.join(
-                current_dir,
-                'contracts',
-                'abis',
-                abi_filename
-            )
-            
-            # Debug prints
-            print(f"Looking for ABI file at: {abi_path}")
-            print(f"File exists: {os.path.exists(abi_path)}")
-            
-            with open(abi_path, 'r') as file:
-                contract_abi = json.load(file)
+            contract_abi = load_abi(abi_filename)
             
             self.contracts[name] = self.w3.eth.contract(
                 address=contract_address,
                 abi=contract_abi
             )
+            self.view_functions[name] = function_abis(contract_abi, VIEW_MUTABILITIES)
+            self.write_functions[name] = function_abis(contract_abi, WRITE_MUTABILITIES)
         except Exception as e:
             print(f"Error loading contract: {str(e)}")
             raise
         
     def get_contract(self, name: str):
         return self.contracts.get(name)
+
+    def batch_call(self, calls: List, block_identifier='latest', allow_failure: bool = False) -> List:
+        """Execute several bound contract calls in a single JSON-RPC batch request.
+
+        With allow_failure, a failed call yields its exception in place of a result instead of raising.
+        """
+        if isinstance(block_identifier, int):
+            block_identifier = hex(block_identifier)
+
+        responses = self.provider.make_batch_request([
+            ('eth_call', [{'to': call.address, 'data': call._encode_transaction_data()}, block_identifier])
+            for call in calls
+        ])
+
+        results = []
+        for call, response in zip(calls, responses):
+            if 'error' in response:
+                error = Exception(f"{call.fn_name} failed: {response['error'].get('message')}")
+                if not allow_failure:
+                    raise error
+                results.append(error)
+                continue
+            decoded = self.w3.codec.decode(get_abi_output_types(call.abi), HexBytes(response['result']))
+            results.append(decoded[0] if len(decoded) == 1 else list(decoded))
+        return results
+
+    def cached_batch_call(self, calls: List, allow_failure: bool = False) -> List:
+        """Like batch_call, but served from the read cache of the latest block.
+
+        All reads are pinned to the same block, so concurrent requests for the same state cost
+        one RPC call per block. Reverts are cached for the block like any other result.
+        """
+        keys = [(call.address, call._encode_transaction_data()) for call in calls]
+        _, results = self.read_cache.get_many(
+            keys,
+            lambda indexes, block: self.batch_call([calls[index] for index in indexes], block, allow_failure=True)
+        )
+
+        if not allow_failure:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+    def _get_receipts(self, tx_hashes: List[str]) -> List:
+        responses = self.provider.make_batch_request([
+            ('eth_getTransactionReceipt', [tx_hash]) for tx_hash in tx_hashes
+        ])
+        return [response.get('result') for response in responses]
+
+    def _transaction_exists(self, tx_hash: str) -> bool:
+        try:
+            self.w3.eth.get_transaction(tx_hash)
+            return True
+        except TransactionNotFound:
+            return False
+
+    def close(self):
+        self.read_cache.close()
+        self.provider.close()
     
-    def read_contract(self, method_name: str, *args):
-        if not self.contracts:
-            raise Exception("Contracts not loaded")
-            
-        # Get contract method
-        method = getattr(self.contracts.values(), method_name)
-        return method(*args).call()
-    
-    def write_contract(self, method_name: str, sender_address: str, private_key: str, *args):
-        if not self.contracts:
-            raise Exception("Contracts not loaded")
-            
-        # Get contract method
-        method = getattr(self.contracts.values(), method_name)
-        
-        # Build transaction
-        transaction = method(*args).build_transaction({
-            'from': sender_address,
-            'nonce': self.w3.eth.get_transaction_count(sender_address),
-            'gas': 2000000,  # Adjust gas limit as needed
-            'gasPrice': self.w3.eth.gas_price
-        })
-        
-        # Sign and send transaction
-        signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        
-        # Wait for transaction receipt
-        return self.w3.eth.wait_for_transaction_receipt(tx_hash)
\ No newline at end of file
+    def _bind(self, allowlists: Dict[str, Dict[str, dict]], contract_name: str, method_name: str, args):
+        if contract_name not in self.contracts:
+            raise ValueError(f"Contract '{contract_name}' not loaded")
+        if not self.contracts[contract_name].address:
+            raise ValueError(f"Contract '{contract_name}' has no address")
+        function_abi = allowlists[contract_name].get(method_name)
+        if function_abi is None:
+            kind = 'view' if allowlists is self.view_functions else 'write'
+            raise ValueError(f"'{method_name}' is not a {kind} function of '{contract_name}'")
+        return self.contracts[contract_name].functions[method_name](*coerce_args(function_abi, list(args)))
+
+    def bind_read(self, method_name: str, args=(), contract_name: str = 'portfolio_manager'):
+        """Return the bound contract call of an allowlisted view function, arguments coerced from JSON."""
+        return self._bind(self.view_functions, contract_name, method_name, args)
+
+    def read_contract(self, method_name: str, *args, contract_name: str = 'portfolio_manager'):
+        result, = self.cached_batch_call([self.bind_read(method_name, args, contract_name)])
+        return result
+
+    def write_contract(self, method_name: str, sender_address: str, private_key: str, *args,
+                       contract_name: str = 'portfolio_manager') -> str:
+        """Sign and send a transaction, returning its hash without waiting for the receipt.
+
+        Track its progress with transaction_status.
+        """
+        method = self._bind(self.write_functions, contract_name, method_name, args)
+        nonce = self.nonce_manager.next_nonce(sender_address)
+
+        try:
+            # Build transaction
+            transaction = method.build_transaction({
+                'from': sender_address,
+                'nonce': nonce,
+                'gas': 2000000,  # Adjust gas limit as needed
+                'gasPrice': self.w3.eth.gas_price
+            })
+
+            # Sign and send transaction
+            signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key)
+            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction).hex()
+        except Exception:
+            # The nonce was not used, resync from the node for the next write
+            self.nonce_manager.reset(sender_address)
+            raise
+
+        self.tx_tracker.track(tx_hash, sender_address, nonce, method_name)
+        # Make sure the block watcher checking receipts is running
+        self.read_cache.block_number
+        return tx_hash
+
+    def transaction_status(self, tx_hash: str):
+        status = self.tx_tracker.status(tx_hash)
+        if status is not None:
+            return status
+
+        # Sent by another worker: answer from the node directly
+        receipt, = self._get_receipts([tx_hash])
+        if receipt is not None:
+            return {
+                'hash': tx_hash,
+                'status': TX_CONFIRMED if int(receipt['status'], 16) == 1 else TX_REVERTED,
+                'block_number': int(receipt['blockNumber'], 16),
+                'gas_used': int(receipt['gasUsed'], 16),
+            }
+        if self._transaction_exists(tx_hash):
+            return {'hash': tx_hash, 'status': TX_PENDING}
+        return None
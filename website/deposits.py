@@ -0,0 +1,72 @@
+from typing import List, Tuple
+
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector
+from hexbytes import HexBytes
+from web3 import Web3
+
+# Safe MultiSendCallOnly v1.3.0, deployed at the same address on every supported chain
+MULTISEND_CALL_ONLY_ADDRESS = '0x40A2aCCbd92BCA938b02010E17A5b8929b49130D'
+SAFE_DELEGATECALL_OPERATION = 1
+
+# Seconds a permit signature stays valid
+PERMIT_TTL = 1800
+
+
+def build_permit_typed_data(chain_id: int, token_address: str, token_name: str, token_version: str,
+                            owner: str, spender: str, value: int, nonce: int, deadline: int) -> dict:
+    """EIP-712 payload of an EIP-2612 permit, ready for eth_signTypedData_v4."""
+    return {
+        'types': {
+            'EIP712Domain': [
+                {'name': 'name', 'type': 'string'},
+                {'name': 'version', 'type': 'string'},
+                {'name': 'chainId', 'type': 'uint256'},
+                {'name': 'verifyingContract', 'type': 'address'},
+            ],
+            'Permit': [
+                {'name': 'owner', 'type': 'address'},
+                {'name': 'spender', 'type': 'address'},
+                {'name': 'value', 'type': 'uint256'},
+                {'name': 'nonce', 'type': 'uint256'},
+                {'name': 'deadline', 'type': 'uint256'},
+            ],
+        },
+        'primaryType': 'Permit',
+        'domain': {
+            'name': token_name,
+            'version': token_version,
+            'chainId': chain_id,
+            'verifyingContract': token_address,
+        },
+        # uint256 values as strings, JSON numbers lose precision in the browser
+        'message': {
+            'owner': owner,
+            'spender': spender,
+            'value': str(value),
+            'nonce': str(nonce),
+            'deadline': str(deadline),
+        },
+    }
+
+
+def split_signature(signature: str) -> Tuple[int, bytes, bytes]:
+    """Split a 65 byte signature into its (v, r, s) components."""
+    signature = HexBytes(signature)
+    if len(signature) != 65:
+        raise ValueError("Signature must be 65 bytes")
+    v = signature[64]
+    return (v + 27 if v < 27 else v), signature[:32], signature[32:64]
+
+
+def encode_multisend(calls: List[dict]) -> str:
+    """Calldata of MultiSendCallOnly.multiSend executing `calls` ({to, data}) in order from a Safe."""
+    packed = b''.join(
+        bytes([0])  # CALL
+        + HexBytes(Web3.to_checksum_address(call['to']))
+        + (0).to_bytes(32, 'big')  # value
+        + len(HexBytes(call['data'])).to_bytes(32, 'big')
+        + HexBytes(call['data'])
+        for call in calls
+    )
+    return Web3.to_hex(function_signature_to_4byte_selector('multiSend(bytes)') + encode(['bytes'], [packed]))
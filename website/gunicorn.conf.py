@@ -0,0 +1,61 @@
+"""Production gunicorn profile for the dashboard.
+
+WSGI (Flask, threaded workers):
+    gunicorn -c gunicorn.conf.py app:app
+
+ASGI (Quart, one event loop per worker):
+    WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi_app:app
+
+Live updates (/api/stream) are only served by the ASGI app, a stream would hold a gthread
+thread for as long as the dashboard is open. Next to the WSGI profile, run the ASGI app and
+route /api/stream to it, then set STREAM_URL=/api/stream for app:app:
+    BIND=0.0.0.0:5001 WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi_app:app
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# Worker model: processes x threads. Dashboard handlers mostly wait on the RPC and
+# HTTP APIs, so threaded workers (or one async worker per core) use the CPU best.
+worker_class = os.getenv('WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('WORKER_THREADS', '8'))
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', '1000'))
+
+# Every worker builds its own web3 connection pool and caches, never share them across a fork
+preload_app = False
+
+# Graceful shutdown: finish in-flight requests before a worker is killed
+timeout = int(os.getenv('WORKER_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('KEEPALIVE', '5'))
+
+# Recycle workers periodically, jittered so they don't all restart together
+max_requests = int(os.getenv('MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.getenv('MAX_REQUESTS_JITTER', '1000'))
+
+accesslog = os.getenv('ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info')
+
+
+def _is_wsgi_app():
+    # The ASGI app warms up and shuts down in its own before/after serving hooks
+    return not worker_class.startswith('uvicorn')
+
+
+def post_worker_init(worker):
+    """Warm up the RPC connection, contracts and caches before the worker accepts requests."""
+    if not _is_wsgi_app():
+        return
+    import app as dashboard
+    dashboard.warmup()
+
+
+def worker_exit(server, worker):
+    """Release pooled connections and background threads of the exiting worker."""
+    if not _is_wsgi_app():
+        return
+    import app as dashboard
+    dashboard.shutdown()
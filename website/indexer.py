@@ -0,0 +1,296 @@
+"""PortfolioManager event indexer.
+
+Tails the PortfolioManager logs into a local SQLite database, so dashboards read balance
+history, deposits, withdrawals, swaps and report hashes from the index instead of the RPC.
+
+    python indexer.py
+
+Logs are fetched with chunked eth_getLogs up to `INDEXER_CONFIRMATIONS` blocks behind the
+head. Every indexed row carries its block number, and the hashes of recently indexed blocks
+are checkpointed: when the chain reorganizes, rows above the common ancestor are deleted and
+re-indexed.
+"""
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
+import os
+import sqlite3
+import time
+
+from dotenv import load_dotenv
+from web3 import Web3
+from web3._utils.events import get_event_data
+from eth_utils import event_abi_to_log_topic
+
+from blockchain import BlockchainManager, load_abi
+
+INDEXED_EVENTS = ('Deposited', 'Withdrawn', 'Swapped', 'ReportHashStored', 'PeriodReportStored')
+
+# Number of recent block hashes kept to find the common ancestor after a reorg
+REORG_WINDOW = 128
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    event TEXT NOT NULL,
+    user TEXT,
+    token TEXT,
+    token_bought TEXT,
+    amount TEXT,
+    amount_bought TEXT,
+    ipfs_hash TEXT,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_user ON events (user, block_number);
+CREATE TABLE IF NOT EXISTS balance_history (
+    user TEXT NOT NULL,
+    token TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    balance TEXT NOT NULL,
+    PRIMARY KEY (user, token, block_number, log_index)
+);
+"""
+
+
+def connect(db_path: str, read_only: bool = False) -> sqlite3.Connection:
+    if read_only:
+        connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    else:
+        connection = sqlite3.connect(db_path)
+        connection.execute('PRAGMA journal_mode=WAL')  # Readers never block the indexer
+        connection.executescript(SCHEMA)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+class Indexer:
+    def __init__(self, blockchain: BlockchainManager, contract_address: str, db_path: str,
+                 start_block: int = 0, confirmations: int = 2, chunk_size: int = 2000):
+        self.blockchain = blockchain
+        self.w3 = blockchain.w3
+        self.address = Web3.to_checksum_address(contract_address)
+        self.db = connect(db_path)
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.chunk_size = self.max_chunk_size = chunk_size
+
+        self.events: Dict[bytes, dict] = {}
+        for entry in load_abi('PortfolioManager.json'):
+            if entry.get('type') == 'event' and entry['name'] in INDEXED_EVENTS:
+                self.events[event_abi_to_log_topic(entry)] = entry
+
+    def checkpoint(self) -> Optional[Tuple[int, str]]:
+        row = self.db.execute('SELECT number, hash FROM blocks ORDER BY number DESC LIMIT 1').fetchone()
+        return (row['number'], row['hash']) if row else None
+
+    def _rollback(self, block_number: int):
+        # Delete everything indexed above block_number, it is re-indexed on the next pass
+        with self.db:
+            for table, column in (('blocks', 'number'), ('events', 'block_number'), ('balance_history', 'block_number')):
+                self.db.execute(f'DELETE FROM {table} WHERE {column} > ?', (block_number,))
+
+    def _canonical_hash(self, number: int) -> Optional[str]:
+        try:
+            return self.w3.eth.get_block(number)['hash'].hex()
+        except Exception:  # Block not found: the canonical chain is now shorter
+            return None
+
+    def _find_common_ancestor(self) -> int:
+        for row in self.db.execute('SELECT number, hash FROM blocks ORDER BY number DESC').fetchall():
+            if self._canonical_hash(row['number']) == row['hash']:
+                return row['number']
+        # Reorg deeper than the checkpoint window: re-index from the start
+        return self.start_block - 1
+
+    def handle_reorg(self) -> bool:
+        """Roll back to the common ancestor if the last indexed block is no longer canonical."""
+        checkpoint = self.checkpoint()
+        if checkpoint is None:
+            return False
+        number, block_hash = checkpoint
+        if self._canonical_hash(number) == block_hash:
+            return False
+
+        ancestor = self._find_common_ancestor()
+        print(f"Reorg detected at block {number}, rolling back to {ancestor}")
+        self._rollback(ancestor)
+        return True
+
+    def _balance(self, user: str, token: str) -> int:
+        row = self.db.execute(
+            'SELECT balance FROM balance_history WHERE user = ? AND token = ? '
+            'ORDER BY block_number DESC, log_index DESC LIMIT 1',
+            (user, token)
+        ).fetchone()
+        return int(row['balance']) if row else 0
+
+    def _record_balance(self, user: str, token: str, log: dict, delta: int):
+        # Balances are uint256, stored as decimal text to avoid SQLite's 64-bit integers
+        self.db.execute(
+            'INSERT OR REPLACE INTO balance_history VALUES (?, ?, ?, ?, ?)',
+            (user, token, log['blockNumber'], log['logIndex'], str(self._balance(user, token) + delta))
+        )
+
+    def _store_log(self, log: dict):
+        event = get_event_data(self.w3.codec, self.events[log['topics'][0]], log)
+        name, args = event['event'], event['args']
+        user = args.get('user', '').lower() or None
+        row = {
+            'block_number': log['blockNumber'],
+            'log_index': log['logIndex'],
+            'tx_hash': log['transactionHash'].hex(),
+            'event': name,
+            'user': user,
+            'token': None,
+            'token_bought': None,
+            'amount': None,
+            'amount_bought': None,
+            'ipfs_hash': None,
+        }
+
+        if name in ('Deposited', 'Withdrawn'):
+            row.update(token=args['token'].lower(), amount=str(args['amount']))
+            self._record_balance(user, row['token'], log, args['amount'] if name == 'Deposited' else -args['amount'])
+        elif name == 'Swapped':
+            row.update(
+                token=args['tokenSold'].lower(),
+                token_bought=args['tokenBought'].lower(),
+                amount=str(args['amountSold']),
+                amount_bought=str(args['amountBought'])
+            )
+            self._record_balance(user, row['token'], log, -args['amountSold'])
+            self._record_balance(user, row['token_bought'], log, args['amountBought'])
+        elif name == 'ReportHashStored':
+            row['ipfs_hash'] = args['ipfsHash']
+        elif name == 'PeriodReportStored':
+            row['ipfs_hash'] = args['ipfsDirectory']
+
+        self.db.execute(
+            'INSERT OR REPLACE INTO events VALUES '
+            '(:block_number, :log_index, :tx_hash, :event, :user, :token, :token_bought, :amount, :amount_bought, :ipfs_hash)',
+            row
+        )
+
+    def _index_range(self, from_block: int, to_block: int):
+        logs = self.w3.eth.get_logs({
+            'address': self.address,
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'topics': [[Web3.to_hex(topic) for topic in self.events]]
+        })
+        to_block_hash = self.w3.eth.get_block(to_block)['hash'].hex()
+
+        # One transaction per chunk: logs and the checkpoint are committed together
+        with self.db:
+            for log in sorted(logs, key=lambda log: (log['blockNumber'], log['logIndex'])):
+                self._store_log(log)
+            self.db.execute('INSERT OR REPLACE INTO blocks VALUES (?, ?)', (to_block, to_block_hash))
+            self.db.execute('DELETE FROM blocks WHERE number < ?', (to_block - REORG_WINDOW,))
+
+    def sync(self) -> int:
+        """Index every confirmed block not indexed yet, returns the last indexed block."""
+        self.handle_reorg()
+        checkpoint = self.checkpoint()
+        from_block = checkpoint[0] + 1 if checkpoint else self.start_block
+        head = self.w3.eth.block_number - self.confirmations
+
+        while from_block <= head:
+            to_block = min(from_block + self.chunk_size - 1, head)
+            try:
+                self._index_range(from_block, to_block)
+            except Exception as e:
+                # Providers cap the range or result count of eth_getLogs: retry with a smaller chunk
+                if self.chunk_size == 1:
+                    raise
+                self.chunk_size = max(self.chunk_size // 2, 1)
+                print(f"eth_getLogs {from_block}-{to_block} failed ({str(e)}), chunk size now {self.chunk_size}")
+                continue
+
+            from_block = to_block + 1
+            self.chunk_size = min(self.chunk_size * 2, self.max_chunk_size)
+
+        return from_block - 1
+
+    def run(self, poll_interval: float):
+        while True:
+            try:
+                block = self.sync()
+                print(f"Indexed up to block {block}")
+            except Exception as e:
+                print(f"Indexer error: {str(e)}")
+            time.sleep(poll_interval)
+
+
+class IndexStore:
+    """Read-only queries over the index, safe to use from any web worker thread."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def available(self) -> bool:
+        return os.path.exists(self.db_path)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[dict]:
+        with closing(connect(self.db_path, read_only=True)) as connection:
+            return [dict(row) for row in connection.execute(sql, params).fetchall()]
+
+    def indexed_block(self) -> Optional[int]:
+        rows = self._query('SELECT MAX(number) AS number FROM blocks')
+        return rows[0]['number'] if rows else None
+
+    def events(self, user: str, kinds: Optional[List[str]] = None, limit: int = 100, offset: int = 0) -> List[dict]:
+        kinds = list(kinds or INDEXED_EVENTS)
+        placeholders = ','.join('?' * len(kinds))
+        return self._query(
+            f'SELECT * FROM events WHERE user = ? AND event IN ({placeholders}) '
+            'ORDER BY block_number DESC, log_index DESC LIMIT ? OFFSET ?',
+            (user.lower(), *kinds, limit, offset)
+        )
+
+    def balance_history(self, user: str, token: Optional[str] = None, limit: int = 100) -> List[dict]:
+        if token:
+            return self._query(
+                'SELECT * FROM balance_history WHERE user = ? AND token = ? '
+                'ORDER BY block_number DESC, log_index DESC LIMIT ?',
+                (user.lower(), token.lower(), limit)
+            )
+        return self._query(
+            'SELECT * FROM balance_history WHERE user = ? ORDER BY block_number DESC, log_index DESC LIMIT ?',
+            (user.lower(), limit)
+        )
+
+    def report_hashes(self, user: str) -> List[str]:
+        rows = self._query(
+            "SELECT ipfs_hash FROM events WHERE user = ? AND event = 'ReportHashStored' ORDER BY block_number, log_index",
+            (user.lower(),)
+        )
+        return [row['ipfs_hash'] for row in rows]
+
+    def period_reports(self, limit: int) -> List[str]:
+        rows = self._query(
+            "SELECT ipfs_hash FROM events WHERE event = 'PeriodReportStored' ORDER BY block_number DESC, log_index DESC LIMIT ?",
+            (limit,)
+        )
+        return [row['ipfs_hash'] for row in reversed(rows)]
+
+
+DEFAULT_INDEX_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'index.sqlite')
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    indexer = Indexer(
+        BlockchainManager(os.getenv('RPC_URL')),
+        os.getenv('PORTFOLIO_MANAGER_ADDRESS'),
+        os.getenv('INDEX_DB', DEFAULT_INDEX_DB),
+        start_block=int(os.getenv('INDEXER_START_BLOCK', '0')),
+        confirmations=int(os.getenv('INDEXER_CONFIRMATIONS', '2')),
+        chunk_size=int(os.getenv('INDEXER_CHUNK_SIZE', '2000'))
+    )
+    indexer.run(float(os.getenv('INDEXER_POLL_INTERVAL', '12')))
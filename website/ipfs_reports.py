@@ -0,0 +1,170 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+import hashlib
+import json
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# IPFS report layout written by the agent
+REPORT_FILENAME = 'PortfolioRebalancer_Report.json'
+PERIOD_REPORT_DIRECTORY = 'PortfolioRebalancer_Reports'
+MAX_PERIOD_REPORTS = 10
+
+# Version 1 reports hold a single period, version 2 a columnar history of every period
+COLUMNAR_REPORT_VERSION = 2
+
+# Report history pagination
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def expand_report(report_data):
+    """Return the (timestamp, action, reason) rows held by a report of either version."""
+    if report_data.get('version', 1) != COLUMNAR_REPORT_VERSION:
+        recommendation = report_data.get('rebalancing_recommendation', {})
+        return [(
+            report_data.get('timestamp', 'N/A'),
+            recommendation.get('action', 'N/A'),
+            recommendation.get('reason', 'N/A')
+        )]
+
+    columns = report_data['columns']
+    return list(zip(columns['timestamp'], columns['action'], columns['reason']))
+
+
+def build_report_sources(ipfs_hashes: List[str], period_directories: List[str], user_address: str) -> List[List[str]]:
+    """Return the IPFS paths of a user's reports, grouped by source and oldest first."""
+    return [
+        # Per-user report hashes point at a single report file
+        [f"{ipfs_hash}/{REPORT_FILENAME}" for ipfs_hash in ipfs_hashes if ipfs_hash],
+        # Batched period directories hold one <user>.json report per rebalanced portfolio
+        [
+            f"{directory}/{PERIOD_REPORT_DIRECTORY}/{user_address.lower()}.json"
+            for directory in period_directories if directory
+        ],
+    ]
+
+
+def collect_reports(report_sources: List[List[str]], fetched: Dict[str, Optional[dict]],
+                    url: Callable[[str], str]) -> List[dict]:
+    """Flatten fetched reports of either version into rows, newest first."""
+    reports = []
+    seen_timestamps = set()
+
+    for report_paths in report_sources:
+        # Walk newest first: a columnar history already contains every older period
+        for report_path in reversed(report_paths):
+            report_data = fetched.get(report_path)
+            if report_data is None:
+                continue
+
+            # Extract only the needed fields
+            for timestamp, action, reason in expand_report(report_data):
+                if timestamp in seen_timestamps:
+                    continue
+                seen_timestamps.add(timestamp)
+                reports.append({
+                    'url': url(report_path),
+                    'timestamp': timestamp,
+                    'recommendation': action,
+                    'reason': reason
+                })
+
+            if report_data.get('version', 1) == COLUMNAR_REPORT_VERSION:
+                break
+
+    # Sort reports by timestamp in descending order (newest first)
+    reports.sort(key=lambda x: x['timestamp'], reverse=True)
+    return reports
+
+
+def paginate(reports: List[dict], page: Optional[int], page_size: Optional[int]) -> dict:
+    """Slice a report list into the page requested by the client."""
+    page = max(page or 1, 1)
+    page_size = min(max(page_size or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    return {
+        'reports': reports[(page - 1) * page_size:page * page_size],
+        'page': page,
+        'page_size': page_size,
+        'total': len(reports)
+    }
+
+
+class ReportCache:
+    """On-disk cache of IPFS documents keyed by their IPFS path.
+
+    IPFS content is addressed by hash and never changes, so cached documents never expire.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, ipfs_path: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(ipfs_path.encode()).hexdigest() + '.json')
+
+    def get(self, ipfs_path: str) -> Optional[dict]:
+        try:
+            with open(self._path(ipfs_path), 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, ipfs_path: str, report: dict):
+        cache_path = self._path(ipfs_path)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(report, file)
+        os.replace(tmp_path, cache_path)
+
+
+class ReportFetcher:
+    """Fetches JSON reports from IPFS gateways concurrently, through the on-disk report cache."""
+
+    def __init__(self, gateways: List[str], cache_dir: str, max_workers: int = 16, timeout: float = 5):
+        self.gateways = [gateway.rstrip('/') for gateway in gateways]
+        self.cache = ReportCache(cache_dir)
+        self.timeout = timeout
+
+        # One pooled session shared by all workers keeps gateway connections alive
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.gateways), pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ipfs-fetch')
+
+    def url(self, ipfs_path: str) -> str:
+        return f"{self.gateways[0]}/ipfs/{ipfs_path}"
+
+    def fetch(self, ipfs_path: str) -> Optional[dict]:
+        """Return the JSON document at an IPFS path, or None if no gateway serves it."""
+        report = self.cache.get(ipfs_path)
+        if report is not None:
+            return report
+
+        for gateway in self.gateways:
+            try:
+                response = self.session.get(f"{gateway}/ipfs/{ipfs_path}", timeout=self.timeout)
+                if response.status_code != 200:
+                    continue
+                report = response.json()
+            except requests.exceptions.RequestException:
+                continue
+            except ValueError:  # JSON decode error
+                continue
+
+            self.cache.put(ipfs_path, report)
+            return report
+
+        return None
+
+    def fetch_many(self, ipfs_paths: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """Fetch several IPFS paths concurrently, bounded by the worker pool size."""
+        ipfs_paths = list(dict.fromkeys(ipfs_paths))
+        return dict(zip(ipfs_paths, self.executor.map(self.fetch, ipfs_paths)))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
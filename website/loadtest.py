@@ -0,0 +1,89 @@
+"""Closed-loop load test for the dashboard API.
+
+Start a local fork and the dashboard against it, e.g.:
+    anvil --fork-url $MAINNET_RPC_URL
+    RPC_URL=http://127.0.0.1:8545 gunicorn -c gunicorn.conf.py app:app
+
+then:
+    python loadtest.py --url http://127.0.0.1:5000 --users 200 --duration 60 \
+        --address 0xYourRegisteredUser
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import argparse
+import itertools
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_ENDPOINTS = ['/api/balances', '/api/reports']
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_user(session, base_url, requests_cycle, deadline, results, lock):
+    # Each simulated user issues its next request as soon as the previous one returns
+    while time.monotonic() < deadline:
+        with lock:
+            endpoint, address = next(requests_cycle)
+        start = time.monotonic()
+        try:
+            response = session.get(f"{base_url}{endpoint}", params={'address': address}, timeout=30)
+            ok = response.status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        latency = time.monotonic() - start
+
+        with lock:
+            stats = results.setdefault(endpoint, {'latencies': [], 'errors': 0})
+            stats['latencies'].append(latency)
+            if not ok:
+                stats['errors'] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='Dashboard base URL')
+    parser.add_argument('--users', type=int, default=50, help='Concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=30, help='Test duration in seconds')
+    parser.add_argument('--address', action='append', required=True, help='User address to query (repeatable)')
+    parser.add_argument('--endpoint', action='append', help=f"Endpoint to hit (repeatable, default: {DEFAULT_ENDPOINTS})")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    requests_cycle = itertools.cycle(list(itertools.product(args.endpoint or DEFAULT_ENDPOINTS, args.address)))
+    results: Dict[str, dict] = {}
+    lock = threading.Lock()
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=args.users)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    start = time.monotonic()
+    deadline = start + args.duration
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        for _ in range(args.users):
+            executor.submit(run_user, session, base_url, requests_cycle, deadline, results, lock)
+    elapsed = time.monotonic() - start
+
+    print(f"{'endpoint':<20}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, stats in sorted(results.items()):
+        latencies = stats['latencies']
+        print(
+            f"{endpoint:<20}{len(latencies):>10}{stats['errors']:>8}{len(latencies) / elapsed:>10.1f}"
+            f"{percentile(latencies, 0.50) * 1000:>10.1f}"
+            f"{percentile(latencies, 0.95) * 1000:>10.1f}"
+            f"{percentile(latencies, 0.99) * 1000:>10.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
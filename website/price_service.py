@@ -0,0 +1,84 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+COINMARKETCAP_QUOTES_URL = 'https://pro-api.coinmarketcap.com/v2/cryptocurrency/quotes/latest'
+
+
+class PriceService:
+    """Serves CoinMarketCap USD prices from memory.
+
+    - Prices younger than `ttl` seconds are returned from the cache.
+    - Prices younger than `stale_ttl` are returned immediately while one background refresh runs.
+    - Concurrent misses for the same symbols wait on a single upstream request.
+    """
+
+    def __init__(self, api_key: str, ttl: float = 60, stale_ttl: float = 600, timeout: float = 10,
+                 url: str = COINMARKETCAP_QUOTES_URL):
+        self.url = url
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.timeout = timeout
+
+        # Pooled keep-alive session, each page load no longer pays a TLS handshake
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.headers.update({
+            'X-CMC_PRO_API_KEY': api_key or '',
+            'Accept': 'application/json'
+        })
+
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, ...], Tuple[Dict[str, float], float]] = {}
+        self._inflight: Dict[Tuple[str, ...], Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='price-refresh')
+
+    def _fetch(self, key: Tuple[str, ...]) -> Dict[str, float]:
+        response = self.session.get(self.url, params={'symbol': ','.join(key)}, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()['data']
+        return {symbol: data[symbol][0]['quote']['USD']['price'] for symbol in key}
+
+    def _refresh(self, key: Tuple[str, ...]) -> Dict[str, float]:
+        try:
+            prices = self._fetch(key)
+            with self._lock:
+                self._cache[key] = (prices, time.monotonic())
+            return prices
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _start_refresh(self, key: Tuple[str, ...]) -> Future:
+        # Must be called with the lock held
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._executor.submit(self._refresh, key)
+            self._inflight[key] = future
+        return future
+
+    def get_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """Return the USD price of each symbol."""
+        key = tuple(sorted(set(symbols)))
+        with self._lock:
+            cached: Optional[Tuple[Dict[str, float], float]] = self._cache.get(key)
+            age = time.monotonic() - cached[1] if cached else None
+
+            if cached and age < self.ttl:
+                return cached[0]
+
+            future = self._start_refresh(key)
+
+            # Stale while revalidate: answer now, the refresh updates the cache for the next caller
+            if cached and age < self.stale_ttl:
+                return cached[0]
+
+        return future.result()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
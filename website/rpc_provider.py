@@ -0,0 +1,146 @@
+from typing import Any, List, Optional, Sequence, Tuple
+import itertools
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from web3.providers.base import JSONBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+# Transient upstream statuses worth retrying on another endpoint
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Methods that must not be replayed on another endpoint once a node has received them
+NON_IDEMPOTENT_METHODS = {'eth_sendRawTransaction', 'eth_sendTransaction'}
+
+
+class RPCUnavailableError(Exception):
+    """Raised when every endpoint failed for every retry."""
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """JSON-RPC provider with keep-alive pooling, batching, retries and endpoint failover.
+
+    - One pooled session per provider keeps connections to every endpoint alive.
+    - Connection errors, timeouts, 5xx and 429 are retried with full-jitter backoff.
+    - A failing endpoint is skipped for `cooldown` seconds and requests fail over to the next one.
+    - Other responses, including 4xx, are returned or raised as they are, without failover.
+    - Transactions only fail over when the endpoint could not be reached at all.
+    """
+
+    def __init__(self, endpoint_uris: Sequence[str], timeout: float = 10, max_retries: int = 3,
+                 backoff_base: float = 0.1, backoff_max: float = 2.0, cooldown: float = 30,
+                 pool_maxsize: int = 32):
+        super().__init__()
+        self.endpoint_uris = [uri for uri in endpoint_uris if uri]
+        if not self.endpoint_uris:
+            raise ValueError("At least one RPC endpoint is required")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cooldown = cooldown
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoint_uris), pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._unhealthy_until = {uri: 0.0 for uri in self.endpoint_uris}
+        self._request_ids = itertools.count()
+
+    def __str__(self) -> str:
+        return f"Pooled RPC connection {self.endpoint_uris}"
+
+    def _endpoints(self) -> List[str]:
+        # Healthy endpoints first, in configured order, then the ones cooling down
+        now = time.monotonic()
+        with self._lock:
+            healthy = [uri for uri in self.endpoint_uris if self._unhealthy_until[uri] <= now]
+        return healthy + [uri for uri in self.endpoint_uris if uri not in healthy]
+
+    def _mark_unhealthy(self, uri: str):
+        with self._lock:
+            self._unhealthy_until[uri] = time.monotonic() + self.cooldown
+
+    @staticmethod
+    def _is_non_idempotent(payload: Any) -> bool:
+        calls = payload if isinstance(payload, list) else [payload]
+        return any(call.get('method') in NON_IDEMPOTENT_METHODS for call in calls)
+
+    @staticmethod
+    def _reached_node(error: requests.exceptions.RequestException) -> bool:
+        # Only a failed connect proves the request was never sent
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return False
+        if isinstance(error, requests.exceptions.ConnectionError):
+            reason = getattr(error.args[0], 'reason', None) if error.args else None
+            return not isinstance(reason, NewConnectionError)
+        return True
+
+    def _post(self, payload: Any) -> Any:
+        non_idempotent = self._is_non_idempotent(payload)
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Full jitter keeps retrying workers from hitting the RPC in lockstep
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+            for uri in self._endpoints():
+                try:
+                    response = self.session.post(uri, json=payload, timeout=self.timeout)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    last_error = e
+                    self._mark_unhealthy(uri)
+                    if non_idempotent and self._reached_node(e):
+                        raise RPCUnavailableError(f"{uri} failed after receiving the transaction: {e}") from e
+                    continue
+
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    last_error = requests.exceptions.HTTPError(f"{response.status_code} from {uri}")
+                    self._mark_unhealthy(uri)
+                    if non_idempotent:
+                        raise RPCUnavailableError(f"{uri} failed after receiving the transaction: {last_error}")
+                    continue
+
+                # Client errors are not the endpoint's fault; a JSON-RPC error body is returned as is
+                try:
+                    return response.json()
+                except ValueError as e:
+                    response.raise_for_status()
+                    raise RPCUnavailableError(f"Invalid JSON-RPC response from {uri}") from e
+
+        raise RPCUnavailableError(f"All RPC endpoints failed: {last_error}")
+
+    def _payload(self, method: RPCEndpoint, params: Any) -> dict:
+        return {'jsonrpc': '2.0', 'method': method, 'params': params or [], 'id': next(self._request_ids)}
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        return self._post(self._payload(method, params))
+
+    def make_batch_request(self, calls: Sequence[Tuple[RPCEndpoint, Any]]) -> List[RPCResponse]:
+        """Send several JSON-RPC calls in one HTTP request, responses in call order."""
+        if not calls:
+            return []
+        payload = [self._payload(method, params) for method, params in calls]
+        responses = self._post(payload)
+        if not isinstance(responses, list):  # Endpoint rejected the batch as a whole
+            raise RPCUnavailableError(f"Batch request rejected: {responses}")
+
+        by_id = {response.get('id'): response for response in responses}
+        return [by_id.get(request['id'], {'error': {'message': 'Missing batch response'}}) for request in payload]
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        try:
+            return 'result' in self.make_request(RPCEndpoint('web3_clientVersion'), [])
+        except RPCUnavailableError:
+            if show_traceback:
+                raise
+            return False
+
+    def close(self):
+        self.session.close()
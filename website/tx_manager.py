@@ -0,0 +1,146 @@
+from contextlib import closing
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import os
+import sqlite3
+import threading
+import time
+
+TX_PENDING = 'pending'
+TX_CONFIRMED = 'confirmed'
+TX_REVERTED = 'reverted'
+TX_DROPPED = 'dropped'
+
+DEFAULT_NONCE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nonces.sqlite')
+
+
+class NonceManager:
+    """Hands out consecutive nonces per sender without a get_transaction_count per write.
+
+    The next nonce of every sender is kept in a SQLite file shared by all worker processes;
+    each allocation is one write transaction, so concurrent writes from any worker never
+    collide. The first nonce of a sender is read from the pending block.
+    """
+
+    def __init__(self, db_path: str, get_transaction_count: Optional[Callable[[str], int]] = None,
+                 timeout: float = 30):
+        self.db_path = db_path
+        self.get_transaction_count = get_transaction_count
+        self.timeout = timeout
+        with closing(self._connect()) as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS nonces (sender TEXT PRIMARY KEY, next INTEGER NOT NULL)')
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, transactions are opened explicitly
+        return sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+
+    def allocate(self, sender: str, start: Optional[int] = None) -> Optional[int]:
+        """Allocate the next nonce of a sender.
+
+        Returns None for a sender without a stored nonce, unless `start`, its pending
+        transaction count, is given.
+        """
+        sender = sender.lower()
+        with closing(self._connect()) as connection:
+            # Takes the write lock up front, allocations of all processes are serialized
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = connection.execute('SELECT next FROM nonces WHERE sender = ?', (sender,)).fetchone()
+                if row is not None:
+                    nonce = row[0]
+                elif start is not None:
+                    nonce = start
+                else:
+                    connection.execute('ROLLBACK')
+                    return None
+                connection.execute('INSERT OR REPLACE INTO nonces VALUES (?, ?)', (sender, nonce + 1))
+                connection.execute('COMMIT')
+                return nonce
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+    def next_nonce(self, sender: str) -> int:
+        nonce = self.allocate(sender)
+        if nonce is None:
+            nonce = self.allocate(sender, self.get_transaction_count(sender))
+        return nonce
+
+    def reset(self, sender: str):
+        """Forget the stored nonce, e.g. after a failed send, and resync from the node next time."""
+        with closing(self._connect()) as connection:
+            connection.execute('DELETE FROM nonces WHERE sender = ?', (sender.lower(),))
+
+
+class TransactionTracker:
+    """Tracks submitted transactions until they are mined.
+
+    `on_block` is registered as a block listener, so the receipts of every pending transaction
+    are checked once per block in a single batched request, not by the request threads.
+    """
+
+    def __init__(self, get_receipts: Callable[[Sequence[str]], List[Optional[dict]]],
+                 transaction_exists: Callable[[str], bool], on_dropped: Optional[Callable[[dict], None]] = None,
+                 drop_after: float = 1800, keep_for: float = 3600):
+        self.get_receipts = get_receipts
+        self.transaction_exists = transaction_exists
+        self.on_dropped = on_dropped
+        self.drop_after = drop_after
+        self.keep_for = keep_for
+
+        self._lock = threading.Lock()
+        self._transactions: Dict[str, dict] = {}
+
+    def track(self, tx_hash: str, sender: str, nonce: int, method: str):
+        with self._lock:
+            self._transactions[tx_hash.lower()] = {
+                'hash': tx_hash,
+                'status': TX_PENDING,
+                'sender': sender,
+                'nonce': nonce,
+                'method': method,
+                'submitted_at': time.time(),
+                'block_number': None,
+                'gas_used': None,
+            }
+
+    def status(self, tx_hash: str) -> Optional[dict]:
+        with self._lock:
+            transaction = self._transactions.get(tx_hash.lower())
+            return dict(transaction) if transaction else None
+
+    def _pending(self, now: float) -> List[Tuple[str, dict]]:
+        with self._lock:
+            # Forget finished transactions once clients had time to read their status
+            for tx_hash, transaction in list(self._transactions.items()):
+                if transaction['status'] != TX_PENDING and now - transaction['submitted_at'] > self.keep_for:
+                    del self._transactions[tx_hash]
+            return [(tx_hash, dict(tx)) for tx_hash, tx in self._transactions.items() if tx['status'] == TX_PENDING]
+
+    def on_block(self, block_number: int):
+        now = time.time()
+        pending = self._pending(now)
+        if not pending:
+            return
+
+        receipts = self.get_receipts([transaction['hash'] for _, transaction in pending])
+        updates = {}
+        for (tx_hash, transaction), receipt in zip(pending, receipts):
+            if receipt is not None:
+                updates[tx_hash] = {
+                    'status': TX_CONFIRMED if int(receipt['status'], 16) == 1 else TX_REVERTED,
+                    'block_number': int(receipt['blockNumber'], 16),
+                    'gas_used': int(receipt['gasUsed'], 16),
+                }
+            elif now - transaction['submitted_at'] > self.drop_after and not self.transaction_exists(transaction['hash']):
+                updates[tx_hash] = {'status': TX_DROPPED}
+
+        with self._lock:
+            for tx_hash, update in updates.items():
+                if tx_hash in self._transactions:
+                    self._transactions[tx_hash].update(update)
+
+        if self.on_dropped:
+            for (tx_hash, transaction) in pending:
+                if updates.get(tx_hash, {}).get('status') == TX_DROPPED:
+                    self.on_dropped(transaction)
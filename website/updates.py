@@ -0,0 +1,105 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import json
+
+# Seconds between SSE comments keeping idle connections open through proxies
+HEARTBEAT_INTERVAL = 15
+
+
+class UpdateHub:
+    """Pushes per-user state changes to open dashboard streams.
+
+    Streams are served by the ASGI app: an open dashboard is a coroutine waiting on a queue, not
+    a worker thread. A single watcher task polls the block number and, on every new block, reads
+    the state of every subscribed user in one go, publishing to a user's streams only when their
+    state changed.
+    """
+
+    def __init__(self, fetch_states: Callable[[List[str], int], Awaitable[Dict[str, dict]]],
+                 get_block_number: Callable[[], Awaitable[int]], poll_interval: float = 2.0,
+                 max_queue_size: int = 16):
+        self.fetch_states = fetch_states
+        self.get_block_number = get_block_number
+        self.poll_interval = poll_interval
+        self.max_queue_size = max_queue_size
+
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._states: Dict[str, dict] = {}
+        self._block: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, address: str) -> asyncio.Queue:
+        address = address.lower()
+        updates: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.setdefault(address, set()).add(updates)
+        state = self._states.get(address)
+        if state is not None:
+            updates.put_nowait(state)
+        return updates
+
+    def unsubscribe(self, address: str, updates: asyncio.Queue):
+        address = address.lower()
+        subscribers = self._subscribers.get(address, set())
+        subscribers.discard(updates)
+        if not subscribers:
+            self._subscribers.pop(address, None)
+            self._states.pop(address, None)
+
+    async def on_block(self, block_number: int):
+        addresses = list(self._subscribers)
+        if not addresses:
+            return
+
+        states = await self.fetch_states(addresses, block_number)
+        for address, state in states.items():
+            if state == self._states.get(address) or address not in self._subscribers:
+                continue
+            self._states[address] = state
+            for updates in self._subscribers[address]:
+                try:
+                    updates.put_nowait({**state, 'block': block_number})
+                except asyncio.QueueFull:  # Slow client: it catches up with the next change
+                    pass
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._subscribers:  # Nobody is listening, no RPC calls
+                continue
+            try:
+                block = await self.get_block_number()
+                if self._block is not None and block <= self._block:
+                    continue
+                self._block = block
+                await self.on_block(block)
+            except Exception as e:
+                print(f"Update watcher error: {str(e)}")
+
+    def start(self):
+        """Start the block watcher on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._watch())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def stream(self, address: str) -> AsyncIterator[str]:
+        """Yield server-sent events for one dashboard until the client disconnects."""
+        updates = self.subscribe(address)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    state = await asyncio.wait_for(updates.get(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ': heartbeat\n\n'
+                    continue
+                yield f"event: state\ndata: {json.dumps(state)}\n\n"
+        finally:
+            self.unsubscribe(address, updates)